@@ -1,10 +1,13 @@
 import httpx
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
 from agent_models.schedule import ApiScheduleDTO as ScheduleDTO
 from agent_models.reading import ApiReadingDTO as ReadingDTO
+from agent_models.reading import ApiReadingResampleDTO as ReadingResampleDTO
 from agent_models.device import ApiDeviceDTO as DeviceDTO
-from agent_models.enums import ScheduleActionType, DeviceType, ControlActionType
+from agent_models.device import ApiControlResultDTO as ControlResultDTO
+from agent_models.garden import ApiGardenSnapshotDTO as GardenSnapshotDTO
+from agent_models.enums import ScheduleActionType, DeviceType, ControlActionType, ResampleMethod
 
 CONTROL_MAP: dict[tuple[DeviceType, ControlActionType], str] = {
     (DeviceType.WATERER, ControlActionType.WATER_ON): "water/on",
@@ -126,6 +129,7 @@ class BackendAgentClient:
         end_time: Optional[datetime] = None,
         offset: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> list[ReadingDTO]:
         """Get readings for a given device type in the garden.
 
@@ -135,10 +139,45 @@ class BackendAgentClient:
             end_time (datetime, optional): End of the time range.
             offset (int, optional): Pagination offset. Defaults to 0.
             limit (int, optional): Pagination limit. Defaults to 100.
+            cursor (str, optional): Cursor of the page to fetch, as returned
+                by `get_readings_page`.
 
         Returns:
             list[ReadingDTO]: A list of readings.
 
+        Raises:
+            Exception: If the backend responds with an error.
+        """
+        readings, _ = await self.get_readings_page(
+            device_type, start_time, end_time, offset, limit, cursor)
+        return readings
+
+    async def get_readings_page(
+        self,
+        device_type: DeviceType,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        offset: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[ReadingDTO], Optional[str]]:
+        """Get a page of readings and the cursor of the next page.
+
+        Pass the returned cursor back to fetch the following page; it seeks
+        directly to it instead of skipping `offset` readings.
+
+        Args:
+            device_type (DeviceType): The type of device to fetch readings for.
+            start_time (datetime, optional): Start of the time range.
+            end_time (datetime, optional): End of the time range.
+            offset (int, optional): Pagination offset. Defaults to 0.
+            limit (int, optional): Pagination limit. Defaults to 100.
+            cursor (str, optional): Cursor of the page to fetch.
+
+        Returns:
+            tuple[list[ReadingDTO], Optional[str]]: The readings, and the
+            cursor of the next page or None if this is the last page.
+
         Raises:
             Exception: If the backend responds with an error.
         """
@@ -147,6 +186,7 @@ class BackendAgentClient:
             "end_time": end_time.isoformat() if end_time else None,
             "offset": offset,
             "limit": limit,
+            "cursor": cursor,
         }
         async with httpx.AsyncClient() as client:
             resp = await client.get(
@@ -156,7 +196,63 @@ class BackendAgentClient:
             )
         if resp.status_code != 200:
             raise Exception(f"Backend error: {resp.text}")
-        return [ReadingDTO(**item) for item in resp.json()]
+        return (
+            [ReadingDTO(**item) for item in resp.json()],
+            resp.headers.get("X-Next-Cursor"),
+        )
+
+    async def resample_readings(
+        self,
+        device_types: list[DeviceType],
+        step: timedelta = timedelta(minutes=15),
+        method: ResampleMethod = ResampleMethod.MEAN,
+        ffill_limit: Optional[int] = 0,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> ReadingResampleDTO:
+        """Get the history of several sensor types aligned on a shared time grid.
+
+        Replaces paging through the readings of each type and aligning them
+        in the agent.
+
+        Args:
+            device_types (list[DeviceType]): Sensor types to resample.
+            step (timedelta, optional): Grid interval, a whole number of minutes.
+                Defaults to 15 minutes.
+            method (ResampleMethod, optional): Mean or last reading per interval.
+                Defaults to ``ResampleMethod.MEAN``.
+            ffill_limit (int, optional): Number of empty intervals filled with
+                the previous value, None for no limit. Defaults to 0.
+            start_time (datetime, optional): Start of the time range.
+                Defaults to 24 hours before `end_time`.
+            end_time (datetime, optional): End of the time range. Defaults to now.
+
+        Returns:
+            ReadingResampleDTO: Interval start times and one value array per type.
+
+        Raises:
+            Exception: If the backend responds with an error.
+        """
+        params = {
+            "types": [t.value for t in device_types],
+            "step": step.total_seconds(),
+            "method": method.value,
+        }
+        if ffill_limit is not None:
+            params["ffill_limit"] = ffill_limit
+        if start_time:
+            params["start_time"] = start_time.isoformat()
+        if end_time:
+            params["end_time"] = end_time.isoformat()
+        async with httpx.AsyncClient() as client:
+            resp = await client.get(
+                f"{self.base_url}/readings/garden/{self.garden_id}/resample",
+                headers=self._headers(),
+                params=params,
+            )
+        if resp.status_code != 200:
+            raise Exception(f"Backend error: {resp.text}")
+        return ReadingResampleDTO(**resp.json())
 
     async def get_last_reading(self, device_type: DeviceType) -> ReadingDTO:
         """Get the last reading for a given device type.
@@ -179,6 +275,27 @@ class BackendAgentClient:
             raise Exception(f"Backend error: {resp.text}")
         return ReadingDTO(**resp.json())
 
+    async def get_snapshot(self) -> GardenSnapshotDTO:
+        """Get the current state of the garden in a single request.
+
+        Prefer this over calling :meth:`get_last_reading` for every device type.
+
+        Returns:
+            GardenSnapshotDTO: Latest reading per sensor type, actuator states,
+            ESP online states and the unread notification count.
+
+        Raises:
+            Exception: If the backend responds with an error.
+        """
+        async with httpx.AsyncClient() as client:
+            resp = await client.get(
+                f"{self.base_url}/gardens/{self.garden_id}/snapshot",
+                headers=self._headers(),
+            )
+        if resp.status_code != 200:
+            raise Exception(f"Backend error: {resp.text}")
+        return GardenSnapshotDTO(**resp.json())
+
     async def get_devices(self) -> list[DeviceDTO]:
         """Get all devices registered in the garden.
 
@@ -198,15 +315,19 @@ class BackendAgentClient:
         self,
         device_type: DeviceType,
         action_type: ControlActionType,
-    ) -> bool:
+        wait_for_confirm: bool = False,
+    ) -> ControlResultDTO:
         """Send a control command to a device in the garden.
 
         Args:
             device_type (DeviceType): The type of device to control.
             action_type (ControlActionType): The control action to perform.
+            wait_for_confirm (bool, optional): Wait until the ESPs confirm the new
+                state instead of only the broker acknowledgement. Defaults to ``False``.
 
         Returns:
-            bool: ``True`` if the action was successful, otherwise ``False``.
+            ControlResultDTO: Per-ESP delivery status; ``delivered`` is ``True``
+            if every ESP acknowledged the command.
 
         Raises:
             Exception: If the backend responds with an error or action is unsupported.
@@ -219,9 +340,14 @@ class BackendAgentClient:
         url = f"{self.base_url}/devices/garden/{self.garden_id}/{path}"
 
         async with httpx.AsyncClient() as client:
-            resp = await client.post(url, headers=self._headers())
+            resp = await client.post(
+                url,
+                headers=self._headers(),
+                params={"wait_for_confirm": wait_for_confirm},
+                timeout=30,
+            )
 
         if resp.status_code != 200:
             raise Exception(f"Backend error: {resp.text}")
 
-        return resp.json()
+        return ControlResultDTO(**resp.json())
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from agent_models.enums import DeviceType
+from agent_models.enums import DeliveryStatus, DeviceType
 
 
 class ApiDeviceDTO(BaseModel):
@@ -16,3 +16,41 @@ class ApiDeviceDTO(BaseModel):
 
     id: int
     type: DeviceType
+
+
+class ApiEspControlResultDTO(BaseModel):
+    """
+    Delivery status of a control command for a single ESP device.
+
+    Attributes
+    ----------
+    esp_id : int
+        Identifier of the ESP device.
+    mac : str
+        MAC address of the ESP device.
+    status : DeliveryStatus
+        Whether the command was acknowledged, timed out or failed.
+    """
+
+    esp_id: int
+    mac: str
+    status: DeliveryStatus
+
+
+class ApiControlResultDTO(BaseModel):
+    """
+    Result of a control command sent to the devices of a garden.
+
+    Attributes
+    ----------
+    delivered : bool
+        True if all ESP devices acknowledged the command.
+    latency_ms : float
+        Time spent publishing the command, in milliseconds.
+    results : list[ApiEspControlResultDTO]
+        Per-ESP delivery status.
+    """
+
+    delivered: bool
+    latency_ms: float
+    results: list[ApiEspControlResultDTO]
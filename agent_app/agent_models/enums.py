@@ -32,6 +32,25 @@ class ScheduleActionType(str, Enum):
     HEATING_MAT_OFF = "HEATING_MAT_OFF"
 
 
+class DeliveryStatus(str, Enum):
+    """
+    Enum representing the outcome of a control command sent to an ESP device.
+    """
+    ACKED = "ACKED"
+    CONFIRMED = "CONFIRMED"
+    UNCONFIRMED = "UNCONFIRMED"
+    TIMED_OUT = "TIMED_OUT"
+    FAILED = "FAILED"
+
+
+class ResampleMethod(str, Enum):
+    """
+    Enum representing how readings within a resampling interval are combined.
+    """
+    MEAN = "mean"
+    LAST = "last"
+
+
 class ControlActionType(IntEnum):
     """
     Enum representing numeric identifiers for control actions.
@@ -0,0 +1,70 @@
+from typing import Optional
+from pydantic import BaseModel
+from agent_models.enums import DeviceType
+from agent_models.reading import ApiReadingDTO
+
+
+class ApiActuatorStateDTO(BaseModel):
+    """
+    State of a single actuator in a garden snapshot.
+
+    Attributes
+    ----------
+    device_id : int
+        Identifier of the actuator device.
+    esp_id : int
+        Identifier of the ESP device it is attached to.
+    type : DeviceType
+        Type of the actuator (e.g., WATERER, HEATER).
+    enabled : bool, optional
+        Whether the actuator is currently switched on, if known.
+    """
+
+    device_id: int
+    esp_id: int
+    type: DeviceType
+    enabled: Optional[bool]
+
+
+class ApiEspStatusDTO(BaseModel):
+    """
+    Online state of an ESP device in a garden snapshot.
+
+    Attributes
+    ----------
+    esp_id : int
+        Identifier of the ESP device.
+    mac : str
+        MAC address of the ESP device.
+    online : bool
+        Whether the ESP device is currently connected.
+    """
+
+    esp_id: int
+    mac: str
+    online: bool
+
+
+class ApiGardenSnapshotDTO(BaseModel):
+    """
+    Current state of a garden, returned in a single backend response.
+
+    Attributes
+    ----------
+    garden_id : int
+        Identifier of the garden.
+    readings : dict[DeviceType, ApiReadingDTO]
+        Latest reading per sensor type. Types without readings are omitted.
+    actuators : list[ApiActuatorStateDTO]
+        State of every actuator in the garden.
+    esp_devices : list[ApiEspStatusDTO]
+        Online state of every ESP device in the garden.
+    unread_notifications : int
+        Number of unread notifications of the garden owner.
+    """
+
+    garden_id: int
+    readings: dict[DeviceType, ApiReadingDTO]
+    actuators: list[ApiActuatorStateDTO]
+    esp_devices: list[ApiEspStatusDTO]
+    unread_notifications: int
@@ -1,5 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 from pydantic import BaseModel
+from agent_models.enums import DeviceType, ResampleMethod
 
 
 class ApiReadingDTO(BaseModel):
@@ -9,5 +11,28 @@ class ApiReadingDTO(BaseModel):
     id: int
     device_id: int
     value: str
+    numeric_value: Optional[float] = None
     timestamp: datetime
     esp_id: int
+
+
+class ApiReadingResampleDTO(BaseModel):
+    """
+    Readings of several device types resampled onto a shared time grid.
+
+    Attributes
+    ----------
+    step : timedelta
+        Width of the grid intervals.
+    method : ResampleMethod
+        How the readings within an interval were combined.
+    timestamps : list[datetime]
+        Start times of the grid intervals.
+    values : dict[DeviceType, list[float | None]]
+        Values per device type, aligned with ``timestamps``. None marks
+        intervals without readings.
+    """
+    step: timedelta
+    method: ResampleMethod
+    timestamps: list[datetime]
+    values: dict[DeviceType, list[Optional[float]]]
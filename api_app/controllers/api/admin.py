@@ -1,6 +1,13 @@
 from fastapi import APIRouter
 from core.dependencies import AdminUserDep, DeviceServiceDep, EspDeviceServiceDep
-from models.dtos.admin import CreateEspDeviceRequest
+from core.ingest.reading_buffer import reading_buffer
+from core.mqtt.mqtt_publisher import MqttTopicPublisher
+from core.mqtt.mqtt_subscriber import MqttTopicSubscriber
+from core.state.command_tracker import command_tracker
+from core.state.device_cache import device_cache
+from core.state.last_values import last_values
+from core.state.presence import presence_table
+from models.dtos.admin import CreateEspDeviceRequest, FleetPresenceDTO
 
 router = APIRouter()
 
@@ -22,3 +29,37 @@ async def create_esp_device(
     await device_service.create_all_for_esp(device.id)
 
     return {"status": "created", "mac": device.mac}
+
+
+@router.get("/metrics/ingest")
+async def get_ingest_metrics(_: AdminUserDep):
+    """
+    Return reading ingest counters (admin-only).
+
+    Includes buffer queue depth, flushed/dropped totals, flush latency,
+    the lag and size of the on-disk reading journal,
+    the size of the device resolution cache, MQTT dispatch queue depths,
+    the state of the shared MQTT publisher connection, actuator
+    command-to-confirm latencies and timeouts, ESP presence counters and
+    last-value store hits and misses.
+    """
+    return {
+        "reading_buffer": reading_buffer.stats(),
+        "reading_journal": reading_buffer.journal.stats() if reading_buffer.journal else None,
+        "device_cache": device_cache.stats(),
+        "mqtt": MqttTopicSubscriber().stats(),
+        "mqtt_publisher": MqttTopicPublisher().stats(),
+        "commands": command_tracker.stats(),
+        "presence": presence_table.stats(),
+        "last_values": last_values.stats(),
+    }
+
+
+@router.get("/presence", response_model=FleetPresenceDTO)
+async def get_fleet_presence(_: AdminUserDep):
+    """
+    Return the online state of all ESP devices (admin-only).
+
+    Served from the in-memory presence table without querying the database.
+    """
+    return presence_table.summary()
@@ -1,11 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from core.dependencies import (
     DeviceServiceDep,
     EspDeviceForGardenDep,
     SpecificEspDeviceForGardenDep,
 )
 from common_db.enums import ControlActionType, DeviceType
-from models.dtos.devices import DeviceDTO
+from models.dtos.devices import ControlResultDTO, DeviceDTO
 
 router = APIRouter()
 
@@ -35,13 +35,17 @@ def make_all_handler(device_type: DeviceType, action_type: ControlActionType):
     async def control_all_action(
         service: DeviceServiceDep,
         esps: EspDeviceForGardenDep,
+        wait_for_confirm: bool = Query(False),
     ):
         """
         Control all ESP devices of type ``{device_type}`` in a garden.
 
-        Executes the specified action across all devices.
+        Executes the specified action across all devices and
+        returns the delivery status for every ESP. With ``wait_for_confirm``
+        the response is sent once the ESPs confirmed the new state.
         """
-        return await service.control_device(esps, device_type, action_type)
+        return await service.control_device(
+            esps, device_type, action_type, wait_for_confirm)
 
     return control_all_action
 
@@ -50,13 +54,17 @@ def make_one_handler(device_type: DeviceType, action_type: ControlActionType):
     async def control_one_action(
         service: DeviceServiceDep,
         esp: SpecificEspDeviceForGardenDep,
+        wait_for_confirm: bool = Query(False),
     ):
         """
         Control a specific ESP device of type ``{device_type}``.
 
-        Executes the specified action on a single device.
+        Executes the specified action on a single device and
+        returns its delivery status. With ``wait_for_confirm``
+        the response is sent once the ESP confirmed the new state.
         """
-        return await service.control_device([esp], device_type, action_type)
+        return await service.control_device(
+            [esp], device_type, action_type, wait_for_confirm)
 
     return control_one_action
 
@@ -64,12 +72,12 @@ def make_one_handler(device_type: DeviceType, action_type: ControlActionType):
 for path, (device_type, action_type) in CONTROL_MAP.items():
     router.post(
         f"/garden/{{garden_id}}/{path}",
-        response_model=bool,
+        response_model=ControlResultDTO,
         name=f"{path.replace('/', '_')}_all",
     )(make_all_handler(device_type, action_type))
 
     router.post(
         f"/esp/{{esp_id}}/{path}",
-        response_model=bool,
+        response_model=ControlResultDTO,
         name=f"{path.replace('/', '_')}_one",
     )(make_one_handler(device_type, action_type))
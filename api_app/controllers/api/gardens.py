@@ -5,6 +5,7 @@ from models.dtos.gardens import (
     GardenCreateDTO,
     GardenDTO,
     GardenPreferencesUpdateDTO,
+    GardenSnapshotDTO,
     GardenUpdateDTO,
 )
 
@@ -77,6 +78,20 @@ async def get_garden_by_id(
     return garden
 
 
+@router.get("/{garden_id}/snapshot", response_model=GardenSnapshotDTO)
+async def get_garden_snapshot(
+    service: GardenServiceDep,
+    garden: GardenDep,
+):
+    """
+    Fetch the current state of a garden in a single response.
+    Returns the latest reading per sensor type, actuator states,
+    ESP online states and the owner's unread notification count,
+    replacing one request per device type.
+    """
+    return await service.get_snapshot(garden)
+
+
 @router.patch("/{garden_id}/preferences", response_model=GardenDTO)
 async def update_preferences(
     prefs: GardenPreferencesUpdateDTO,
@@ -1,43 +1,78 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from core.dependencies import (
     ReadingServiceDep,
     GardenDep,
 )
-from models.dtos.readings import ReadingDTO
-from common_db.enums import DeviceType
+from models.dtos.readings import (
+    ReadingAggregateDTO,
+    ReadingDTO,
+    ReadingResampleDTO,
+    ReadingStatsDTO,
+)
+from common_db.enums import DeviceType, ReadingExportFormat, ResampleMethod
 
 router = APIRouter()
 
+EXPORT_MEDIA_TYPES = {
+    ReadingExportFormat.NDJSON: "application/x-ndjson",
+    ReadingExportFormat.CSV: "text/csv",
+}
+
 
 @router.get("/garden/{garden_id}/device-type/{type}", response_model=list[ReadingDTO])
 async def get_by_filters_for_garden_paginated(
     garden: GardenDep,
     type: DeviceType,
     service: ReadingServiceDep,
+    response: Response,
     start_time: Optional[datetime] = Query(None),
     end_time: Optional[datetime] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(100, gt=0),
+    cursor: Optional[str] = Query(None),
+    max_points: Optional[int] = Query(None, ge=3, le=10000),
 ):
     """
     Retrieve sensor readings for a garden by device type.
     Supports filtering with time range, offset and limit.
     Useful for building charts or reports.
+
+    The cursor of the next page is returned in the X-Next-Cursor header
+    and can be passed back as `cursor` instead of increasing `offset`.
+
+    With `max_points`, the whole range is returned instead of a page,
+    reduced on the server to at most `max_points` numeric readings per
+    device that keep the shape of the series (LTTB). Pagination
+    parameters are ignored then.
     """
     start_time = start_time or datetime.min
     end_time = end_time or datetime.utcnow()
 
-    return await service.get_by_garden_filters_paginated(
+    if max_points is not None:
+        return await service.get_downsampled_for_garden_device_type(
+            garden_id=garden.id,
+            type=type,
+            start_time=start_time,
+            end_time=end_time,
+            max_points=max_points,
+        )
+
+    readings, next_cursor = await service.get_by_garden_filters_paginated(
         garden_id=garden.id,
         type=type,
         start_time=start_time,
         end_time=end_time,
         offset=offset,
         limit=limit,
+        cursor=cursor,
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return readings
 
 
 @router.get("/garden/{garden_id}/device-type/{type}/last", response_model=ReadingDTO)
@@ -54,3 +89,128 @@ async def get_last_by_device_type(
         garden_id=garden.id,
         type=type,
     )
+
+
+@router.get("/garden/{garden_id}/device-type/{type}/stats", response_model=list[ReadingStatsDTO])
+async def get_stats_by_device_type(
+    garden: GardenDep,
+    type: DeviceType,
+    service: ReadingServiceDep,
+    start_time: Optional[datetime] = Query(None),
+    end_time: Optional[datetime] = Query(None),
+):
+    """
+    Retrieve count, average, minimum and maximum of sensor readings
+    per device of a given type, computed by the database.
+    """
+    start_time = start_time or datetime.min
+    end_time = end_time or datetime.utcnow()
+
+    return await service.get_stats_for_garden_device_type(
+        garden_id=garden.id,
+        type=type,
+        start_time=start_time,
+        end_time=end_time,
+    )
+
+
+@router.get(
+    "/garden/{garden_id}/device-type/{type}/aggregate",
+    response_model=list[ReadingAggregateDTO],
+)
+async def get_aggregates_by_device_type(
+    garden: GardenDep,
+    type: DeviceType,
+    service: ReadingServiceDep,
+    response: Response,
+    bucket: timedelta = Query(
+        timedelta(hours=1),
+        description="Bucket width, e.g. PT15M, P1D or a number of seconds",
+    ),
+    start_time: Optional[datetime] = Query(None),
+    end_time: Optional[datetime] = Query(None),
+):
+    """
+    Retrieve count, sum, average, minimum, maximum and last value of
+    sensor readings per device and time bucket, for charts over long
+    ranges. Served from precomputed minute, hour or day rollups; the
+    rollups used are returned in the X-Rollup header.
+    """
+    rollup, aggregates = await service.get_aggregates_for_garden_device_type(
+        garden_id=garden.id,
+        type=type,
+        bucket=bucket,
+        start_time=start_time or datetime.min,
+        end_time=end_time,
+    )
+    response.headers["X-Rollup"] = rollup
+    return aggregates
+
+
+@router.get("/garden/{garden_id}/resample", response_model=ReadingResampleDTO)
+async def resample_for_garden(
+    garden: GardenDep,
+    service: ReadingServiceDep,
+    types: list[DeviceType] = Query(...),
+    step: timedelta = Query(
+        timedelta(minutes=15),
+        description="Grid interval, e.g. PT15M, P1D or a number of seconds",
+    ),
+    method: ResampleMethod = Query(ResampleMethod.MEAN),
+    ffill_limit: Optional[int] = Query(
+        None, ge=0,
+        description="Empty intervals filled after a value; omit for no limit",
+    ),
+    start_time: Optional[datetime] = Query(None),
+    end_time: Optional[datetime] = Query(None),
+):
+    """
+    Retrieve several sensor types of a garden resampled onto a shared
+    time grid, as one array of interval start times and one array of
+    values per type. Each interval holds the mean or the last of the
+    readings in it; up to `ffill_limit` empty intervals after a value
+    repeat it, other empty intervals are null. Without `ffill_limit` all
+    empty intervals after a value repeat it; 0 disables filling.
+    Defaults to the last 24 hours.
+    """
+    end_time = end_time or datetime.utcnow()
+    start_time = start_time or end_time - timedelta(days=1)
+
+    return await service.resample_for_garden(
+        garden_id=garden.id,
+        types=types,
+        step=step,
+        start_time=start_time,
+        end_time=end_time,
+        method=method,
+        ffill_limit=ffill_limit,
+    )
+
+
+@router.get("/garden/{garden_id}/device-type/{type}/export")
+async def export_by_device_type(
+    garden: GardenDep,
+    type: DeviceType,
+    service: ReadingServiceDep,
+    format: ReadingExportFormat = Query(ReadingExportFormat.NDJSON),
+    start_time: Optional[datetime] = Query(None),
+    end_time: Optional[datetime] = Query(None),
+):
+    """
+    Download the full reading history of a device type as NDJSON or CSV.
+    The response is streamed while it is read from the database, so
+    arbitrarily long ranges can be exported.
+    """
+    chunks = await service.export_for_garden_device_type(
+        garden_id=garden.id,
+        type=type,
+        start_time=start_time or datetime.min,
+        end_time=end_time or datetime.utcnow(),
+        format=format,
+    )
+    filename = f"readings-{garden.id}-{type.value.lower()}.{format.value}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
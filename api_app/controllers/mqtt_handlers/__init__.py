@@ -1,22 +1,47 @@
 from .status_handler import StatusHandler
 from .actuator_confirm_handler import ActuatorConfirmHandler
+from .actuator_state_handler import ActuatorStateHandler
 from .conn_handler import ConnHandler
 from .device_reading_handler import DeviceReadingHandler
 
+from core.config import CONFIG
 from core.mqtt.mqtt_subscriber import MqttTopicSubscriber
 
 
 async def subscribe_topics():
     """
-    Subscribe all MQTT handlers to the broker topics.
+    Subscribe the MQTT handlers of the API process to the broker topics.
+
+    With ``CONFIG.MQTT_INGEST_IN_API`` disabled, readings, connection
+    events and confirmed actuator states are stored by the standalone
+    ingest worker, and the API only forwards live readings and keeps the
+    handlers backing its in-memory state (command confirmations and presence).
+    """
+    if CONFIG.MQTT_INGEST_IN_API:
+        handlers = (
+            DeviceReadingHandler(),
+            ConnHandler(),
+            ActuatorConfirmHandler(),
+            ActuatorStateHandler(),
+            StatusHandler(),
+        )
+    else:
+        handlers = (
+            DeviceReadingHandler(store=False),
+            ActuatorConfirmHandler(),
+            StatusHandler(),
+        )
+
+    for handler in handlers:
+        await MqttTopicSubscriber().subscribe_handler(handler)
+
+
+async def subscribe_ingest_topics():
+    """
+    Subscribe the MQTT handlers of the standalone ingest worker.
     """
-    for handler in (
-        DeviceReadingHandler,
-        ConnHandler,
-        ActuatorConfirmHandler,
-        StatusHandler,
-    ):
-        await MqttTopicSubscriber().subscribe_handler(handler())
+    for handler in (DeviceReadingHandler(), ConnHandler(), ActuatorStateHandler()):
+        await MqttTopicSubscriber().subscribe_handler(handler)
 
 
-__all__ = ["subscribe_topics"]
+__all__ = ["subscribe_topics", "subscribe_ingest_topics"]
@@ -1,11 +1,7 @@
 import logging
 from controllers.mqtt_handlers.base_device_handler import BaseDeviceHandler
-from core.db_context import async_session_maker
-from models.dtos.notifications import NotificationCreateDTO
-from repos.notifications import NotificationRepository
-from services.notifications import NotificationService
-from repos.devices import DeviceRepository
-from common_db.enums import DeviceType, NotificationType
+from core.state.command_tracker import command_tracker
+from common_db.enums import DeviceType
 
 logger = logging.getLogger(__name__)
 
@@ -17,22 +13,56 @@ ACTUATOR_STR_TO_DEVICE_TYPE = {
 }
 
 
+def parse_confirm_payload(payload: dict) -> tuple[DeviceType, str, object] | None:
+    """
+    Validate an actuator confirmation payload.
+
+    Parameters
+    ----------
+    payload : dict
+        Parsed payload with the ``device``, ``action`` and ``status`` fields.
+
+    Returns
+    -------
+    tuple[DeviceType, str, object] | None
+        Device type, action (``"on"`` or ``"off"``) and status,
+        or ``None`` if the payload is invalid.
+    """
+    device_str = payload.get("device")
+    if device_str not in ACTUATOR_STR_TO_DEVICE_TYPE:
+        logger.warning(f"Unknown actuator type '{device_str}' in payload.")
+        return None
+
+    action = payload.get("action")
+    status = payload.get("status")
+    if action not in ("on", "off") or status is None:
+        logger.warning(f"Invalid actuator confirm payload: {payload}")
+        return None
+
+    return ACTUATOR_STR_TO_DEVICE_TYPE[device_str], action, status
+
+
 class ActuatorConfirmHandler(BaseDeviceHandler):
     """
     MQTT handler responsible for processing actuator confirmation messages.
     Subscribed to the topic pattern ``{mac}/device/confirm``.
 
-    This handler updates device states in the database and, if possible,
-    triggers user notifications about actuator state changes.
+    This handler resolves the pending command in the per-process
+    :data:`command_tracker` and pushes the confirmation to the WebSocket
+    clients connected to this process, so every API replica receives every
+    message. The device state and the user notification are stored once
+    per confirmation by :class:`ActuatorStateHandler`.
     """
 
+    binary_payloads = True
+
     def __init__(self):
         """
         Initialize the handler with the appropriate MQTT topic template.
         """
         super().__init__("{mac}/device/confirm")
 
-    async def __call__(self, topic: str, payload: dict):
+    async def __call__(self, topic: str, payload: dict, mac: str):
         """
         Handle an incoming actuator confirmation MQTT message.
 
@@ -45,31 +75,22 @@ class ActuatorConfirmHandler(BaseDeviceHandler):
               - ``device``: string name of actuator (e.g. "water").
               - ``action``: expected to be "on" or "off".
               - ``status``: confirmation status of the action.
+        mac : str
+            MAC address of the ESP device, extracted from the topic.
 
         Returns
         -------
         """
         logger.info(f"[ACTUATOR_CONFIRM] topic={topic}, payload={payload}")
 
-        device_str = payload.get("device")
-        if device_str not in ACTUATOR_STR_TO_DEVICE_TYPE:
-            logger.warning(f"Unknown actuator type '{device_str}' in payload.")
+        parsed = parse_confirm_payload(payload)
+        if parsed is None:
             return
-        device_type = ACTUATOR_STR_TO_DEVICE_TYPE[device_str]
+        device_type, action, status = parsed
 
-        action = payload.get("action")
-        status = payload.get("status")
-        if action not in ("on", "off") or status is None:
-            logger.warning(f"Invalid actuator confirm payload: {payload}")
-            return
+        command_tracker.confirm(mac, device_type, action, bool(status))
 
-        try:
-            mac = self.extract_from_topic(topic, "mac")
-        except (ValueError, TypeError):
-            logger.warning(f"Could not extract valid mac from topic: {topic}")
-            return
-
-        device, user = await self.process_device_event(
+        await self.process_device_event(
             topic,
             mac,
             device_type,
@@ -77,26 +98,3 @@ class ActuatorConfirmHandler(BaseDeviceHandler):
             websocket_event="actuator_confirm",
             extra_fields={"action": action, "status": status},
         )
-
-        if device and status:
-            async with async_session_maker() as session:
-                new_enabled = True if action == "on" else False
-
-                device_repo = DeviceRepository(session)
-                await device_repo.update(device.id, enabled=new_enabled)
-
-                if user:
-                    not_service = NotificationService(
-                        NotificationRepository(session))
-                    status = "enabled" if new_enabled else "disabled"
-                    await not_service.create(
-                        NotificationCreateDTO(
-                            user_id=user.id,
-                            message=f"Device {device_type} is {status}",
-                            type=NotificationType.alert,
-                        )
-                    )
-                else:
-                    logger.warning(
-                        "Cannot send notification because owner of esp is not specified"
-                    )
@@ -0,0 +1,82 @@
+import logging
+from controllers.mqtt_handlers.actuator_confirm_handler import parse_confirm_payload
+from core.db_context import async_session_maker
+from core.mqtt.base_mqtt_callback_handler import BaseMqttCallbackHandler
+from core.state.device_cache import device_cache
+from models.dtos.notifications import NotificationCreateDTO
+from repos.notifications import NotificationRepository
+from services.notifications import NotificationService
+from repos.devices import DeviceRepository
+from common_db.enums import NotificationType
+
+logger = logging.getLogger(__name__)
+
+
+class ActuatorStateHandler(BaseMqttCallbackHandler):
+    """
+    MQTT handler storing the actuator state confirmed by an ESP device.
+    Subscribed to the topic pattern ``{mac}/device/confirm``.
+
+    Updates the ``enabled`` flag of the device and notifies its owner.
+    The handler is shared, so with several API replicas each confirmation
+    is stored by one of them. With ``CONFIG.MQTT_INGEST_IN_API`` disabled
+    it runs in the ingest worker owning the MAC instead.
+    """
+
+    shared = True
+    binary_payloads = True
+
+    def __init__(self):
+        """
+        Initialize the handler with the appropriate MQTT topic template.
+        """
+        super().__init__("{mac}/device/confirm")
+
+    async def __call__(self, topic: str, payload: dict, mac: str):
+        """
+        Store a successful actuator confirmation.
+
+        Parameters
+        ----------
+        topic : str
+            The MQTT topic that carried the message.
+        payload : dict
+            The parsed payload, see :class:`ActuatorConfirmHandler`.
+        mac : str
+            MAC address of the ESP device, extracted from the topic.
+        """
+        parsed = parse_confirm_payload(payload)
+        if parsed is None:
+            return
+        device_type, action, status = parsed
+        if not status:
+            return
+
+        route = await device_cache.get(mac, device_type)
+        if not route:
+            logger.warning(
+                f"No {device_type.name} device found for esp with mac {mac}"
+            )
+            return
+
+        async with async_session_maker() as session:
+            new_enabled = True if action == "on" else False
+
+            device_repo = DeviceRepository(session)
+            await device_repo.update(route.device_id, enabled=new_enabled)
+
+            if route.user_id:
+                not_service = NotificationService(
+                    NotificationRepository(session))
+                state = "enabled" if new_enabled else "disabled"
+                await not_service.create(
+                    NotificationCreateDTO(
+                        user_id=route.user_id,
+                        message=f"Device {device_type} is {state}",
+                        type=NotificationType.alert,
+                    )
+                )
+            else:
+                logger.warning(
+                    "Cannot send notification because owner of esp is not specified"
+                )
@@ -1,8 +1,6 @@
 import logging
 from core.mqtt.base_mqtt_callback_handler import BaseMqttCallbackHandler
-from core.db_context import async_session_maker
-from repos.devices import DeviceRepository
-from repos.agents import AgentRepository
+from core.state.device_cache import DeviceRoute, device_cache
 from core.websocket.websocket_manager import websocket_manager
 
 logger = logging.getLogger(__name__)
@@ -35,12 +33,15 @@ class BaseDeviceHandler(BaseMqttCallbackHandler):
         payload: dict,
         websocket_event: str,
         extra_fields: dict,
-    ) -> tuple:
+    ) -> DeviceRoute | None:
         """
         Process a device event by resolving the device and its owner,
         sending notifications over WebSocket, and optionally notifying
         the agent assigned to the garden.
 
+        The device is resolved from the in-memory :data:`device_cache`,
+        so no database reads are done for already known ESPs.
+
         Parameters
         ----------
         topic : str
@@ -58,43 +59,35 @@ class BaseDeviceHandler(BaseMqttCallbackHandler):
 
         Returns
         -------
-        tuple
-            A tuple ``(device, user)`` where:
-              - ``device`` is the resolved device entity or ``None``.
-              - ``user`` is the owner of the ESP device or ``None``.
+        DeviceRoute | None
+            Routing data of the resolved device (device, ESP, garden,
+            owner and agent IDs) or ``None`` if no such device exists.
         """
-        async with async_session_maker() as session:
-            device_repo = DeviceRepository(session)
-            device = await device_repo.get_device_by_type_for_esp_mac(mac, device_type)
-            if not device:
-                logger.warning(
-                    f"No {device_type.name} device found for esp with mac {mac}"
-                )
-                return None, None
-
-            esp = device.esp
-            garden_id = esp.garden_id
-            user = esp.user
-            if not user:
-                logger.warning(f"User not found for esp with mac {mac}")
-                return device, None
+        route = await device_cache.get(mac, device_type)
+        if not route:
+            logger.warning(
+                f"No {device_type.name} device found for esp with mac {mac}"
+            )
+            return None
 
-            event_data = {
-                "event": websocket_event,
-                "device_type": device_type.value,
-                "esp_mac": mac,
-                "garden_id": garden_id,
-                "device_id": device.id,
-                **extra_fields,
-            }
-            await websocket_manager.send_to_user(user.id, event_data)
+        if not route.user_id:
+            logger.warning(f"User not found for esp with mac {mac}")
+            return route
 
-            logger.info(f"WebSocket {websocket_event} sent to user {user.id}")
+        event_data = {
+            "event": websocket_event,
+            "device_type": device_type.value,
+            "esp_mac": mac,
+            "garden_id": route.garden_id,
+            "device_id": route.device_id,
+            **extra_fields,
+        }
+        await websocket_manager.send_to_user(route.user_id, event_data)
 
-            agent_repo = AgentRepository(session)
-            agent = await agent_repo.get_by_garden(garden_id)
+        logger.info(
+            f"WebSocket {websocket_event} sent to user {route.user_id}")
 
-            if agent:
-                await websocket_manager.send_to_agent(agent.id, event_data)
+        if route.agent_id:
+            await websocket_manager.send_to_agent(route.agent_id, event_data)
 
-            return device, user
+        return route
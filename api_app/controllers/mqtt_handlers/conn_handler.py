@@ -2,6 +2,7 @@ import logging
 from controllers.push.push_notification import PushNotificationController
 from core.db_context import async_session_maker
 from core.mqtt.base_mqtt_callback_handler import BaseMqttCallbackHandler
+from core.state.device_cache import device_cache
 from models.dtos.notifications import NotificationCreateDTO
 from repos.esp_devices import EspDeviceRepository
 from repos.users import UserRepository
@@ -19,13 +20,15 @@ class ConnHandler(BaseMqttCallbackHandler):
     account. It also issues a push notification confirming the binding.
     """
 
+    shared = True
+
     def __init__(self):
         """
         Initialize the connection handler with the topic template.
         """
         super().__init__("{mac}/conn")
 
-    async def __call__(self, topic: str, payload: dict):
+    async def __call__(self, topic: str, payload: dict, mac: str):
         """
         Process an ESP connection event.
 
@@ -35,6 +38,8 @@ class ConnHandler(BaseMqttCallbackHandler):
             The MQTT topic carrying the event (e.g. ``AA:BB:CC:DD:EE:FF/conn``).
         payload : dict
             JSON payload containing at minimum the user key.
+        mac : str
+            MAC address of the ESP device, extracted from the topic.
         """
         logger.info(f"[CONN] topic={topic}, payload={payload}")
 
@@ -43,12 +48,6 @@ class ConnHandler(BaseMqttCallbackHandler):
             logger.warning(f"Missing 'userKey' in {payload}.")
             return
 
-        try:
-            mac = self.extract_from_topic(topic, "mac")
-        except (ValueError, TypeError):
-            logger.warning(f"Could not extract valid mac from topic: {topic}")
-            return
-
         async with async_session_maker() as session:
             esp_repo = EspDeviceRepository(session)
             esp = await esp_repo.get_by_mac(mac)
@@ -59,6 +58,7 @@ class ConnHandler(BaseMqttCallbackHandler):
                 return
 
             await esp_repo.update(esp.id, user_id=user.id)
+            device_cache.invalidate(esp.mac)
 
             dto = NotificationCreateDTO(
                 user_id=user.id,
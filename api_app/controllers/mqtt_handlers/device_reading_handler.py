@@ -1,10 +1,9 @@
 import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple
 from controllers.mqtt_handlers.base_device_handler import BaseDeviceHandler
-from core.db_context import async_session_maker
-from services.readings import ReadingService
-from repos.readings import ReadingRepository
+from core.ingest.reading_buffer import ingest_key, reading_buffer
 from common_db.enums import DeviceType
-from models.dtos.readings import ReadingCreateDTO
 
 logger = logging.getLogger(__name__)
 
@@ -17,69 +16,191 @@ SENSOR_STR_TO_DEVICE_TYPE = {
     "battery": DeviceType.BATTERY
 }
 
+# sample timestamps further ahead of the server clock are not trusted
+MAX_CLOCK_SKEW = timedelta(seconds=60)
+# nor those further back, e.g. from a clock not synced yet after boot
+MAX_SAMPLE_AGE = timedelta(days=7)
+
+
+class SensorSamples(NamedTuple):
+    """
+    Samples of one sensor taken from a sensor payload.
+    """
+    sensor: str
+    values: List[float]
+    timestamps: List[datetime]
+
+
+def _to_datetime(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+def parse_sensor_payload(payload: dict, received_at: datetime) -> List[SensorSamples]:
+    """
+    Split a sensor payload into per-sensor samples with timestamps.
+
+    Two formats are accepted. The legacy single-sensor message::
+
+        {"sensor": "light", "values": [512.0]}
+
+    whose samples are stamped with the arrival time, and the batched
+    message carrying several sensors and their sample times::
+
+        {
+            "ts": 1760774400,
+            "readings": [
+                {"sensor": "light", "values": [512.0, 530.5], "offsets": [-60, 0]},
+                {"sensor": "battery", "values": [87], "timestamps": [1760774390]}
+            ]
+        }
+
+    Sample times are given either as ``offsets`` in seconds relative to
+    the base ``ts`` or as absolute unix ``timestamps``. Without either,
+    all samples of a sensor get the base time, which defaults to the
+    arrival time. Sample times more than ``MAX_CLOCK_SKEW`` ahead of or
+    ``MAX_SAMPLE_AGE`` behind the arrival time are replaced by it.
+
+    Parameters
+    ----------
+    payload : dict
+        Decoded MQTT payload.
+    received_at : datetime
+        Arrival time of the message (naive UTC).
+
+    Returns
+    -------
+    List[SensorSamples]
+        Samples per sensor entry. Entries with a malformed shape are skipped.
+
+    Raises
+    ------
+    TypeError, ValueError, OverflowError
+        If the base time or a sample time is not a valid unix time.
+    """
+    if not isinstance(payload, dict):
+        logger.warning(f"Sensor payload is not an object: {payload!r}")
+        return []
+
+    if "readings" not in payload:
+        entries = [payload]
+        base = received_at
+    else:
+        entries = payload.get("readings") or []
+        base = _to_datetime(payload["ts"]) if "ts" in payload else received_at
+
+    earliest = received_at - MAX_SAMPLE_AGE
+    latest = received_at + MAX_CLOCK_SKEW
+    samples = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            logger.warning(f"Sensor entry is not an object: {entry!r}")
+            continue
+        values = entry.get("values")
+        if not isinstance(values, list):
+            logger.warning(f"Missing 'values' in sensor entry: {entry}")
+            continue
+
+        if "timestamps" in entry:
+            times = [_to_datetime(t) for t in entry["timestamps"]]
+        elif "offsets" in entry:
+            times = [base + timedelta(seconds=o) for o in entry["offsets"]]
+        else:
+            times = [base] * len(values)
+
+        if len(times) != len(values):
+            logger.warning(
+                f"{len(values)} values but {len(times)} timestamps in sensor entry")
+            continue
+
+        times = [t if earliest <= t <= latest else received_at for t in times]
+        samples.append(SensorSamples(entry.get("sensor"), values, times))
+
+    return samples
+
 
 class DeviceReadingHandler(BaseDeviceHandler):
     """
     Handles incoming MQTT sensor readings from ESP devices.
 
-    Listens on the topic ``{mac}/device/sensor``. Maps sensor string
-    identifiers to device types and stores readings into the database.
+    Listens on the topic ``{mac}/device/sensor``. Accepts single-sensor
+    messages as well as batches of timestamped samples of several sensors
+    (see :func:`parse_sensor_payload`). Maps sensor string identifiers to
+    device types and queues readings in the ingest buffer, which writes
+    them to the database in batches. Ingest keys are derived from the
+    sample, so readings of a redelivered message are stored once; this
+    needs sample times sent by the device, as legacy messages are
+    stamped with their arrival time.
     Also propagates the data via WebSocket events to connected clients.
     """
 
-    def __init__(self):
+    shared = True
+    binary_payloads = True
+
+    def __init__(self, store: bool = True):
         """
         Initialize the reading handler with the topic template.
+
+        Parameters
+        ----------
+        store : bool
+            Whether readings are stored. With ``False`` the handler only
+            forwards live WebSocket events, which is used by the API when
+            readings are stored by the standalone ingest worker. Such a
+            handler is never shared, as every API replica serves its own
+            WebSocket clients.
         """
         super().__init__("{mac}/device/sensor")
+        self.store = store
+        self.shared = store
 
-    async def __call__(self, topic: str, payload: dict):
+    async def __call__(self, topic: str, payload: dict, mac: str):
         """
-        Process a new sensor reading.
+        Process new sensor readings.
 
         Parameters
         ----------
         topic : str
             The MQTT topic containing the device MAC and sensor data.
         payload : dict
-            JSON payload containing:
+            JSON payload, either a single sensor entry:
             - sensor : str
                 Type of the sensor (light, soil_moisture, etc.)
             - values : list[float]
                 The measurements collected by the sensor.
+            or a batch with an optional base timestamp ``ts`` and a list
+            of such entries in ``readings``, each with optional
+            ``offsets`` or ``timestamps`` of its values.
+        mac : str
+            MAC address of the ESP device, extracted from the topic.
         """
-        logger.info(f"[SENSOR] topic={topic}, payload={payload}")
+        logger.debug(f"[SENSOR] topic={topic}, payload={payload}")
 
-        sensor_str = payload.get("sensor")
-        if sensor_str not in SENSOR_STR_TO_DEVICE_TYPE:
-            logger.warning(f"Unknown sensor type '{sensor_str}' in payload.")
+        try:
+            entries = parse_sensor_payload(payload, datetime.utcnow())
+        except (TypeError, ValueError, OverflowError) as e:
+            logger.warning(f"Malformed sensor payload from {mac}: {e}")
             return
-        device_type = SENSOR_STR_TO_DEVICE_TYPE[sensor_str]
 
-        values = payload.get("values")
-        if values is None:
-            logger.warning(f"Missing 'value' in {device_type.name} payload.")
-            return
+        for n, (sensor_str, values, timestamps) in enumerate(entries):
+            if sensor_str not in SENSOR_STR_TO_DEVICE_TYPE:
+                logger.warning(f"Unknown sensor type '{sensor_str}' in payload.")
+                continue
+            device_type = SENSOR_STR_TO_DEVICE_TYPE[sensor_str]
 
-        try:
-            mac = self.extract_from_topic(topic, "mac")
-        except (ValueError, TypeError):
-            logger.warning(f"Could not extract valid mac from topic: {topic}")
-            return
+            route = await self.process_device_event(
+                topic,
+                mac,
+                device_type,
+                payload,
+                websocket_event="new_reading",
+                extra_fields={
+                    "values": values,
+                    "timestamps": [t.isoformat() for t in timestamps],
+                },
+            )
 
-        device, _ = await self.process_device_event(
-            topic,
-            mac,
-            device_type,
-            payload,
-            websocket_event="new_reading",
-            extra_fields={"values": values},
-        )
-
-        if device:
-            async with async_session_maker() as session:
-                reading_service = ReadingService(ReadingRepository(session))
-                for value in values:
-                    dto = ReadingCreateDTO(
-                        device_id=device.id, value=str(value))
-                    await reading_service.create(dto)
+            if route and self.store:
+                for i, (value, timestamp) in enumerate(zip(values, timestamps)):
+                    await reading_buffer.add(
+                        route.device_id, value, timestamp, route, device_type,
+                        key=ingest_key(mac, n, sensor_str, i, timestamp.isoformat()))
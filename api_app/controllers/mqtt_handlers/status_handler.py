@@ -1,7 +1,6 @@
 import logging
-from core.db_context import async_session_maker
 from core.mqtt.base_mqtt_callback_handler import BaseMqttCallbackHandler
-from repos.esp_devices import EspDeviceRepository
+from core.state.presence import presence_table
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +9,9 @@ class StatusHandler(BaseMqttCallbackHandler):
     """
     Handles incoming MQTT status messages from ESP devices.
 
-    Listens on the topic ``{mac}/status``. Updates the online/offline
-    status of the ESP device in the database.
+    Listens on the topic ``{mac}/status``. Records the heartbeat in the
+    in-memory presence table, which writes the online/offline status
+    of the ESP device to the database only when it changes.
     """
 
     def __init__(self):
@@ -20,7 +20,7 @@ class StatusHandler(BaseMqttCallbackHandler):
         """
         super().__init__("{mac}/status")
 
-    async def __call__(self, topic: str, payload: dict):
+    async def __call__(self, topic: str, payload: dict, mac: str):
         """
         Process a status message from an ESP device.
 
@@ -32,32 +32,20 @@ class StatusHandler(BaseMqttCallbackHandler):
             JSON payload containing:
             - online : bool
                 Whether the device is currently online.
+        mac : str
+            MAC address of the ESP device, extracted from the topic.
 
         Notes
         -----
-        - Extracts the device MAC from the topic.
-        - Updates the corresponding ESP device status in the database.
-        - Logs warnings if the MAC cannot be extracted or the device is missing.
+        - Repeated heartbeats with an unchanged state do not touch the database.
+        - Devices that stop sending heartbeats are marked offline by the
+          presence sweeper.
         """
-        logger.info(f"[STATUS] topic={topic}, payload={payload}")
+        logger.debug(f"[STATUS] topic={topic}, payload={payload}")
 
         status = payload.get("online")
         if status is None:
             logger.warning(f"Missing 'status' in payload: {payload}")
             return
 
-        try:
-            mac = self.extract_from_topic(topic, "mac")
-        except (ValueError, TypeError):
-            logger.warning(f"Could not extract valid mac from topic: {topic}")
-            return
-
-        async with async_session_maker() as session:
-            esp_repo = EspDeviceRepository(session)
-            esp = await esp_repo.get_by_mac(mac)
-            if not esp:
-                logger.warning(f"No ESP found for mac {mac}")
-                return
-
-            await esp_repo.update(esp.id, status=bool(status))
-            logger.info(f"ESP {mac} status updated to {status}")
+        await presence_table.heartbeat(mac, bool(status))
@@ -14,3 +14,10 @@ redbeat_redis_url = f"redis://{CONFIG.REDIS_HOST}:{CONFIG.REDIS_PORT}/0"
 worker_concurrency = 1
 task_send_sent_event = True
 worker_send_task_events = True
+
+beat_schedule = {
+    "maintain-reading-partitions": {
+        "task": "schedulers.tasks.maintain_reading_partitions",
+        "schedule": CONFIG.READING_PARTITION_MAINTENANCE_INTERVAL,
+    },
+}
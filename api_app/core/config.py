@@ -27,6 +27,56 @@ class Config:
     MQTT_BROKER_PORT: int = int(getenv("MQTT_BROKER_PORT", "1883"))
     USE_MOCK_CAMERA: bool = False
     REDIS_PORT: str = getenv("REDIS_PORT")
+    READING_BUFFER_MAX_ROWS: int = int(getenv("READING_BUFFER_MAX_ROWS", "500"))
+    READING_BUFFER_FLUSH_INTERVAL: float = float(
+        getenv("READING_BUFFER_FLUSH_INTERVAL", "1.0"))
+    READING_BUFFER_MAX_PENDING: int = int(
+        getenv("READING_BUFFER_MAX_PENDING", "50000"))
+    READING_EXPORT_BATCH_ROWS: int = int(
+        getenv("READING_EXPORT_BATCH_ROWS", "5000"))
+    READING_JOURNAL_DIR: str = getenv("READING_JOURNAL_DIR", "journal")
+    READING_JOURNAL_SEGMENT_BYTES: int = int(
+        getenv("READING_JOURNAL_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+    READING_JOURNAL_REPLAY_INTERVAL: float = float(
+        getenv("READING_JOURNAL_REPLAY_INTERVAL", "5"))
+    READING_PARTITIONS_AHEAD: int = int(
+        getenv("READING_PARTITIONS_AHEAD", "2"))
+    READING_RETENTION_MONTHS: int = int(
+        getenv("READING_RETENTION_MONTHS", "0"))
+    READING_PARTITION_MAINTENANCE_INTERVAL: float = float(
+        getenv("READING_PARTITION_MAINTENANCE_INTERVAL", "21600"))
+    READING_RESAMPLE_MAX_POINTS: int = int(
+        getenv("READING_RESAMPLE_MAX_POINTS", "10000"))
+    LAST_VALUE_REDIS: bool = getenv(
+        "LAST_VALUE_REDIS", "false").lower() in ("1", "true", "yes")
+    LAST_VALUE_TTL: float = float(getenv("LAST_VALUE_TTL", "3600"))
+    DEVICE_CACHE_TTL: float = float(getenv("DEVICE_CACHE_TTL", "300"))
+    DEVICE_CACHE_MAX_UNKNOWN: int = int(
+        getenv("DEVICE_CACHE_MAX_UNKNOWN", "10000"))
+    DEVICE_CACHE_REDIS: bool = getenv(
+        "DEVICE_CACHE_REDIS", "false").lower() in ("1", "true", "yes")
+    MQTT_DISPATCH_WORKERS: int = int(getenv("MQTT_DISPATCH_WORKERS", "8"))
+    MQTT_DISPATCH_MAX_INFLIGHT: int = int(
+        getenv("MQTT_DISPATCH_MAX_INFLIGHT", "1000"))
+    MQTT_PUBLISH_QUEUE_SIZE: int = int(
+        getenv("MQTT_PUBLISH_QUEUE_SIZE", "1000"))
+    MQTT_RECONNECT_MAX_DELAY: float = float(
+        getenv("MQTT_RECONNECT_MAX_DELAY", "30"))
+    MQTT_CONTROL_TIMEOUT: float = float(getenv("MQTT_CONTROL_TIMEOUT", "5"))
+    MQTT_HISTORY_MAX_TOPICS: int = int(
+        getenv("MQTT_HISTORY_MAX_TOPICS", "10000"))
+    MQTT_HISTORY_DEPTH: int = int(getenv("MQTT_HISTORY_DEPTH", "5"))
+    MQTT_SHARED_SUBSCRIPTION: bool = getenv(
+        "MQTT_SHARED_SUBSCRIPTION", "false").lower() in ("1", "true", "yes")
+    MQTT_SHARED_GROUP: str = getenv("MQTT_SHARED_GROUP", "api")
+    MQTT_INGEST_IN_API: bool = getenv(
+        "MQTT_INGEST_IN_API", "true").lower() in ("1", "true", "yes")
+    COMMAND_CONFIRM_TIMEOUT: float = float(
+        getenv("COMMAND_CONFIRM_TIMEOUT", "10"))
+    PRESENCE_OFFLINE_AFTER: float = float(
+        getenv("PRESENCE_OFFLINE_AFTER", "90"))
+    PRESENCE_SWEEP_INTERVAL: float = float(
+        getenv("PRESENCE_SWEEP_INTERVAL", "15"))
 
     @staticmethod
     def get_config() -> Config:
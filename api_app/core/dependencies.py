@@ -66,7 +66,8 @@ async def _get_garden_service(db=Depends(get_async_session)) -> gardens.GardenSe
     """
     Provide a :class:`GardenService` instance.
 
-    Combines a garden repository with the device service.
+    Combines a garden repository with the device service and the
+    reading and notification repositories used by garden snapshots.
 
     Parameters
     ----------
@@ -79,7 +80,10 @@ async def _get_garden_service(db=Depends(get_async_session)) -> gardens.GardenSe
         Service for garden operations.
     """
     return gardens.GardenService(
-        gardens.GardenRepository(db), await _get_device_service(db)
+        gardens.GardenRepository(db),
+        await _get_device_service(db),
+        readings.ReadingRepository(db),
+        NotificationRepository(db),
     )
 
 
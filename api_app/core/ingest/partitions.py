@@ -0,0 +1,45 @@
+import logging
+from datetime import datetime
+
+from core.config import CONFIG
+from core.db_context import async_session_maker
+from repos.readings import ReadingRepository, month_start
+
+logger = logging.getLogger(__name__)
+
+
+async def maintain_reading_partitions(now: datetime | None = None) -> tuple[list[str], list[str]]:
+    """
+    Create upcoming monthly partitions of ``readings`` and apply retention.
+
+    Partitions are created for the current month and the next
+    ``CONFIG.READING_PARTITIONS_AHEAD`` months. If
+    ``CONFIG.READING_RETENTION_MONTHS`` is positive, partitions of months
+    before the current month and that many previous months are dropped.
+
+    Parameters
+    ----------
+    now : datetime | None
+        Reference time, defaults to the current UTC time.
+
+    Returns
+    -------
+    tuple[list[str], list[str]]
+        Names of the partitions created and dropped.
+    """
+    now = now or datetime.utcnow()
+    dropped = []
+
+    async with async_session_maker() as session:
+        repo = ReadingRepository(session)
+        created = await repo.ensure_partitions(
+            month_start(now), month_start(now, CONFIG.READING_PARTITIONS_AHEAD))
+        if CONFIG.READING_RETENTION_MONTHS > 0:
+            dropped = await repo.drop_partitions_before(
+                month_start(now, -CONFIG.READING_RETENTION_MONTHS))
+
+    if created:
+        logger.info(f"Created reading partitions: {', '.join(created)}")
+    if dropped:
+        logger.info(f"Dropped reading partitions: {', '.join(dropped)}")
+    return created, dropped
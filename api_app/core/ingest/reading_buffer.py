@@ -0,0 +1,365 @@
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from core.config import CONFIG
+from core.db_context import async_session_maker
+from core.ingest.reading_journal import ReadingJournal
+from core.ingest.values import to_numeric
+from core.state.device_cache import DeviceRoute
+from core.state.last_values import last_values
+from models.dtos.readings import ReadingDTO
+from repos.readings import ReadingRepository
+from common_db.enums import DeviceType
+
+logger = logging.getLogger(__name__)
+
+
+def ingest_key(*parts) -> str:
+    """
+    Derive the ingest key of a reading from what identifies its sample,
+    e.g. the ESP MAC, sensor, position in the message and sample time.
+
+    A message redelivered by the broker (MQTT QoS 1) yields the same keys,
+    so its readings are skipped as duplicates on insert.
+    """
+    source = "\x1f".join(str(part) for part in parts)
+    return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+@dataclass(slots=True)
+class BufferedReading:
+    """
+    A single sensor reading waiting to be written to the database.
+    """
+    device_id: int
+    value: str
+    numeric_value: float | None
+    timestamp: datetime
+    key: str
+    segment: int | None
+    route: DeviceRoute | None = None
+    device_type: DeviceType | None = None
+
+
+class ReadingBuffer:
+    """
+    Asynchronous ingest buffer for sensor readings.
+
+    Collects readings from all MQTT handlers and writes them to the database
+    as multi-row INSERTs, either when ``max_rows`` readings are pending or
+    when ``flush_interval`` seconds have passed since the last flush.
+
+    Readings are appended to a :class:`ReadingJournal` before they are
+    queued, unless ``CONFIG.READING_JOURNAL_DIR`` is empty. Readings that
+    do not fit in memory while the database is unavailable are then left
+    to the journal replayer instead of being lost.
+
+    Readings queued with their device route are passed to the
+    :class:`LastValueStore` once written, so the latest values are
+    served with their database IDs.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = CONFIG.READING_BUFFER_MAX_ROWS,
+        flush_interval: float = CONFIG.READING_BUFFER_FLUSH_INTERVAL,
+        max_pending: int = CONFIG.READING_BUFFER_MAX_PENDING,
+    ):
+        """
+        Initialize the buffer.
+
+        Parameters
+        ----------
+        max_rows : int
+            Number of pending readings that triggers an immediate flush.
+        flush_interval : float
+            Maximum time in seconds a reading waits before being flushed.
+        max_pending : int
+            Upper bound of readings queued in memory, e.g. while the
+            database is slow or unavailable. Beyond it the oldest readings
+            are left to the journal replayer, or dropped if not journaled.
+        """
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: list[BufferedReading] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.journal = ReadingJournal() if CONFIG.READING_JOURNAL_DIR else None
+
+        self._enqueued_total = 0
+        self._flushed_total = 0
+        self._dropped_total = 0
+        self._deferred_total = 0
+        self._flush_count = 0
+        self._failed_flushes = 0
+        self._last_flush_latency = 0.0
+        self._max_flush_latency = 0.0
+        self._total_flush_latency = 0.0
+
+    async def start(self, journal_name: str = "api"):
+        """
+        Open the journal and start the background flush loop.
+
+        Parameters
+        ----------
+        journal_name : str
+            Name of the journal of this process, see :meth:`ReadingJournal.open`.
+        """
+        if self.journal and not self.journal.is_open:
+            self.journal.open(journal_name)
+            await self.journal.start()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Reading buffer started (max_rows={self.max_rows}, "
+                f"flush_interval={self.flush_interval}s)")
+
+    async def stop(self):
+        """
+        Stop the background flush loop and write out all pending readings.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+        if self.journal and self.journal.is_open:
+            await self.journal.stop()
+            self.journal.close()
+        logger.info("Reading buffer stopped.")
+
+    async def add(
+        self,
+        device_id: int,
+        value: float | str,
+        timestamp: datetime | None = None,
+        route: DeviceRoute | None = None,
+        device_type: DeviceType | None = None,
+        key: str | None = None,
+    ):
+        """
+        Queue a reading for the next flush.
+
+        Parameters
+        ----------
+        device_id : int
+            ID of the sensor device.
+        value : float | str
+            Measured value. Numbers are also stored in ``numeric_value``.
+        timestamp : datetime | None
+            Time of the measurement. Defaults to the time of arrival.
+        route : DeviceRoute | None
+            Route of the device. If given together with ``device_type``,
+            the reading updates the last-value store once written.
+        device_type : DeviceType | None
+            Type of the sensor device.
+        key : str | None
+            Ingest key, see :func:`ingest_key`. Readings with the key and
+            timestamp of a stored reading are skipped. A random key is
+            used if not given.
+        """
+        timestamp = timestamp or datetime.utcnow()
+        numeric = to_numeric(value)
+        value = str(value)
+        key = key or uuid.uuid4().hex
+        segment = (
+            self.journal.append(key, device_id, value, numeric, timestamp)
+            if self.journal and self.journal.is_open else None
+        )
+
+        self._pending.append(
+            BufferedReading(
+                device_id, value, numeric, timestamp, key, segment,
+                route, device_type))
+        self._enqueued_total += 1
+
+        if len(self._pending) > self.max_pending:
+            # with a journal, evict a whole flush worth, so it is not
+            # rotated for every reading while the database falls behind
+            self._evict(
+                max(self.max_pending - self.max_rows, 0)
+                if segment is not None else self.max_pending)
+        if len(self._pending) >= self.max_rows:
+            self._flush_requested.set()
+
+    async def flush(self) -> int:
+        """
+        Write all pending readings to the database in a single transaction.
+
+        The journal is synced to disk first. On failure the readings are
+        put back in front of the queue so they are retried on the next flush.
+
+        Returns
+        -------
+        int
+            Number of readings written.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, []
+            started = time.perf_counter()
+
+            try:
+                if self.journal:
+                    await self.journal.sync()
+                async with async_session_maker() as session:
+                    inserted = await ReadingRepository(session).create_many([
+                        {
+                            "device_id": r.device_id,
+                            "value": r.value,
+                            "numeric_value": r.numeric_value,
+                            "timestamp": r.timestamp,
+                            "ingest_key": r.key,
+                        }
+                        for r in batch
+                    ])
+            except Exception as e:
+                self._failed_flushes += 1
+                self._requeue(batch)
+                logger.error(
+                    f"Failed to flush {len(batch)} readings: {e}")
+                return 0
+
+            if self.journal:
+                self.journal.commit(
+                    r.segment for r in batch if r.segment is not None)
+
+            await self._update_last_values(batch, inserted)
+
+            latency = time.perf_counter() - started
+            self._flush_count += 1
+            self._flushed_total += len(batch)
+            self._last_flush_latency = latency
+            self._max_flush_latency = max(self._max_flush_latency, latency)
+            self._total_flush_latency += latency
+
+            logger.debug(
+                f"Flushed {len(batch)} readings in {latency * 1000:.1f} ms")
+            return len(batch)
+
+    def stats(self) -> dict:
+        """
+        Return buffer counters.
+
+        Returns
+        -------
+        dict
+            Queue depth, totals and flush latencies in milliseconds.
+        """
+        avg_latency = (
+            self._total_flush_latency / self._flush_count
+            if self._flush_count else 0.0
+        )
+        return {
+            "queue_depth": len(self._pending),
+            "enqueued_total": self._enqueued_total,
+            "flushed_total": self._flushed_total,
+            "dropped_total": self._dropped_total,
+            "deferred_to_journal_total": self._deferred_total,
+            "flush_count": self._flush_count,
+            "failed_flushes": self._failed_flushes,
+            "last_flush_latency_ms": round(self._last_flush_latency * 1000, 3),
+            "avg_flush_latency_ms": round(avg_latency * 1000, 3),
+            "max_flush_latency_ms": round(self._max_flush_latency * 1000, 3),
+        }
+
+    async def _update_last_values(self, batch: list[BufferedReading], inserted: list):
+        """
+        Pass the newest inserted reading of each routed device to the
+        last-value store. Failures are only logged, the readings are
+        already stored.
+        """
+        routed = {r.key: r for r in batch if r.route and r.device_type}
+        newest = {}
+        for row in inserted:
+            buffered = routed.get(row.ingest_key)
+            if buffered is None:
+                continue
+            current = newest.get(row.device_id)
+            if current is None or current[0].timestamp <= row.timestamp:
+                newest[row.device_id] = (row, buffered)
+        if not newest:
+            return
+
+        try:
+            await last_values.update(
+                (
+                    buffered.route.garden_id,
+                    buffered.device_type,
+                    ReadingDTO(
+                        id=row.id,
+                        device_id=row.device_id,
+                        value=row.value,
+                        numeric_value=row.numeric_value,
+                        timestamp=row.timestamp,
+                        esp_id=buffered.route.esp_id,
+                    ),
+                )
+                for row, buffered in newest.values()
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update last values: {e}")
+
+    def _requeue(self, batch: list[BufferedReading]):
+        """
+        Put a failed batch back in front of the queue, within the
+        in-memory limit.
+        """
+        self._pending = batch + self._pending
+        self._evict(self.max_pending)
+
+    def _evict(self, keep: int):
+        """
+        Shrink the queue to its newest ``keep`` readings. The oldest ones
+        are left to the journal replayer, or dropped if they were not
+        journaled.
+        """
+        overflow = len(self._pending) - keep
+        if overflow > 0:
+            evicted = self._pending[:overflow]
+            del self._pending[:overflow]
+
+            journaled = [r.segment for r in evicted if r.segment is not None]
+            if journaled:
+                self.journal.defer(journaled)
+                self._deferred_total += len(journaled)
+            self._dropped_total += overflow - len(journaled)
+            logger.warning(
+                f"Reading buffer full, moved {len(journaled)} and dropped "
+                f"{overflow - len(journaled)} oldest readings")
+
+    async def _run(self):
+        """
+        Flush whenever the size threshold is reached or the interval elapses.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Unexpected error in reading buffer: {e}")
+
+
+reading_buffer = ReadingBuffer()
@@ -0,0 +1,435 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Dict, Iterable
+
+from core.config import CONFIG
+from core.db_context import async_session_maker
+from core.ingest.values import to_numeric
+from repos.readings import ReadingRepository
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".jsonl"
+# appends are collected in user space and written out once per batch
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+@dataclass(slots=True)
+class _Segment:
+    """
+    Bookkeeping of a single journal segment file.
+    """
+    path: Path
+    created: float
+    appended: int = 0
+    committed: int = 0
+    deferred: int = 0
+    sealed: bool = False
+    inherited: bool = False
+
+
+class ReadingJournal:
+    """
+    Append-only, segment-rotated on-disk journal of accepted readings.
+
+    Every reading is appended to the current segment before it is queued
+    for the database. Appends are buffered in memory and written out and
+    synced by :meth:`sync` once per batch, before the batch is inserted.
+    Segments are JSON-lines files that are rotated after ``segment_bytes``
+    bytes and deleted once all their readings have been committed by the
+    reading buffer.
+
+    Segments left over by a previous process, and segments holding readings
+    the buffer had to drop while the database was unavailable, are
+    replayed by a background task. Each reading carries a unique
+    ``ingest_key``, so a replay never duplicates rows that were already
+    written.
+    """
+
+    def __init__(
+        self,
+        directory: str = CONFIG.READING_JOURNAL_DIR,
+        segment_bytes: int = CONFIG.READING_JOURNAL_SEGMENT_BYTES,
+        replay_interval: float = CONFIG.READING_JOURNAL_REPLAY_INTERVAL,
+        batch_rows: int = CONFIG.READING_BUFFER_MAX_ROWS,
+    ):
+        """
+        Initialize a closed journal.
+
+        Parameters
+        ----------
+        directory : str
+            Base directory of all journals on this host.
+        segment_bytes : int
+            Size after which the current segment is sealed and a new one
+            is started.
+        replay_interval : float
+            Seconds between two replay attempts.
+        batch_rows : int
+            Number of readings inserted per replay transaction.
+        """
+        self.base_directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.replay_interval = replay_interval
+        self.batch_rows = batch_rows
+
+        self.directory: Path | None = None
+        self._lock_file: IO | None = None
+        self._segments: Dict[int, _Segment] = {}
+        self._current: int | None = None
+        self._file: IO | None = None
+        self._size = 0
+        self._sealing: list[IO] = []
+        self._dirty = False
+        self._task: asyncio.Task | None = None
+
+        self._appended_total = 0
+        self._replayed_total = 0
+        self._replay_failures = 0
+        self._segments_removed = 0
+        self._corrupt_lines = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def open(self, name: str):
+        """
+        Open the journal of one ingest process.
+
+        Takes the first free slot ``<name>``, ``<name>-1``, ... below the
+        base directory and locks it, so concurrent processes never share
+        a journal while a restarted process picks up the slot (and the
+        unreplayed segments) of its predecessor.
+
+        Parameters
+        ----------
+        name : str
+            Name of the ingest process, e.g. ``api`` or ``ingest-0``.
+        """
+        slot = 0
+        while True:
+            directory = self.base_directory / (f"{name}-{slot}" if slot else name)
+            directory.mkdir(parents=True, exist_ok=True)
+            lock_file = open(directory / ".lock", "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                lock_file.close()
+                slot += 1
+
+        self.directory = directory
+        self._lock_file = lock_file
+
+        for path in sorted(directory.glob(f"*{SEGMENT_SUFFIX}")):
+            seq = int(path.stem)
+            self._segments[seq] = _Segment(
+                path, path.stat().st_mtime, sealed=True, inherited=True)
+
+        if self._segments:
+            logger.warning(
+                f"Reading journal {directory} has {len(self._segments)} "
+                "segments from a previous run, they will be replayed")
+
+        self._open_segment(max(self._segments, default=0) + 1)
+        logger.info(f"Reading journal opened at {directory}")
+
+    def close(self):
+        """
+        Close the current segment and release the journal slot.
+
+        Fully committed segments are removed; the others stay on disk and
+        are replayed by the next process using this slot.
+        """
+        for file in self._sealing + ([self._file] if self._file else []):
+            file.flush()
+            os.fsync(file.fileno())
+            file.close()
+        self._sealing = []
+        self._file = None
+
+        if self._current is not None:
+            self._segments[self._current].sealed = True
+            self._remove_if_done(self._current)
+            self._current = None
+
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def start(self):
+        """
+        Start the background replayer.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the background replayer.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def append(
+        self,
+        key: str,
+        device_id: int,
+        value: str,
+        numeric_value: float | None,
+        timestamp: datetime,
+    ) -> int:
+        """
+        Append a reading to the current segment.
+
+        The record is only buffered in memory; :meth:`sync` writes it out
+        and makes it durable on disk.
+
+        Returns
+        -------
+        int
+            Segment of the record, to be passed to :meth:`commit`.
+        """
+        line = json.dumps(
+            {
+                "k": key,
+                "d": device_id,
+                "v": value,
+                "n": numeric_value,
+                "t": timestamp.isoformat(),
+            },
+            separators=(",", ":"),
+        ) + "\n"
+        data = line.encode()
+        self._file.write(data)
+        self._size += len(data)
+        self._dirty = True
+
+        seq = self._current
+        segment = self._segments[seq]
+        segment.appended += 1
+        self._appended_total += 1
+
+        if self._size >= self.segment_bytes:
+            self._rotate()
+        return seq
+
+    async def sync(self):
+        """
+        Write buffered records out and force them to disk.
+
+        Only the buffer is written on the event loop; the disk syncs,
+        including those of rotated segments, run in a worker thread.
+        """
+        sealing, self._sealing = self._sealing, []
+        files = list(sealing)
+        if self._file and self._dirty:
+            self._dirty = False
+            self._file.flush()
+            files.append(self._file)
+        if not files:
+            return
+
+        def sync_files():
+            try:
+                for file in files:
+                    os.fsync(file.fileno())
+            finally:
+                for file in sealing:
+                    file.close()
+
+        try:
+            await asyncio.to_thread(sync_files)
+        except OSError as e:
+            logger.warning(f"Journal sync failed: {e}")
+
+    def commit(self, segments: Iterable[int]):
+        """
+        Acknowledge readings that were written to the database.
+
+        Parameters
+        ----------
+        segments : Iterable[int]
+            Segment of each committed reading, as returned by :meth:`append`.
+        """
+        touched = set()
+        for seq in segments:
+            segment = self._segments.get(seq)
+            if segment is not None:
+                segment.committed += 1
+                touched.add(seq)
+
+        for seq in touched:
+            self._remove_if_done(seq)
+
+    def defer(self, segments: Iterable[int]):
+        """
+        Hand readings dropped from memory over to the replayer.
+        """
+        for seq in segments:
+            segment = self._segments.get(seq)
+            if segment is not None:
+                segment.deferred += 1
+
+        # only sealed segments are replayed
+        if self._current is not None and self._segments[self._current].deferred:
+            self._rotate()
+
+    async def replay(self) -> int:
+        """
+        Write readings of replayable segments to the database.
+
+        A segment is replayable if it was left by a previous process, or
+        if it is sealed and some of its readings were dropped from memory.
+        Replayed segments are removed.
+
+        Returns
+        -------
+        int
+            Number of readings replayed.
+        """
+        replayed = 0
+        for seq in sorted(self._segments):
+            segment = self._segments[seq]
+            if not segment.sealed or not (segment.inherited or segment.deferred):
+                continue
+
+            rows = await asyncio.to_thread(lambda: list(self._read(segment.path)))
+            async with async_session_maker() as session:
+                repo = ReadingRepository(session)
+                for i in range(0, len(rows), self.batch_rows):
+                    await repo.create_many(rows[i:i + self.batch_rows])
+
+            replayed += len(rows)
+            self._remove(seq)
+            logger.info(
+                f"Replayed {len(rows)} readings from journal segment {segment.path.name}")
+
+        self._replayed_total += replayed
+        return replayed
+
+    def stats(self) -> dict:
+        """
+        Return journal size, lag and replay counters.
+
+        ``lag_readings`` counts journaled readings not known to be in the
+        database yet; readings of inherited segments are not counted until
+        they are read during replay.
+        """
+        size = 0
+        lag_bytes = 0
+        lag_readings = 0
+        oldest = None
+        for segment in self._segments.values():
+            try:
+                seg_size = segment.path.stat().st_size
+            except FileNotFoundError:
+                continue
+            size += seg_size
+            pending = segment.appended - segment.committed
+            if pending > 0 or segment.inherited:
+                lag_bytes += seg_size
+                lag_readings += max(pending, 0)
+                oldest = segment.created if oldest is None else min(oldest, segment.created)
+
+        return {
+            "directory": str(self.directory) if self.directory else None,
+            "segments": len(self._segments),
+            "size_bytes": size,
+            "lag_readings": lag_readings,
+            "lag_bytes": lag_bytes,
+            "oldest_unreplayed_age_s": round(time.time() - oldest, 3) if oldest else 0.0,
+            "appended_total": self._appended_total,
+            "replayed_total": self._replayed_total,
+            "replay_failures": self._replay_failures,
+            "segments_removed": self._segments_removed,
+            "corrupt_lines": self._corrupt_lines,
+        }
+
+    def _open_segment(self, seq: int):
+        """
+        Start a new segment file and make it the current one.
+        """
+        path = self.directory / f"{seq:010d}{SEGMENT_SUFFIX}"
+        self._file = open(path, "ab", buffering=WRITE_BUFFER_BYTES)
+        self._size = 0
+        self._segments[seq] = _Segment(path, time.time())
+        self._current = seq
+
+    def _rotate(self):
+        """
+        Seal the current segment and continue in a new one.
+
+        The sealed segment is written out, so it can be replayed, and
+        synced and closed by the next :meth:`sync`.
+        """
+        self._file.flush()
+        self._sealing.append(self._file)
+        sealed = self._current
+        self._segments[sealed].sealed = True
+        self._open_segment(sealed + 1)
+        self._remove_if_done(sealed)
+
+    def _remove_if_done(self, seq: int):
+        """
+        Delete a sealed segment whose readings were all committed.
+        """
+        segment = self._segments.get(seq)
+        if (
+            segment is not None
+            and segment.sealed
+            and not segment.inherited
+            and segment.committed >= segment.appended
+        ):
+            self._remove(seq)
+
+    def _remove(self, seq: int):
+        segment = self._segments.pop(seq)
+        try:
+            segment.path.unlink()
+        except FileNotFoundError:
+            pass
+        self._segments_removed += 1
+
+    def _read(self, path: Path) -> Iterable[dict]:
+        """
+        Parse the readings of a segment, skipping a torn last line.
+        """
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    yield {
+                        "ingest_key": record["k"],
+                        "device_id": record["d"],
+                        "value": record["v"],
+                        "numeric_value": record.get("n", to_numeric(record["v"])),
+                        "timestamp": datetime.fromisoformat(record["t"]),
+                    }
+                except (ValueError, KeyError):
+                    self._corrupt_lines += 1
+
+    async def _run(self):
+        """
+        Periodically replay segments until the database accepts them.
+        """
+        while True:
+            try:
+                await self.replay()
+            except Exception as e:
+                self._replay_failures += 1
+                logger.error(f"Journal replay failed, will retry: {e}")
+            await asyncio.sleep(self.replay_interval)
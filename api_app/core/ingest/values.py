@@ -0,0 +1,18 @@
+import math
+from typing import Any
+
+
+def to_numeric(value: Any) -> float | None:
+    """
+    Convert a reading value to a float for the ``numeric_value`` column.
+
+    Returns
+    -------
+    float | None
+        The value as a finite float, or None if it is not a number.
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
@@ -4,7 +4,14 @@ from fastapi import FastAPI
 import asyncio
 import logging
 
+from core.ingest.partitions import maintain_reading_partitions
+from core.ingest.reading_buffer import reading_buffer
+from core.mqtt.mqtt_publisher import MqttTopicPublisher
 from core.mqtt.mqtt_subscriber import MqttTopicSubscriber
+from core.state.command_tracker import command_tracker
+from core.state.device_cache import device_cache
+from core.state.last_values import last_values
+from core.state.presence import presence_table
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +21,16 @@ async def lifespan(
     app: FastAPI, topic_subscribe_callback: Callable[[], Awaitable[None]]
 ):
     """
-    Manage application lifespan with MQTT subscriber.
+    Manage application lifespan with MQTT subscriber and publisher.
 
-    Starts an MQTT subscriber in the background when the FastAPI app starts,
-    subscribes to topics, and ensures proper cleanup when the app shuts down.
+    Makes sure the partitions of the readings table exist, then
+    starts the reading ingest buffer and an MQTT subscriber in the background
+    when the FastAPI app starts, subscribes to topics, and ensures proper
+    cleanup when the app shuts down. Pending readings are flushed on shutdown.
+    The shared MQTT publisher connection is opened on startup and closed
+    on shutdown. ESP presence is loaded into memory and silent devices
+    are swept offline while the app runs. The last-value store and the
+    device cache connect to Redis, if enabled.
 
     Parameters
     ----------
@@ -31,6 +44,29 @@ async def lifespan(
     None
         Allows FastAPI lifespan integration to continue execution.
     """
+    try:
+        await maintain_reading_partitions()
+    except Exception as e:
+        logger.error(f"Could not maintain reading partitions: {e}")
+
+    await last_values.start()
+    await reading_buffer.start()
+
+    await device_cache.start()
+    try:
+        await device_cache.load_all()
+    except Exception as e:
+        logger.error(f"Could not preload device cache: {e}")
+
+    try:
+        await presence_table.load()
+    except Exception as e:
+        logger.error(f"Could not load ESP presence: {e}")
+    await presence_table.start()
+
+    await MqttTopicPublisher().start()
+    await command_tracker.start()
+
     logger.info("Starting MQTT subscriber...")
     subscriber = MqttTopicSubscriber()
     task = asyncio.create_task(subscriber.start())
@@ -49,3 +85,14 @@ async def lifespan(
             await task
         except asyncio.CancelledError:
             logger.info("MQTT subscriber cancelled.")
+
+        logger.info("Flushing pending readings...")
+        await reading_buffer.stop()
+        await last_values.stop()
+        await device_cache.stop()
+
+        await command_tracker.stop()
+        await presence_table.stop()
+
+        logger.info("Shutting down MQTT publisher...")
+        await MqttTopicPublisher().stop()
@@ -10,8 +10,23 @@ class BaseMqttCallbackHandler:
     Base class for MQTT callback handlers.
     Provides utilities for working with MQTT topics
     defined via templates (with placeholders).
+
+    Placeholders must span a whole topic level. The template is compiled
+    once, so the subscriber can pass placeholder values straight to
+    :meth:`__call__` as keyword arguments.
+
+    Handlers with ``shared = True`` are subscribed through an MQTT v5
+    shared subscription when ``CONFIG.MQTT_SHARED_SUBSCRIPTION`` is enabled,
+    so each message is processed by a single API replica. Handlers that
+    update per-process state keep ``shared = False`` and see every message.
+
+    Handlers with ``binary_payloads = True`` also receive messages sent in
+    a binary format on codec-suffixed topics (see :mod:`core.mqtt.codecs`).
     """
 
+    shared: bool = False
+    binary_payloads: bool = False
+
     def __init__(self, topic_template: str):
         """
         Initialize handler with a topic template.
@@ -22,6 +37,16 @@ class BaseMqttCallbackHandler:
             Template for MQTT topics, e.g. "device/{device_id}/status".
         """
         self.topic_template = topic_template
+        self._wildcard_topic = re.sub(r"\{[^{}]+\}", "+", topic_template)
+        self.topic_params = {
+            i: level[1:-1]
+            for i, level in enumerate(topic_template.split("/"))
+            if level.startswith("{") and level.endswith("}")
+        }
+
+        pattern = re.escape(topic_template)
+        pattern = re.sub(r"\\\{([^{}]+)\\\}", r"(?P<\1>[^/]+)", pattern)
+        self._topic_regex = re.compile(pattern)
 
     @property
     def wildcard_topic(self) -> str:
@@ -32,7 +57,7 @@ class BaseMqttCallbackHandler:
         -------
         "device/{device_id}/status" -> "device/+/status"
         """
-        return re.sub(r"\{[^{}]+\}", "+", self.topic_template)
+        return self._wildcard_topic
 
     def get_concrete_topic(self, **kwargs) -> str:
         """
@@ -49,9 +74,12 @@ class BaseMqttCallbackHandler:
             raise AppException(
                 f"Missing key {e.args[0]} for topic template") from e
 
-    async def __call__(self, topic: str, payload: dict):
+    async def __call__(self, topic: str, payload: dict, **params: str):
         """
         Must be implemented by subclasses to handle incoming MQTT messages.
+
+        Placeholder values extracted from the topic are passed as keyword
+        arguments, e.g. ``mac`` for the template ``{mac}/status``.
         """
         raise NotImplementedError("Subclasses must implement __call__")
 
@@ -77,9 +105,7 @@ class BaseMqttCallbackHandler:
         Topic:    "device/42/co2"
         extract_from_topic(..., "garden_id") -> "42"
         """
-        pattern = re.escape(self.topic_template)
-        pattern = re.sub(r"\\\{([^{}]+)\\\}", r"(?P<\1>[^/]+)", pattern)
-        match = re.match(pattern, topic)
+        match = self._topic_regex.match(topic)
 
         if not match:
             logger.error(
@@ -0,0 +1,227 @@
+import json
+from typing import Any, Dict, NamedTuple
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Codec:
+    """
+    Serialization format of MQTT payloads.
+
+    Subclasses define the topic suffix and MQTT v5 content type
+    identifying the format, and how to encode and decode payloads.
+    """
+
+    name: str = ""
+    content_types: tuple[str, ...] = ()
+
+    @property
+    def content_type(self) -> str:
+        """
+        Content type sent in the MQTT v5 property of published messages.
+        """
+        return self.content_types[0]
+
+    def encode(self, payload: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Decode a payload.
+
+        Raises
+        ------
+        ValueError
+            If the data is not valid in this format.
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<Codec {self.name}>"
+
+
+class JsonCodec(Codec):
+    """
+    UTF-8 JSON, the default format of all topics.
+    """
+
+    name = "json"
+    content_types = ("application/json",)
+
+    def encode(self, payload: Any) -> bytes:
+        return json.dumps(payload).encode()
+
+    def decode(self, data: bytes) -> Any:
+        try:
+            return json.loads(data)
+        except UnicodeDecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+class CborCodec(Codec):
+    """
+    CBOR (RFC 8949), requires the ``cbor2`` package.
+    """
+
+    name = "cbor"
+    content_types = ("application/cbor",)
+
+    def encode(self, payload: Any) -> bytes:
+        return cbor2.dumps(payload)
+
+    def decode(self, data: bytes) -> Any:
+        try:
+            return cbor2.loads(data)
+        except cbor2.CBORDecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+class MsgpackCodec(Codec):
+    """
+    MessagePack, requires the ``msgpack`` package.
+    """
+
+    name = "msgpack"
+    content_types = (
+        "application/msgpack",
+        "application/x-msgpack",
+        "application/vnd.msgpack",
+    )
+
+    def encode(self, payload: Any) -> bytes:
+        return msgpack.packb(payload)
+
+    def decode(self, data: bytes) -> Any:
+        try:
+            return msgpack.unpackb(data)
+        except (msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+            raise ValueError(str(e)) from e
+
+
+JSON = JsonCodec()
+
+CODECS: Dict[str, Codec] = {JSON.name: JSON}
+if cbor2 is not None:
+    CODECS[CborCodec.name] = CborCodec()
+if msgpack is not None:
+    CODECS[MsgpackCodec.name] = MsgpackCodec()
+
+BINARY_SUFFIXES = tuple(name for name in CODECS if name != JSON.name)
+
+_BY_CONTENT_TYPE = {
+    content_type: codec
+    for codec in CODECS.values()
+    for content_type in codec.content_types
+}
+
+
+class Negotiated(NamedTuple):
+    """
+    Result of resolving the codec of an incoming message.
+    """
+    topic: str
+    codec: Codec
+    suffixed: bool
+    explicit: bool
+
+
+class CodecNegotiator:
+    """
+    Resolves payload codecs of device topics.
+
+    The format of an incoming message is taken from its MQTT v5 content
+    type property or, for devices without MQTT v5, from a codec suffix
+    level appended to the topic, e.g. ``{mac}/device/sensor/cbor``.
+    The last non-JSON format seen from each device is remembered, so
+    commands to it are published in the same format and the same way.
+    """
+
+    def __init__(self):
+        """
+        Initialize with no known device formats.
+        """
+        self._devices: Dict[str, tuple[Codec, bool]] = {}
+
+    def detect(self, topic: str, content_type: str | None = None) -> Negotiated:
+        """
+        Resolve the codec of a received message.
+
+        Parameters
+        ----------
+        topic : str
+            Topic the message was received on.
+        content_type : str | None
+            MQTT v5 content type property, if set.
+
+        Returns
+        -------
+        Negotiated
+            Topic without the codec suffix, the codec, whether the codec
+            was given by the suffix and whether it was given at all.
+
+        Raises
+        ------
+        ValueError
+            If the content type is set but not supported.
+        """
+        base, _, last = topic.rpartition("/")
+        if base and last in BINARY_SUFFIXES:
+            return Negotiated(base, CODECS[last], True, True)
+
+        if content_type:
+            codec = _BY_CONTENT_TYPE.get(content_type.split(";", 1)[0].strip())
+            if codec is None:
+                raise ValueError(f"Unsupported content type '{content_type}'")
+            return Negotiated(topic, codec, False, True)
+
+        return Negotiated(topic, JSON, False, False)
+
+    def remember(self, mac: str, negotiated: Negotiated):
+        """
+        Record the format used by a device.
+
+        Messages without a suffix or content type say nothing about the
+        device's capabilities and are ignored, so plain JSON status
+        messages do not reset a negotiated binary format.
+        """
+        if not negotiated.explicit:
+            return
+        if negotiated.codec is JSON:
+            self._devices.pop(mac, None)
+        else:
+            self._devices[mac] = (negotiated.codec, negotiated.suffixed)
+
+    def outgoing(self, mac: str, topic: str) -> tuple[str, Codec]:
+        """
+        Return the topic and codec to publish a message to a device with.
+
+        Example
+        -------
+        outgoing("AA:BB", "AA:BB/device/control")
+        -> ("AA:BB/device/control/cbor", <Codec cbor>) for a device
+        that sent CBOR using the topic suffix.
+        """
+        codec, suffixed = self._devices.get(mac, (JSON, False))
+        if suffixed:
+            return f"{topic}/{codec.name}", codec
+        return topic, codec
+
+    def stats(self) -> dict:
+        """
+        Return the available codecs and the number of devices per codec.
+        """
+        per_codec = {name: 0 for name in BINARY_SUFFIXES}
+        for codec, _ in self._devices.values():
+            per_codec[codec.name] += 1
+        return {"available": list(CODECS), "binary_devices": per_codec}
+
+
+codec_negotiator = CodecNegotiator()
@@ -0,0 +1,108 @@
+import sys
+from collections import OrderedDict, deque
+from typing import Any, Dict
+
+from core.config import CONFIG
+from core.mqtt.codecs import JSON, Codec
+
+
+class MessageHistory:
+    """
+    Bounded store of the last messages received per MQTT topic.
+
+    Keeps at most ``depth`` payloads for each of at most ``max_topics``
+    topics. When a new topic would exceed the cap, the topic that has not
+    received a message for the longest time is evicted. Payloads are kept
+    as the raw bytes received from the broker, together with their codec,
+    and decoded only when read.
+    """
+
+    def __init__(
+        self,
+        max_topics: int = CONFIG.MQTT_HISTORY_MAX_TOPICS,
+        depth: int = CONFIG.MQTT_HISTORY_DEPTH,
+    ):
+        """
+        Initialize an empty history.
+
+        Parameters
+        ----------
+        max_topics : int
+            Maximum number of topics kept at the same time.
+        depth : int
+            Number of messages kept per topic.
+        """
+        self.max_topics = max_topics
+        self.depth = depth
+        self._topics: OrderedDict[str, deque[tuple[Codec, bytes]]] = OrderedDict()
+        self._payload_bytes = 0
+        self._evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    def append(self, topic: str, payload: bytes, codec: Codec = JSON):
+        """
+        Record a raw payload received on a topic.
+
+        Parameters
+        ----------
+        topic : str
+            Concrete topic the message was received on.
+        payload : bytes
+            Raw, already validated payload.
+        codec : Codec
+            Codec the payload was decoded with.
+        """
+        messages = self._topics.get(topic)
+        if messages is None:
+            if len(self._topics) >= self.max_topics:
+                _, evicted = self._topics.popitem(last=False)
+                self._payload_bytes -= sum(len(p) for _, p in evicted)
+                self._evicted += 1
+            messages = self._topics[topic] = deque(maxlen=self.depth)
+        else:
+            self._topics.move_to_end(topic)
+
+        if len(messages) == self.depth:
+            self._payload_bytes -= len(messages[0][1])
+        messages.append((codec, payload))
+        self._payload_bytes += len(payload)
+
+    def last(self, topic: str) -> Dict[str, Any] | None:
+        """
+        Return the decoded most recent message of a topic, or None.
+        """
+        messages = self._topics.get(topic)
+        if not messages:
+            return None
+        codec, payload = messages[-1]
+        return codec.decode(payload)
+
+    def all(self, topic: str) -> list[Dict[str, Any]]:
+        """
+        Return all decoded messages kept for a topic, oldest first.
+        """
+        return [codec.decode(p) for codec, p in self._topics.get(topic, ())]
+
+    def stats(self) -> dict:
+        """
+        Return topic counts and an estimate of the memory used.
+
+        The estimate covers payload buffers, topic strings and the
+        per-topic deques, but not the dictionary itself.
+        """
+        messages = sum(len(m) for m in self._topics.values())
+        overhead = sum(
+            sys.getsizeof(topic) + sys.getsizeof(m)
+            for topic, m in self._topics.items()
+        ) + messages * (sys.getsizeof(b"") + sys.getsizeof((JSON, b"")))
+
+        return {
+            "topics": len(self._topics),
+            "max_topics": self.max_topics,
+            "messages": messages,
+            "evicted_topics": self._evicted,
+            "payload_bytes": self._payload_bytes,
+            "approx_memory_bytes": self._payload_bytes + overhead,
+        }
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import zlib
+from typing import Awaitable, Callable
+from aiomqtt import Message
+from core.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def shard_key(topic: str) -> str:
+    """
+    Return the part of a topic that identifies the sending device.
+
+    All device topics start with the ESP MAC, e.g. ``{mac}/device/sensor``.
+    """
+    return topic.split("/", 1)[0]
+
+
+def shard_of(key: str, shards: int) -> int:
+    """
+    Map a shard key to a shard index in a process-independent way.
+    """
+    return zlib.crc32(key.encode()) % shards
+
+
+def partition_of(key: str, partitions: int) -> int:
+    """
+    Map a shard key to an ingest process index in a process-independent way.
+
+    Uses the high bits of the checksum, while :func:`shard_of` uses the low
+    bits, so devices of one process still spread over all its dispatch shards.
+    """
+    return (zlib.crc32(key.encode()) >> 16) % partitions
+
+
+class MqttDispatcher:
+    """
+    Dispatches incoming MQTT messages to a fixed pool of worker tasks.
+
+    Messages are sharded by the MAC in the topic, so messages of a single
+    device are handled in order, while messages of different devices are
+    processed in parallel. The number of queued and running messages is
+    bounded; :meth:`submit` waits once the limit is reached, which applies
+    backpressure to the broker stream.
+    """
+
+    def __init__(
+        self,
+        handle: Callable[[Message], Awaitable[None]],
+        workers: int = CONFIG.MQTT_DISPATCH_WORKERS,
+        max_inflight: int = CONFIG.MQTT_DISPATCH_MAX_INFLIGHT,
+    ):
+        """
+        Initialize the dispatcher.
+
+        Parameters
+        ----------
+        handle : Callable[[Message], Awaitable[None]]
+            Coroutine processing a single message.
+        workers : int
+            Number of shards, each served by one worker task.
+        max_inflight : int
+            Maximum number of messages queued or being processed.
+        """
+        self.handle = handle
+        self.workers = max(1, workers)
+        self.max_inflight = max(1, max_inflight)
+
+        self._queues: list[asyncio.Queue[Message]] = [
+            asyncio.Queue() for _ in range(self.workers)
+        ]
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._tasks: list[asyncio.Task] = []
+
+        self._inflight_count = 0
+        self._processed = [0] * self.workers
+        self._errors = [0] * self.workers
+        self._max_depth = [0] * self.workers
+
+    def start(self):
+        """
+        Start one worker task per shard.
+        """
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(
+            f"MQTT dispatcher started with {self.workers} workers "
+            f"(max in-flight {self.max_inflight})")
+
+    async def stop(self):
+        """
+        Cancel all worker tasks. Messages still queued are discarded.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for queue in self._queues:
+            while not queue.empty():
+                queue.get_nowait()
+                self._inflight_count -= 1
+                self._inflight.release()
+
+    async def submit(self, message: Message):
+        """
+        Queue a message on the shard of its device.
+
+        Waits while the in-flight limit is reached.
+        """
+        await self._inflight.acquire()
+        self._inflight_count += 1
+
+        shard = shard_of(shard_key(str(message.topic)), self.workers)
+        queue = self._queues[shard]
+        queue.put_nowait(message)
+        self._max_depth[shard] = max(self._max_depth[shard], queue.qsize())
+
+    def stats(self) -> dict:
+        """
+        Return per-shard queue depths and counters.
+        """
+        return {
+            "workers": self.workers,
+            "max_inflight": self.max_inflight,
+            "inflight": self._inflight_count,
+            "shards": [
+                {
+                    "shard": i,
+                    "queue_depth": queue.qsize(),
+                    "max_queue_depth": self._max_depth[i],
+                    "processed": self._processed[i],
+                    "errors": self._errors[i],
+                }
+                for i, queue in enumerate(self._queues)
+            ],
+        }
+
+    async def _worker(self, shard: int):
+        """
+        Process messages of one shard sequentially.
+        """
+        queue = self._queues[shard]
+        while True:
+            message = await queue.get()
+            try:
+                await self.handle(message)
+            except Exception as e:
+                self._errors[shard] += 1
+                logger.error(f"Error handling message: {e}")
+            finally:
+                self._processed[shard] += 1
+                self._inflight_count -= 1
+                self._inflight.release()
+                logger.info(f"Message processed: {message.topic}")
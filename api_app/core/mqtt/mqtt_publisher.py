@@ -1,54 +1,294 @@
-import json
+import asyncio
 import logging
-from aiomqtt import Client
+from collections import deque
+from dataclasses import dataclass
+from typing import Self
+from aiomqtt import Client, MqttError, ProtocolVersion
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+from core.mqtt.codecs import JSON, Codec, codec_negotiator
 from core.mqtt.tls_context import create_tls_context
 from core.config import CONFIG
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class _OutgoingMessage:
+    """
+    A message waiting to be published, with the future of its caller.
+    """
+    topic: str
+    payload: bytes
+    qos: int
+    retain: bool
+    properties: Properties | None
+    future: asyncio.Future
+
+
 class MqttTopicPublisher:
     """
     Wrapper for publishing MQTT messages with TLS encryption.
-    Uses aiomqtt for async context-based connections.
+
+    Keeps a single long-lived aiomqtt connection per process. Messages are
+    queued and sent by a background task, which reconnects automatically
+    with exponential backoff; messages published while the connection is
+    down stay queued and are sent once it is back.
+    Payloads are JSON unless another codec is given; such messages carry
+    the codec's MQTT v5 content type.
+    Implemented as a singleton, so all services share the same connection.
     """
 
+    _instance: Self | None = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
     def __init__(self):
         """
         Initialize MQTT publisher with broker configuration
         loaded from application CONFIG.
         """
+        if getattr(self, "_initialized", False):
+            return
+
         self.broker_host = CONFIG.MQTT_BROKER_HOST
         self.port = CONFIG.MQTT_BROKER_PORT
         self.tls_context = create_tls_context()
 
+        self._queue: asyncio.Queue[_OutgoingMessage] | None = None
+        self._retry: deque[_OutgoingMessage] = deque()
+        self._sending: dict[asyncio.Task, _OutgoingMessage] = {}
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connected = False
+
+        self._published_total = 0
+        self._failed_total = 0
+        self._reconnects = 0
+        self._initialized = True
+
+    async def start(self):
+        """
+        Start the background connection task on the running event loop.
+
+        Does nothing if the publisher is already running on this loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task and not self._task.done() and self._loop is loop:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=CONFIG.MQTT_PUBLISH_QUEUE_SIZE)
+        self._retry.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"MQTT publisher started for {self.broker_host}:{self.port}")
+
+    async def stop(self):
+        """
+        Stop the background task.
+
+        Messages that were not acknowledged yet, queued or in flight, fail
+        with :class:`ConnectionError`, so no caller of :meth:`publish`
+        keeps waiting for them.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        sending = list(self._sending.items())
+        for task, _ in sending:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in sending), return_exceptions=True)
+
+        pending = [message for _, message in sending] + list(self._retry)
+        self._retry.clear()
+        while self._queue and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for message in pending:
+            if not message.future.done():
+                message.future.set_exception(
+                    ConnectionError("MQTT publisher stopped"))
+
+        self._connected = False
+        logger.info("MQTT publisher stopped.")
+
     async def publish(
         self,
         topic: str,
         payload: dict,
         qos: int = 0,
         retain: bool = False,
+        timeout: float | None = None,
+        codec: Codec = JSON,
     ):
         """
-        Publish a JSON payload to a given MQTT topic.
+        Publish a payload to a given MQTT topic.
+
+        Waits until the message was handed to the broker; for QoS 1 and 2
+        this means until the broker acknowledged it.
 
         Parameters
         ----------
         topic : str
             MQTT topic to publish to.
         payload : dict
-            Message content, automatically serialized to JSON.
+            Message content, automatically serialized with ``codec``.
         qos : int
             Quality of Service level (0, 1, or 2). Default: 0.
         retain : bool
             Whether the broker should retain this message. Default: False.
+        timeout : float | None
+            Maximum time to wait in seconds. Waits indefinitely if None.
+        codec : Codec
+            Payload format. Default: JSON.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            If the message was not delivered within ``timeout``.
+        ConnectionError
+            If the publisher was stopped before the message was delivered.
+        """
+        await self.start()
+
+        properties = None
+        if codec is not JSON:
+            properties = Properties(PacketTypes.PUBLISH)
+            properties.ContentType = codec.content_type
+
+        message = _OutgoingMessage(
+            topic,
+            codec.encode(payload),
+            qos,
+            retain,
+            properties,
+            asyncio.get_running_loop().create_future(),
+        )
+
+        await self._queue.put(message)
+        # on timeout the future is cancelled, so a still queued message is dropped
+        await asyncio.wait_for(message.future, timeout)
+        logger.info(f"[MQTT OUT] {topic} ({codec.name}): {payload}")
+
+    async def publish_to_device(self, mac: str, topic: str, payload: dict, **kwargs):
+        """
+        Publish a payload to an ESP device in the format it negotiated.
+
+        Devices that sent binary payloads get the same codec, on the
+        codec-suffixed topic if they used one (see :mod:`core.mqtt.codecs`).
+        Accepts the keyword arguments of :meth:`publish`.
+        """
+        topic, codec = codec_negotiator.outgoing(mac, topic)
+        await self.publish(topic, payload, codec=codec, **kwargs)
+
+    def stats(self) -> dict:
+        """
+        Return connection state and publish counters.
+        """
+        return {
+            "connected": self._connected,
+            "queue_depth": (self._queue.qsize() if self._queue else 0) + len(self._retry),
+            "published_total": self._published_total,
+            "failed_total": self._failed_total,
+            "reconnects": self._reconnects,
+        }
+
+    async def _run(self):
+        """
+        Keep a connection open and send queued messages, reconnecting on errors.
+        """
+        delay = 1.0
+        while True:
+            try:
+                async with Client(
+                    self.broker_host,
+                    port=self.port,
+                    tls_context=self.tls_context,
+                    protocol=ProtocolVersion.V5,
+                ) as client:
+                    self._connected = True
+                    delay = 1.0
+                    logger.info("MQTT publisher connected")
+                    await self._pump(client)
+            except MqttError as e:
+                logger.warning(
+                    f"MQTT publisher disconnected: {e}. Reconnecting in {delay:.0f}s")
+            finally:
+                self._connected = False
+
+            self._reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CONFIG.MQTT_RECONNECT_MAX_DELAY)
+
+    async def _pump(self, client: Client):
+        """
+        Send queued messages concurrently over one connection.
+
+        A failed send puts its message back in front of the queue and marks
+        the connection as broken, which makes this method raise so that
+        :meth:`_run` reconnects.
+        """
+        broken = asyncio.Event()
+        broken_wait = asyncio.create_task(broken.wait())
+        try:
+            while True:
+                if broken.is_set():
+                    raise MqttError("Connection lost while publishing")
+
+                if self._retry:
+                    message = self._retry.popleft()
+                else:
+                    getter = asyncio.create_task(self._queue.get())
+                    await asyncio.wait(
+                        {getter, broken_wait}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    message = getter.result()
+                    if broken.is_set():
+                        self._retry.appendleft(message)
+                        continue
+
+                if message.future.done():
+                    continue
+
+                task = asyncio.create_task(self._send(client, message, broken))
+                self._sending[task] = message
+                task.add_done_callback(lambda t: self._sending.pop(t, None))
+        finally:
+            broken_wait.cancel()
+
+    async def _send(self, client: Client, message: _OutgoingMessage, broken: asyncio.Event):
+        """
+        Publish a single message and resolve its future.
         """
-        payload_str = json.dumps(payload)
+        try:
+            await client.publish(
+                message.topic,
+                message.payload,
+                qos=message.qos,
+                retain=message.retain,
+                properties=message.properties,
+            )
+        except MqttError as e:
+            self._retry.append(message)
+            broken.set()
+            logger.warning(f"Publish to {message.topic} failed, requeued: {e}")
+            return
+        except Exception as e:
+            self._failed_total += 1
+            if not message.future.done():
+                message.future.set_exception(e)
+            return
 
-        async with Client(
-            self.broker_host,
-            port=self.port,
-            tls_context=self.tls_context,
-        ) as client:
-            await client.publish(topic, payload_str.encode(), qos=qos, retain=retain)
-            logger.info(f"[MQTT OUT] {topic}: {payload_str}")
+        self._published_total += 1
+        if not message.future.done():
+            message.future.set_result(None)
@@ -1,23 +1,47 @@
 import asyncio
 import json
 import logging
-from collections import defaultdict, deque
 from typing import Callable, Awaitable, Dict, Self
-from aiomqtt import Client, Message
+from aiomqtt import Client, Message, ProtocolVersion
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
 from core.mqtt.base_mqtt_callback_handler import BaseMqttCallbackHandler
+from core.mqtt.codecs import BINARY_SUFFIXES, codec_negotiator
+from core.mqtt.message_history import MessageHistory
+from core.mqtt.mqtt_dispatcher import MqttDispatcher, partition_of, shard_key
+from core.mqtt.topic_router import TopicRouter
 from core.mqtt.tls_context import create_tls_context
 from core.config import CONFIG
 from exceptions.scheme import AppException
 
 logger = logging.getLogger(__name__)
 
+# Subscription identifiers of plain and shared subscriptions. A client with
+# both on one topic gets a copy of a message for each of them, tagged with
+# the identifier of the subscription it was delivered for.
+PLAIN_SUBSCRIPTION_ID = 1
+SHARED_SUBSCRIPTION_ID = 2
+
 
 class MqttTopicSubscriber:
     """
     MQTT topic subscriber using aiomqtt.
 
-    Maintains history of received messages and dispatches them to registered callbacks.
+    Maintains a bounded history of received messages and dispatches them
+    to registered callbacks.
+    Messages are handed to a :class:`MqttDispatcher`, so a slow callback only
+    delays messages of the same device.
     Implemented as a singleton, so all calls share the same underlying client instance.
+
+    The client connects with MQTT v5, so payload formats can be negotiated
+    through the content type property (see :mod:`core.mqtt.codecs`).
+    With ``CONFIG.MQTT_SHARED_SUBSCRIPTION`` enabled shared handlers are
+    subscribed as
+    ``$share/<MQTT_SHARED_GROUP>/<topic>``, letting the broker load-balance
+    their messages across all API replicas in the group.
+    A shared and a non-shared handler may listen on the same topic: each
+    copy of a message is routed only to the handlers of the subscription
+    it was delivered for, using MQTT v5 subscription identifiers.
     """
 
     _instance: Self | None = None
@@ -38,11 +62,14 @@ class MqttTopicSubscriber:
 
         self.broker_host = CONFIG.MQTT_BROKER_HOST
         self.port = CONFIG.MQTT_BROKER_PORT
-        self._history: Dict[str, deque[dict]] = defaultdict(
-            lambda: deque(maxlen=5))
-        self._callbacks: Dict[str, list[Callable[[
-            str, dict], Awaitable[None]]]] = defaultdict(list)
+        self.shared_group = (
+            CONFIG.MQTT_SHARED_GROUP if CONFIG.MQTT_SHARED_SUBSCRIPTION else None)
+        self._partition: tuple[int, int] | None = None
+        self._skipped = 0
+        self._history = MessageHistory()
+        self._router = TopicRouter()
         self._client: Client | None = None
+        self._dispatcher = MqttDispatcher(self._handle_message)
         self.tls_context = create_tls_context()
         self._initialized = True
 
@@ -58,23 +85,29 @@ class MqttTopicSubscriber:
             self.broker_host,
             port=self.port,
             tls_context=self.tls_context,
+            protocol=ProtocolVersion.V5,
         )
 
-        async with self._client as client:
-            async for message in client.messages:
-                try:
-                    await self._handle_message(message)
-                except Exception as e:
-                    logger.error(f"Error handling message: {e}")
-                finally:
-                    logger.info(f"Message processed: {message.topic}")
+        self._dispatcher.start()
+        try:
+            async with self._client as client:
+                async for message in client.messages:
+                    if self._partition and not self._owns(str(message.topic)):
+                        self._skipped += 1
+                        continue
+                    await self._dispatcher.submit(message)
+        finally:
+            await self._dispatcher.stop()
 
         logger.info("MQTT client disconnected")
 
     async def subscribe(
         self,
         topic: str,
-        callback: Callable[[str, dict], Awaitable[None]] | None = None,
+        callback: Callable[..., Awaitable[None]] | None = None,
+        params: Dict[int, str] | None = None,
+        shared: bool = False,
+        binary_payloads: bool = False,
     ):
         """
         Subscribe to a specific topic.
@@ -83,17 +116,41 @@ class MqttTopicSubscriber:
         ----------
         topic : str
             MQTT topic to subscribe to.
-        callback : Callable[[str, dict], Awaitable[None]] | None
+        callback : Callable[..., Awaitable[None]] | None
             Optional callback to handle incoming messages.
+        params : Dict[int, str] | None
+            Names of wildcard levels keyed by level index. Their values are
+            passed to the callback as keyword arguments.
+        shared : bool
+            Subscribe through the shared subscription group, if enabled.
+            Messages still arrive on, and are routed by, the plain topic,
+            but only the copies delivered for the shared subscription
+            reach the callback.
+        binary_payloads : bool
+            Also subscribe to the topic with each binary codec suffix,
+            e.g. ``+/device/sensor/cbor``. Such messages are routed by
+            the topic without the suffix.
         """
         if self._client is None:
             raise RuntimeError("Client is not connected yet")
 
-        await self._client.subscribe(topic)
-        logger.info(f"Subscribed to topic: {topic}")
+        topics = [topic]
+        if binary_payloads:
+            topics += [f"{topic}/{suffix}" for suffix in BINARY_SUFFIXES]
+
+        shared = shared and self.shared_group is not None
+        properties = Properties(PacketTypes.SUBSCRIBE)
+        properties.SubscriptionIdentifier = (
+            SHARED_SUBSCRIPTION_ID if shared else PLAIN_SUBSCRIPTION_ID)
+
+        for t in topics:
+            subscription = self.subscription_topic(t) if shared else t
+            await self._client.subscribe(subscription, properties=properties)
+            logger.info(f"Subscribed to topic: {subscription}")
 
         if callback:
-            self._callbacks[topic].append(callback)
+            self._router.add(
+                topic, (callback, properties.SubscriptionIdentifier), params)
         else:
             logger.warning(f"No callback provided for topic {topic}.")
 
@@ -106,35 +163,108 @@ class MqttTopicSubscriber:
         handler : BaseMqttCallbackHandler
             A handler implementing the __call__ method for incoming messages.
         """
-        await self.subscribe(handler.wildcard_topic, handler)
+        await self.subscribe(
+            handler.wildcard_topic,
+            handler,
+            handler.topic_params,
+            handler.shared,
+            handler.binary_payloads,
+        )
+
+    def set_partition(self, index: int, count: int):
+        """
+        Handle only messages of devices in one hash partition of MACs.
+
+        Used by the standalone ingest worker, where each of ``count``
+        processes receives all messages and keeps those whose MAC maps to
+        ``index``. Shared subscriptions are disabled, as the broker
+        would otherwise split the messages before they are partitioned.
+
+        Parameters
+        ----------
+        index : int
+            Partition owned by this process, ``0 <= index < count``.
+        count : int
+            Total number of partitions.
+        """
+        if not 0 <= index < count:
+            raise ValueError(f"Partition {index} out of range for {count}")
+        self._partition = (index, count)
+        self.shared_group = None
+
+    def subscription_topic(self, topic: str) -> str:
+        """
+        Return the topic filter to subscribe with for a shared handler.
+
+        Example
+        -------
+        "+/device/sensor" -> "$share/api/+/device/sensor"
+        """
+        if self.shared_group is None:
+            return topic
+        return f"$share/{self.shared_group}/{topic}"
+
+    def _owns(self, topic: str) -> bool:
+        """
+        Check whether a topic belongs to the partition of this process.
+        """
+        index, count = self._partition
+        return partition_of(shard_key(topic), count) == index
 
     async def _handle_message(self, message: Message):
         """
         Internal method to process a single MQTT message.
-        Dispatches to all callbacks matching the topic.
+        Decodes the payload with the negotiated codec and dispatches it to
+        all callbacks matching the topic, passing the values of named
+        wildcard levels as keyword arguments.
+
+        Copies tagged with subscription identifiers only go to the callbacks
+        of those subscriptions. Copies without identifiers, from brokers that
+        do not support them, go to all matching callbacks.
         """
-        raw_payload = message.payload.decode()
+        raw_payload = message.payload
+        if isinstance(raw_payload, str):
+            raw_payload = raw_payload.encode()
         topic = str(message.topic)
+        content_type = getattr(message.properties, "ContentType", None)
 
         try:
-            payload = json.loads(raw_payload)
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON on topic {topic}: {raw_payload} ({e})")
+            negotiated = codec_negotiator.detect(topic, content_type)
+            payload = negotiated.codec.decode(raw_payload)
+        except ValueError as e:
+            logger.error(f"Invalid payload on topic {topic}: {raw_payload!r} ({e})")
             return
 
+        topic = negotiated.topic
+        codec_negotiator.remember(shard_key(topic), negotiated)
+
         logger.info(f"[MQTT IN] {topic}: {payload}")
-        self._history[topic].append(payload)
+        self._history.append(topic, bytes(raw_payload), negotiated.codec)
+
+        ids = getattr(message.properties, "SubscriptionIdentifier", None)
+        for (callback, subscription_id), params in self._router.match(topic):
+            if ids and subscription_id not in ids:
+                continue
+            await callback(topic, payload, **params)
 
-        for pattern, callbacks in self._callbacks.items():
-            if self._topic_matches(pattern, topic):
-                for callback in callbacks:
-                    await callback(topic, payload)
+    def stats(self) -> dict:
+        """
+        Return dispatcher counters, per-shard queue depths
+        and the size of the message history.
+        """
+        return {
+            "dispatcher": self._dispatcher.stats(),
+            "history": self._history.stats(),
+            "codecs": codec_negotiator.stats(),
+            "partition": list(self._partition) if self._partition else None,
+            "skipped_other_partitions": self._skipped,
+        }
 
     def get_last_messages(self, topic: str) -> list[dict]:
         """
-        Return the last few messages for a given topic.
+        Return the last few messages for a given topic, oldest first.
         """
-        return list(self._history[topic])
+        return self._history.all(topic)
 
     def get_last_message(self, topic: str) -> dict:
         """
@@ -145,28 +275,10 @@ class MqttTopicSubscriber:
         AppException
             If no message exists for the topic.
         """
-        if not self._history[topic]:
+        payload = self._history.last(topic)
+        if payload is None:
             raise AppException(f"No message found for topic: {topic}")
-        return self._history[topic][-1]
-
-    def _topic_matches(self, pattern: str, topic: str) -> bool:
-        """
-        Check if a topic matches a subscription pattern.
-
-        Supports MQTT wildcards '+' and '#'.
-        """
-        pattern_parts = pattern.split("/")
-        topic_parts = topic.split("/")
-
-        for p, t in zip(pattern_parts, topic_parts):
-            if p == "#":
-                return True
-            if p == "+":
-                continue
-            if p != t:
-                return False
-
-        return len(pattern_parts) == len(topic_parts)
+        return payload
 
 
 if __name__ == "__main__":
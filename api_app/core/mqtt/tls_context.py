@@ -1,12 +1,15 @@
 import ssl
+from functools import lru_cache
 
 
+@lru_cache(maxsize=1)
 def create_tls_context():
     """
     Create and configure an SSL/TLS context for MQTT connections.
 
     Loads the CA certificate, backend certificate, and private key
-    from predefined file paths in `/app/ca/`.
+    from predefined file paths in `/app/ca/`. The context is created
+    once per process and shared by the publisher and the subscriber.
 
     Returns
     -------
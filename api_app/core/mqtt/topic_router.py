@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Tuple
+
+
+class _Node:
+    """
+    A single topic level in the routing trie.
+    """
+    __slots__ = ("children", "plus", "routes", "hash_routes")
+
+    def __init__(self):
+        self.children: Dict[str, _Node] = {}
+        self.plus: _Node | None = None
+        self.routes: List[Tuple[Any, Tuple[Tuple[int, str], ...]]] = []
+        self.hash_routes: List[Tuple[Any, Tuple[Tuple[int, str], ...]]] = []
+
+
+class TopicRouter:
+    """
+    Trie over MQTT topic levels supporting the ``+`` and ``#`` wildcards.
+
+    Patterns are compiled once when they are added. :meth:`match` walks the
+    topic levels a single time and returns every matching callback together
+    with the values of the named wildcard levels of its pattern.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty router.
+        """
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pattern: str, callback: Any, params: Dict[int, str] | None = None):
+        """
+        Register a callback for a subscription pattern.
+
+        Parameters
+        ----------
+        pattern : str
+            MQTT subscription pattern, e.g. ``+/device/sensor``.
+        callback : Any
+            Object returned by :meth:`match` for matching topics.
+        params : Dict[int, str] | None
+            Names of wildcard levels keyed by level index,
+            e.g. ``{0: "mac"}`` for the template ``{mac}/device/sensor``.
+        """
+        levels = pattern.split("/")
+        named = tuple(sorted((params or {}).items()))
+
+        node = self._root
+        for i, level in enumerate(levels):
+            if level == "#":
+                if i != len(levels) - 1:
+                    raise ValueError(
+                        f"'#' must be the last level of pattern '{pattern}'")
+                node.hash_routes.append((callback, named))
+                self._size += 1
+                return
+            if level == "+":
+                if node.plus is None:
+                    node.plus = _Node()
+                node = node.plus
+            else:
+                node = node.children.setdefault(level, _Node())
+
+        node.routes.append((callback, named))
+        self._size += 1
+
+    def match(self, topic: str) -> List[Tuple[Any, Dict[str, str]]]:
+        """
+        Find all callbacks whose pattern matches a concrete topic.
+
+        Returns
+        -------
+        List[Tuple[Any, Dict[str, str]]]
+            Pairs of callback and extracted placeholder values.
+        """
+        levels = topic.split("/")
+        depth = len(levels)
+        found = []
+
+        stack = [(self._root, 0)]
+        while stack:
+            node, i = stack.pop()
+
+            # '#' also matches the parent level, e.g. "a/#" matches "a"
+            found.extend(node.hash_routes)
+
+            if i == depth:
+                found.extend(node.routes)
+                continue
+
+            child = node.children.get(levels[i])
+            if child is not None:
+                stack.append((child, i + 1))
+            if node.plus is not None:
+                stack.append((node.plus, i + 1))
+
+        return [
+            (callback, {name: levels[i] for i, name in named})
+            for callback, named in found
+        ]
@@ -0,0 +1,158 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Select the points of a series that best preserve its shape, using the
+    Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are
+    split into ``max_points - 2`` buckets of equal size, and from each
+    bucket the point forming the largest triangle with the point kept
+    from the previous bucket and the average of the next bucket is kept.
+    Areas and bucket averages are computed with NumPy; only the walk over
+    the buckets, which depends on the previous choice, is a Python loop,
+    so the cost grows with the number of input points only in vectorized
+    code.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Ascending x coordinates, e.g. Unix timestamps.
+    y : np.ndarray
+        Values at ``x``.
+    max_points : int
+        Maximum number of points to keep, at least 3.
+
+    Returns
+    -------
+    np.ndarray
+        Ascending indices of the kept points. All indices if the series
+        has no more than ``max_points`` points.
+
+    Raises
+    ------
+    ValueError
+        If ``max_points`` is less than 3.
+    """
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max_points - 2
+    # n - 2 >= buckets, so the edges are strictly increasing
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    sizes = np.diff(edges)
+    starts = edges[:-1] - 1
+    avg_x = np.add.reduceat(x[1:n - 1], starts) / sizes
+    avg_y = np.add.reduceat(y[1:n - 1], starts) / sizes
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def bin_mean(
+    bins: np.ndarray, counts: np.ndarray, sums: np.ndarray, size: int
+) -> np.ndarray:
+    """
+    Combine partial counts and sums into the mean of each bin.
+
+    Parameters
+    ----------
+    bins : np.ndarray
+        Bin index of each partial aggregate, in ``[0, size)``.
+    counts : np.ndarray
+        Number of values of each partial aggregate.
+    sums : np.ndarray
+        Sum of the values of each partial aggregate.
+    size : int
+        Number of bins.
+
+    Returns
+    -------
+    np.ndarray
+        Mean per bin, NaN for bins without values.
+    """
+    total = np.bincount(bins, weights=counts, minlength=size)
+    means = np.full(size, np.nan)
+    np.divide(
+        np.bincount(bins, weights=sums, minlength=size), total,
+        out=means, where=total > 0)
+    return means
+
+
+def bin_last(
+    bins: np.ndarray, times: np.ndarray, values: np.ndarray, size: int
+) -> np.ndarray:
+    """
+    Pick the most recent value of each bin.
+
+    Parameters
+    ----------
+    bins : np.ndarray
+        Bin index of each value, in ``[0, size)``.
+    times : np.ndarray
+        Time of each value. Of several values in a bin, the one with the
+        largest time is kept.
+    values : np.ndarray
+        Values.
+    size : int
+        Number of bins.
+
+    Returns
+    -------
+    np.ndarray
+        Latest value per bin, NaN for bins without values.
+    """
+    last = np.full(size, np.nan)
+    if not len(bins):
+        return last
+    order = np.lexsort((times, bins))
+    sorted_bins = bins[order]
+    keep = np.append(sorted_bins[1:] != sorted_bins[:-1], True)
+    last[sorted_bins[keep]] = values[order][keep]
+    return last
+
+
+def forward_fill(values: np.ndarray, limit: int | None = None) -> np.ndarray:
+    """
+    Fill NaN gaps with the previous value, without a Python loop.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Values with NaN for missing entries.
+    limit : int | None
+        Maximum number of consecutive entries filled after a value.
+        None fills without limit, 0 disables filling.
+
+    Returns
+    -------
+    np.ndarray
+        Filled copy of ``values``. Entries before the first value stay NaN.
+    """
+    positions = np.arange(len(values))
+    source = np.where(np.isnan(values), -1, positions)
+    np.maximum.accumulate(source, out=source)
+
+    filled = values[np.maximum(source, 0)]
+    missing = source < 0
+    if limit is not None:
+        missing |= positions - source > limit
+    filled[missing] = np.nan
+    return filled
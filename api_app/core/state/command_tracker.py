@@ -0,0 +1,202 @@
+import asyncio
+import bisect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from core.config import CONFIG
+from common_db.enums import DeviceType
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@dataclass(slots=True)
+class PendingCommand:
+    """
+    An actuator command published to an ESP and not confirmed yet.
+    """
+    action: str
+    sent_at: float
+    future: asyncio.Future
+
+
+class CommandTracker:
+    """
+    Correlates actuator commands with their confirmations.
+
+    Commands sent on ``{mac}/device/control`` are recorded per
+    ``(mac, DeviceType)``. Confirmations received on ``{mac}/device/confirm``
+    resolve them and their round-trip latency is added to a histogram.
+    Commands not confirmed within ``timeout`` seconds are expired by a
+    background sweeper and counted as timeouts.
+
+    Only a started tracker records commands: confirmations reach the API
+    process alone, so commands sent from other processes, such as Celery
+    workers, could never be resolved or expired there.
+    """
+
+    def __init__(self, timeout: float = CONFIG.COMMAND_CONFIRM_TIMEOUT):
+        """
+        Initialize an empty tracker.
+
+        Parameters
+        ----------
+        timeout : float
+            Seconds after which an unconfirmed command times out.
+        """
+        self.timeout = timeout
+        self._pending: Dict[Tuple[str, DeviceType], PendingCommand] = {}
+        self._task: asyncio.Task | None = None
+
+        self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._latency_sum = 0.0
+        self._confirmed = 0
+        self._timeouts = 0
+        self._superseded = 0
+        self._unmatched = 0
+
+    async def start(self):
+        """
+        Start the background sweeper expiring unconfirmed commands.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sweep())
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the sweeper runs, i.e. commands can be tracked in this process.
+        """
+        return self._task is not None and not self._task.done()
+
+    async def stop(self):
+        """
+        Stop the sweeper and resolve all pending commands as unconfirmed.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for command in self._pending.values():
+            if not command.future.done():
+                command.future.set_result(False)
+        self._pending.clear()
+
+    def register(self, mac: str, device_type: DeviceType, action: str) -> asyncio.Future:
+        """
+        Record a command that is about to be published.
+
+        A previous unconfirmed command for the same device is superseded.
+
+        Parameters
+        ----------
+        mac : str
+            MAC address of the target ESP.
+        device_type : DeviceType
+            Type of the actuator.
+        action : str
+            Expected confirmed action, ``"on"`` or ``"off"``.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to True when the device confirms the action successfully,
+            or False if it reports a failure, times out or is superseded.
+        """
+        key = (mac, device_type)
+        previous = self._pending.pop(key, None)
+        if previous and not previous.future.done():
+            previous.future.set_result(False)
+            self._superseded += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = PendingCommand(action, time.monotonic(), future)
+        return future
+
+    def discard(self, mac: str, device_type: DeviceType, future: asyncio.Future):
+        """
+        Forget a command that could not be published.
+        """
+        command = self._pending.get((mac, device_type))
+        if command and command.future is future:
+            del self._pending[(mac, device_type)]
+            if not future.done():
+                future.set_result(False)
+
+    def confirm(self, mac: str, device_type: DeviceType, action: str, success: bool) -> float | None:
+        """
+        Match a confirmation to its pending command.
+
+        Returns
+        -------
+        float | None
+            Command-to-confirm latency in milliseconds,
+            or None if no matching command was pending.
+        """
+        command = self._pending.get((mac, device_type))
+        if not command or command.action != action:
+            self._unmatched += 1
+            return None
+
+        del self._pending[(mac, device_type)]
+        latency_ms = (time.monotonic() - command.sent_at) * 1000
+
+        self._confirmed += 1
+        self._latency_sum += latency_ms
+        self._buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+        if not command.future.done():
+            command.future.set_result(success)
+        logger.info(
+            f"Command {device_type.name}={action} confirmed by {mac} in {latency_ms:.0f} ms")
+        return latency_ms
+
+    def stats(self) -> dict:
+        """
+        Return the latency histogram and command counters.
+        """
+        histogram = {
+            f"le_{bound}ms": count
+            for bound, count in zip(LATENCY_BUCKETS_MS, self._buckets)
+        }
+        histogram["le_inf"] = self._buckets[-1]
+
+        return {
+            "pending": len(self._pending),
+            "confirmed": self._confirmed,
+            "timeouts": self._timeouts,
+            "superseded": self._superseded,
+            "unmatched_confirms": self._unmatched,
+            "avg_latency_ms": round(self._latency_sum / self._confirmed, 3) if self._confirmed else 0.0,
+            "latency_histogram": histogram,
+        }
+
+    async def _sweep(self):
+        """
+        Periodically expire commands older than the timeout.
+        """
+        interval = min(1.0, self.timeout)
+        while True:
+            await asyncio.sleep(interval)
+            deadline = time.monotonic() - self.timeout
+            expired = [
+                key for key, command in self._pending.items()
+                if command.sent_at < deadline
+            ]
+            for key in expired:
+                command = self._pending.pop(key)
+                self._timeouts += 1
+                if not command.future.done():
+                    command.future.set_result(False)
+                logger.warning(
+                    f"Command {key[1].name}={command.action} to {key[0]} was not confirmed")
+
+
+command_tracker = CommandTracker()
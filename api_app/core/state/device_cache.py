@@ -0,0 +1,337 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Set
+
+from core.config import CONFIG
+from core.db_context import async_session_maker
+from repos.devices import DeviceRepository
+from common_db.enums import DeviceType
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "device_cache:invalidate"
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceRoute:
+    """
+    Compact description of a device needed to process its MQTT messages.
+    """
+    device_id: int
+    esp_id: int
+    garden_id: int | None
+    user_id: int | None
+    agent_id: int | None
+
+
+@dataclass(slots=True)
+class _EspEntry:
+    """
+    Cached routes of all devices attached to a single ESP.
+    """
+    esp_id: int | None
+    garden_id: int | None
+    routes: Dict[DeviceType, DeviceRoute]
+    loaded_at: float
+
+
+# Entry returned for MACs of no registered ESP; never stored or changed.
+_UNKNOWN = _EspEntry(None, None, {}, 0.0)
+
+
+class DeviceCache:
+    """
+    Process-local cache resolving ``(mac, DeviceType)`` to a :class:`DeviceRoute`.
+
+    Filled in bulk at startup and lazily per MAC on a miss. Unknown MACs are
+    remembered in a separate LRU of at most ``max_unknown`` MACs, so
+    repeated messages from unregistered ESPs do not hit the database
+    either, while clients publishing with random MACs cannot grow the
+    cache without bound.
+
+    With ``CONFIG.DEVICE_CACHE_REDIS`` set, invalidations are broadcast over
+    Redis pub/sub to the caches of all API replicas and ingest workers, so
+    e.g. a reassigned ESP is routed to its new garden everywhere right away.
+    A process that loses the Redis connection drops its whole cache once
+    reconnected. Entries also expire after ``ttl`` seconds, which without
+    Redis bounds how long other processes use a stale route.
+    """
+
+    def __init__(
+        self,
+        ttl: float = CONFIG.DEVICE_CACHE_TTL,
+        use_redis: bool = CONFIG.DEVICE_CACHE_REDIS,
+        max_unknown: int = CONFIG.DEVICE_CACHE_MAX_UNKNOWN,
+    ):
+        """
+        Initialize an empty cache.
+
+        Parameters
+        ----------
+        ttl : float
+            Lifetime of a cached ESP entry in seconds.
+        use_redis : bool
+            Whether to broadcast invalidations over Redis. Ignored if the
+            ``redis`` package is not installed.
+        max_unknown : int
+            Maximum number of unregistered MACs remembered.
+        """
+        self.ttl = ttl
+        self.max_unknown = max_unknown
+        self.use_redis = use_redis and aioredis is not None
+        self._entries: Dict[str, _EspEntry] = {}
+        # MAC -> time of the lookup that found no such ESP, oldest first
+        self._unknown: OrderedDict[str, float] = OrderedDict()
+        self._esp_macs: Dict[int, str] = {}
+        self._garden_macs: Dict[int, Set[str]] = defaultdict(set)
+        self._redis = None
+        self._task: asyncio.Task | None = None
+        self._publishing: Set[asyncio.Task] = set()
+        self._received = 0
+        self._redis_errors = 0
+
+    async def start(self):
+        """
+        Connect to Redis and listen for invalidations of other processes,
+        if enabled.
+        """
+        if self.use_redis and self._redis is None:
+            self._redis = aioredis.Redis(
+                host=CONFIG.REDIS_HOST, port=int(CONFIG.REDIS_PORT))
+            self._task = asyncio.create_task(self._listen())
+            logger.info("Device cache invalidations broadcast over Redis")
+
+    async def stop(self):
+        """
+        Stop listening and close the Redis connection.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._publishing:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def load_all(self):
+        """
+        Load routes of all registered ESP devices in a single query.
+        """
+        async with async_session_maker() as session:
+            rows = await DeviceRepository(session).get_routes()
+
+        self._clear()
+        self._store(rows)
+        logger.info(f"Device cache loaded for {len(self._entries)} ESPs")
+
+    async def get(self, mac: str, device_type: DeviceType) -> DeviceRoute | None:
+        """
+        Resolve a device of the given type on the ESP with the given MAC.
+
+        Returns
+        -------
+        DeviceRoute | None
+            Routing data of the device, or None if no such device exists.
+        """
+        entry = await self._entry(mac)
+        return entry.routes.get(device_type)
+
+    async def get_esp_id(self, mac: str) -> int | None:
+        """
+        Return the ID of the registered ESP with the given MAC, or None.
+        """
+        entry = await self._entry(mac)
+        return entry.esp_id
+
+    def invalidate(self, mac: str):
+        """
+        Drop the cached entry of an ESP, e.g. after it was (un)assigned or reset.
+        """
+        self._drop(mac)
+        self._broadcast({"mac": mac})
+
+    def invalidate_esp(self, esp_id: int):
+        """
+        Drop the cached entry of an ESP identified by its ID.
+        """
+        self._drop_esp(esp_id)
+        self._broadcast({"esp_id": esp_id})
+
+    def invalidate_garden(self, garden_id: int):
+        """
+        Drop cached entries of all ESPs assigned to a garden,
+        e.g. after the garden was deleted or its agent changed.
+        """
+        self._drop_garden(garden_id)
+        self._broadcast({"garden_id": garden_id})
+
+    def stats(self) -> dict:
+        """
+        Return the number of cached ESPs and devices and the invalidation
+        counters.
+        """
+        return {
+            "esps": len(self._entries),
+            "devices": sum(len(e.routes) for e in self._entries.values()),
+            "unknown_macs": len(self._unknown),
+            "invalidations_received": self._received,
+            "redis_errors": self._redis_errors,
+        }
+
+    def _drop(self, mac: str):
+        """
+        Drop the cached entry of an ESP in this process.
+        """
+        self._unknown.pop(mac, None)
+        entry = self._entries.pop(mac, None)
+        if entry:
+            self._esp_macs.pop(entry.esp_id, None)
+            if entry.garden_id is not None:
+                self._garden_macs[entry.garden_id].discard(mac)
+
+    def _clear(self):
+        self._entries.clear()
+        self._esp_macs.clear()
+        self._garden_macs.clear()
+        self._unknown.clear()
+
+    def _drop_esp(self, esp_id: int):
+        mac = self._esp_macs.get(esp_id)
+        if mac:
+            self._drop(mac)
+
+    def _drop_garden(self, garden_id: int):
+        for mac in list(self._garden_macs.pop(garden_id, ())):
+            self._drop(mac)
+
+    def _broadcast(self, message: dict):
+        """
+        Publish an invalidation to the other processes, in the background.
+        """
+        if self._redis is None:
+            return
+        task = asyncio.create_task(self._publish(message))
+        self._publishing.add(task)
+        task.add_done_callback(self._publishing.discard)
+
+    async def _publish(self, message: dict):
+        try:
+            await self._redis.publish(INVALIDATION_CHANNEL, json.dumps(message))
+        except Exception as e:
+            self._redis_errors += 1
+            logger.warning(f"Could not broadcast device cache invalidation: {e}")
+
+    def _apply(self, message: dict):
+        """
+        Apply an invalidation received from another process.
+        """
+        self._received += 1
+        if "mac" in message:
+            self._drop(message["mac"])
+        elif "esp_id" in message:
+            self._drop_esp(message["esp_id"])
+        elif "garden_id" in message:
+            self._drop_garden(message["garden_id"])
+
+    async def _listen(self):
+        """
+        Apply invalidations broadcast by other processes, resubscribing
+        after connection errors.
+        """
+        delay = 1.0
+        connected_before = False
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    if connected_before:
+                        # invalidations may have been missed meanwhile
+                        self._clear()
+                        logger.warning("Device cache dropped after Redis reconnect")
+                    connected_before = True
+                    delay = 1.0
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._apply(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._redis_errors += 1
+                logger.warning(
+                    f"Device cache invalidation listener failed: {e}. "
+                    f"Retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _entry(self, mac: str) -> _EspEntry:
+        """
+        Return the cached entry of an ESP, loading it if missing or expired.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(mac)
+        if entry is not None and now - entry.loaded_at <= self.ttl:
+            return entry
+
+        missed_at = self._unknown.get(mac)
+        if missed_at is not None and now - missed_at <= self.ttl:
+            self._unknown.move_to_end(mac)
+            return _UNKNOWN
+        return await self._load_mac(mac)
+
+    async def _load_mac(self, mac: str) -> _EspEntry:
+        """
+        Load routes of a single ESP from the database.
+        """
+        async with async_session_maker() as session:
+            rows = await DeviceRepository(session).get_routes(mac)
+
+        self._drop(mac)
+        self._store(rows)
+
+        entry = self._entries.get(mac)
+        if entry is None:
+            self._unknown[mac] = time.monotonic()
+            while len(self._unknown) > self.max_unknown:
+                self._unknown.popitem(last=False)
+            entry = _UNKNOWN
+        return entry
+
+    def _store(self, rows: Iterable):
+        """
+        Add flat route rows, as returned by :meth:`DeviceRepository.get_routes`.
+        """
+        now = time.monotonic()
+        for row in rows:
+            entry = self._entries.get(row.mac)
+            if entry is None:
+                entry = _EspEntry(row.esp_id, row.garden_id, {}, now)
+                self._entries[row.mac] = entry
+                self._esp_macs[row.esp_id] = row.mac
+                if row.garden_id is not None:
+                    self._garden_macs[row.garden_id].add(row.mac)
+
+            if row.device_id is not None:
+                entry.routes[row.type] = DeviceRoute(
+                    device_id=row.device_id,
+                    esp_id=row.esp_id,
+                    garden_id=row.garden_id,
+                    user_id=row.user_id,
+                    agent_id=row.agent_id,
+                )
+
+
+device_cache = DeviceCache()
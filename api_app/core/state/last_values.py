@@ -0,0 +1,217 @@
+import logging
+import time
+from typing import Dict, Iterable
+
+from core.config import CONFIG
+from models.dtos.readings import ReadingDTO
+from common_db.enums import DeviceType
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Replaces the value of each key unless it already holds a newer reading.
+# ARGV holds the TTL, then a timestamp and a value per key.
+_PUT_IF_NEWER = """
+for i, key in ipairs(KEYS) do
+    local new_ts = ARGV[2 * i]
+    local ts = redis.call('HGET', key, 'ts')
+    if not ts or tonumber(ts) <= tonumber(new_ts) then
+        redis.call('HSET', key, 'ts', new_ts, 'v', ARGV[2 * i + 1])
+    end
+    redis.call('EXPIRE', key, ARGV[1])
+end
+"""
+
+
+class LastValueStore:
+    """
+    Store of the latest reading per device and per (garden, DeviceType).
+
+    Kept in process memory and, if ``CONFIG.LAST_VALUE_REDIS`` is set,
+    written through to Redis and read from it, so all API replicas and
+    ingest workers agree. A reading only replaces a stored one if it is
+    not older, so out-of-order batches and concurrent writers cannot move
+    a value back in time. Entries expire after ``ttl`` seconds, which
+    also bounds how long a value survives a device being reassigned.
+
+    Without Redis the store is only enabled if this process ingests all
+    readings itself, i.e. with ``CONFIG.MQTT_INGEST_IN_API`` set and
+    without shared subscriptions. Otherwise it would keep serving values
+    that another process has since superseded, so it stays empty and all
+    lookups go to the database.
+    """
+
+    def __init__(
+        self,
+        use_redis: bool = CONFIG.LAST_VALUE_REDIS,
+        ttl: float = CONFIG.LAST_VALUE_TTL,
+    ):
+        """
+        Initialize an empty store.
+
+        Parameters
+        ----------
+        use_redis : bool
+            Whether to back the store with Redis. Ignored if the
+            ``redis`` package is not installed.
+        ttl : float
+            Lifetime of an entry in seconds.
+        """
+        self.use_redis = use_redis and aioredis is not None
+        self.enabled = self.use_redis or (
+            CONFIG.MQTT_INGEST_IN_API and not CONFIG.MQTT_SHARED_SUBSCRIPTION)
+        self.ttl = ttl
+        self._redis = None
+        self._put_script = None
+        self._local: Dict[str, tuple[float, ReadingDTO]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._redis_errors = 0
+
+    async def start(self):
+        """
+        Connect to Redis, if enabled.
+        """
+        if self.use_redis and self._redis is None:
+            self._redis = aioredis.Redis(
+                host=CONFIG.REDIS_HOST, port=int(CONFIG.REDIS_PORT))
+            self._put_script = self._redis.register_script(_PUT_IF_NEWER)
+            logger.info("Last-value store backed by Redis")
+
+    async def stop(self):
+        """
+        Close the Redis connection.
+        """
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def update(self, entries: Iterable[tuple[int | None, DeviceType, ReadingDTO]]):
+        """
+        Record new readings.
+
+        Parameters
+        ----------
+        entries : Iterable[tuple[int | None, DeviceType, ReadingDTO]]
+            Garden ID (None for unassigned ESPs), device type and reading.
+        """
+        if not self.enabled:
+            return
+
+        newest: Dict[str, ReadingDTO] = {}
+        for garden_id, device_type, reading in entries:
+            keys = [self._device_key(reading.device_id)]
+            if garden_id is not None:
+                keys.append(self._garden_key(garden_id, device_type))
+            for key in keys:
+                current = newest.get(key)
+                if current is None or current.timestamp <= reading.timestamp:
+                    newest[key] = reading
+
+        expires = time.monotonic() + self.ttl
+        for key, reading in newest.items():
+            current = self._local.get(key)
+            if current is None or current[1].timestamp <= reading.timestamp:
+                self._local[key] = (expires, reading)
+
+        if self._redis is not None:
+            args = [int(self.ttl)]
+            for reading in newest.values():
+                args += [reading.timestamp.timestamp(), reading.model_dump_json()]
+            try:
+                await self._put_script(keys=list(newest), args=args)
+            except Exception as e:
+                self._redis_errors += 1
+                logger.warning(f"Could not write last values to Redis: {e}")
+
+    async def get_for_device(self, device_id: int) -> ReadingDTO | None:
+        """
+        Return the latest reading of a device, or None if not known.
+        """
+        return await self._get(self._device_key(device_id))
+
+    async def get_for_garden(self, garden_id: int, type: DeviceType) -> ReadingDTO | None:
+        """
+        Return the latest reading of a device type in a garden,
+        or None if not known.
+        """
+        return await self._get(self._garden_key(garden_id, type))
+
+    async def invalidate_garden(self, garden_id: int):
+        """
+        Drop the per-type entries of a garden, e.g. after the garden was
+        deleted or an ESP was moved out of it.
+        """
+        keys = [self._garden_key(garden_id, t) for t in DeviceType]
+        for key in keys:
+            self._local.pop(key, None)
+
+        if self._redis is not None:
+            try:
+                await self._redis.delete(*keys)
+            except Exception as e:
+                self._redis_errors += 1
+                logger.warning(f"Could not invalidate last values in Redis: {e}")
+
+    def stats(self) -> dict:
+        """
+        Return entry counts and hit/miss counters.
+        """
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if self._redis is not None else "memory",
+            "local_entries": len(self._local),
+            "hits": self._hits,
+            "misses": self._misses,
+            "redis_errors": self._redis_errors,
+        }
+
+    async def _get(self, key: str) -> ReadingDTO | None:
+        """
+        Look up a key in Redis if enabled, otherwise in process memory.
+        Redis errors count as a miss, since the local copy may be behind
+        other replicas.
+        """
+        if not self.enabled:
+            return None
+
+        reading = None
+        if self._redis is not None:
+            try:
+                data = await self._redis.hget(key, "v")
+                reading = ReadingDTO.model_validate_json(data) if data else None
+            except Exception as e:
+                self._redis_errors += 1
+                logger.warning(f"Could not read last value from Redis: {e}")
+        else:
+            reading = self._get_local(key)
+
+        if reading is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return reading
+
+    def _get_local(self, key: str) -> ReadingDTO | None:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._local[key]
+            return None
+        return entry[1]
+
+    @staticmethod
+    def _device_key(device_id: int) -> str:
+        return f"last_value:device:{device_id}"
+
+    @staticmethod
+    def _garden_key(garden_id: int, type: DeviceType) -> str:
+        return f"last_value:garden:{garden_id}:{type.value}"
+
+
+last_values = LastValueStore()
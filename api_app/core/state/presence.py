@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict
+
+from core.config import CONFIG
+from core.db_context import async_session_maker
+from core.state.device_cache import device_cache
+from models.dtos.admin import EspPresenceDTO, FleetPresenceDTO
+from repos.esp_devices import EspDeviceRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Presence:
+    """
+    Last known state of a single ESP device.
+    """
+    online: bool
+    last_seen: float | None
+
+
+class PresenceTable:
+    """
+    In-memory presence table of ESP devices.
+
+    Stores the online state and last-seen time per MAC. Heartbeats only
+    touch memory; ``EspDeviceDb.status`` is written only when a device
+    goes online or offline. A background sweeper marks devices offline
+    after ``offline_after`` seconds without a heartbeat. Only registered
+    ESPs are tracked, and the memory state changes only after the write
+    succeeded, so a failed write is retried by the next heartbeat or sweep.
+    """
+
+    def __init__(
+        self,
+        offline_after: float = CONFIG.PRESENCE_OFFLINE_AFTER,
+        sweep_interval: float = CONFIG.PRESENCE_SWEEP_INTERVAL,
+    ):
+        """
+        Initialize an empty presence table.
+
+        Parameters
+        ----------
+        offline_after : float
+            Seconds of silence after which a device is considered offline.
+        sweep_interval : float
+            Seconds between two runs of the offline sweeper.
+        """
+        self.offline_after = offline_after
+        self.sweep_interval = sweep_interval
+        self._devices: Dict[str, _Presence] = {}
+        self._task: asyncio.Task | None = None
+        self._writes = 0
+
+    async def load(self):
+        """
+        Load the stored status of all ESP devices.
+
+        Devices stored as online are treated as just seen, so they are
+        swept offline if they stay silent after startup.
+        """
+        async with async_session_maker() as session:
+            rows = await EspDeviceRepository(session).get_all_statuses()
+
+        now = time.monotonic()
+        self._devices = {
+            mac: _Presence(status, now if status else None)
+            for mac, status in rows
+        }
+        logger.info(f"Presence table loaded for {len(self._devices)} ESPs")
+
+    async def start(self):
+        """
+        Start the background offline sweeper.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        """
+        Stop the background offline sweeper.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def heartbeat(self, mac: str, online: bool) -> bool:
+        """
+        Record a status message of an ESP device.
+
+        Parameters
+        ----------
+        mac : str
+            MAC address of the ESP device.
+        online : bool
+            Reported state; ``False`` is sent e.g. as the last will message.
+
+        Returns
+        -------
+        bool
+            True if the state changed and was written to the database.
+            False also for MACs of unregistered ESPs, which are not tracked.
+        """
+        presence = self._devices.get(mac)
+        now = time.monotonic()
+
+        if presence is None:
+            if await device_cache.get_esp_id(mac) is None:
+                logger.warning(f"Status of unregistered ESP {mac} ignored")
+                return False
+            presence = _Presence(not online, None)
+            self._devices[mac] = presence
+
+        if online:
+            presence.last_seen = now
+
+        if presence.online == online:
+            return False
+
+        await self._write([mac], online)
+        presence.online = online
+        return True
+
+    def is_online(self, mac: str) -> bool | None:
+        """
+        Return the known online state of a device, or None if unknown.
+        """
+        presence = self._devices.get(mac)
+        return presence.online if presence else None
+
+    def summary(self) -> FleetPresenceDTO:
+        """
+        Build a fleet-wide presence summary from memory.
+        """
+        now_wall = datetime.utcnow()
+        now = time.monotonic()
+
+        devices = [
+            EspPresenceDTO(
+                mac=mac,
+                online=p.online,
+                last_seen=(
+                    now_wall - timedelta(seconds=now - p.last_seen)
+                    if p.last_seen is not None else None
+                ),
+            )
+            for mac, p in sorted(self._devices.items())
+        ]
+        online = sum(1 for d in devices if d.online)
+
+        return FleetPresenceDTO(
+            total=len(devices),
+            online=online,
+            offline=len(devices) - online,
+            devices=devices,
+        )
+
+    def stats(self) -> dict:
+        """
+        Return presence counters.
+        """
+        online = sum(1 for p in self._devices.values() if p.online)
+        return {
+            "tracked": len(self._devices),
+            "online": online,
+            "status_writes": self._writes,
+        }
+
+    async def _write(self, macs: list[str], online: bool):
+        """
+        Persist a state transition of one or more devices.
+        """
+        async with async_session_maker() as session:
+            await EspDeviceRepository(session).set_status_by_macs(macs, online)
+        self._writes += 1
+        logger.info(
+            f"ESP {', '.join(macs)} status updated to {online}")
+
+    async def _sweep(self):
+        """
+        Periodically mark silent devices offline.
+        """
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+
+            deadline = time.monotonic() - self.offline_after
+            silent = [
+                mac for mac, p in self._devices.items()
+                if p.online and (p.last_seen is None or p.last_seen < deadline)
+            ]
+            if not silent:
+                continue
+
+            try:
+                await self._write(silent, False)
+            except Exception as e:
+                logger.error(f"Could not mark silent ESPs offline: {e}")
+                continue
+            for mac in silent:
+                self._devices[mac].online = False
+
+
+presence_table = PresenceTable()
@@ -1,5 +1,12 @@
 import asyncio
 from core.db_context import create_async_tables
+from core.ingest.partitions import maintain_reading_partitions
+
+
+async def main():
+    await create_async_tables()
+    await maintain_reading_partitions()
+
 
 if __name__ == "__main__":
-    asyncio.run(create_async_tables())
+    asyncio.run(main())
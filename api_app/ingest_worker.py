@@ -0,0 +1,139 @@
+"""
+Standalone MQTT ingest worker.
+
+Runs the reading, connection and actuator state handlers outside of the
+FastAPI process, so storing readings does not compete with HTTP requests
+for one event loop.
+The work can be spread over several processes, each owning a hash
+partition of ESP MACs::
+
+    python ingest_worker.py --processes 4
+
+Run the API with ``MQTT_INGEST_IN_API=false`` next to it, so readings are
+not stored twice.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+import colorlog
+
+from controllers.mqtt_handlers import subscribe_ingest_topics
+from core.ingest.reading_buffer import reading_buffer
+from core.mqtt.mqtt_subscriber import MqttTopicSubscriber
+from core.state.device_cache import device_cache
+from core.state.last_values import last_values
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(index: int):
+    """
+    Configure colored logging tagged with the worker index.
+    """
+    formatter = colorlog.ColoredFormatter(
+        f"%(log_color)s%(asctime)s - ingest[{index}] - %(name)s - "
+        "%(levelname)s - %(message)s",
+    )
+    handler = logging.StreamHandler()
+    handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers = [handler]
+    logging.getLogger("sqlalchemy").disabled = True
+
+
+async def run_worker(index: int, count: int):
+    """
+    Consume and store the MQTT messages of one MAC partition.
+
+    Parameters
+    ----------
+    index : int
+        Partition owned by this process.
+    count : int
+        Total number of ingest processes.
+    """
+    await last_values.start()
+    await reading_buffer.start(journal_name=f"ingest-{index}")
+    await device_cache.start()
+    try:
+        await device_cache.load_all()
+    except Exception as e:
+        logger.error(f"Could not preload device cache: {e}")
+
+    subscriber = MqttTopicSubscriber()
+    subscriber.set_partition(index, count)
+    task = asyncio.create_task(subscriber.start())
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task.cancel)
+
+    # Short delay to ensure the subscriber is running before subscribing
+    await asyncio.sleep(1)
+    await subscribe_ingest_topics()
+    logger.info(f"Ingest worker {index + 1}/{count} started")
+
+    try:
+        await task
+    except asyncio.CancelledError:
+        logger.info("MQTT subscriber cancelled.")
+    finally:
+        logger.info("Flushing pending readings...")
+        await reading_buffer.stop()
+        await last_values.stop()
+        await device_cache.stop()
+
+
+def run_process(index: int, count: int):
+    """
+    Entry point of a single worker process.
+    """
+    configure_logging(index)
+    asyncio.run(run_worker(index, count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--processes", type=int, default=1,
+        help="number of ingest processes, each owning a partition of MACs")
+    args = parser.parse_args()
+
+    if args.processes < 1:
+        parser.error("--processes must be at least 1")
+
+    if args.processes == 1:
+        run_process(0, 1)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=run_process, args=(i, args.processes), name=f"ingest-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    # children get their own SIGTERM from the handler below and flush on exit
+    def terminate(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Ctrl+C is delivered to the whole process group already
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Rollup"],
 )
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
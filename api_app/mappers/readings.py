@@ -1,5 +1,6 @@
 from common_db.db import ReadingDb
 from models.dtos.readings import ReadingDTO
+from repos.readings import ReadingRow
 
 
 def db_to_dto(reading: ReadingDb) -> ReadingDTO:
@@ -10,6 +11,21 @@ def db_to_dto(reading: ReadingDb) -> ReadingDTO:
         id=reading.id,
         device_id=reading.device_id,
         value=reading.value,
+        numeric_value=reading.numeric_value,
         timestamp=reading.timestamp,
         esp_id=reading.device.esp.id,
     )
+
+
+def row_to_dto(row: ReadingRow) -> ReadingDTO:
+    """
+    Convert a ReadingRow column tuple to a ReadingDTO.
+    """
+    return ReadingDTO(
+        id=row.id,
+        device_id=row.device_id,
+        value=row.value,
+        numeric_value=row.numeric_value,
+        timestamp=row.timestamp,
+        esp_id=row.esp_id,
+    )
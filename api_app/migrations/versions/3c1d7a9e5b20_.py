@@ -0,0 +1,33 @@
+"""add readings ingest key
+
+Revision ID: 3c1d7a9e5b20
+Revises: 01df2f8f9c4f
+Create Date: 2026-10-18 09:12:31.204117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1d7a9e5b20"
+down_revision: Union[str, None] = "01df2f8f9c4f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "readings", sa.Column("ingest_key", sa.String(length=32), nullable=True))
+    op.create_unique_constraint(
+        "readings_ingest_key_key", "readings", ["ingest_key"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("readings_ingest_key_key", "readings", type_="unique")
+    op.drop_column("readings", "ingest_key")
@@ -0,0 +1,57 @@
+"""add readings numeric value
+
+Revision ID: 7e2b94c0d1a6
+Revises: 3c1d7a9e5b20
+Create Date: 2026-10-18 10:02:47.551930
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7e2b94c0d1a6"
+down_revision: Union[str, None] = "3c1d7a9e5b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 50_000
+NUMERIC_PATTERN = r"^\s*[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d{1,2})?\s*$"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "readings", sa.Column("numeric_value", sa.Float(), nullable=True))
+
+    # Backfill in id ranges, committing each batch, so the table is never
+    # locked or rewritten as a whole. Non-numeric values stay NULL.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(
+            sa.text("SELECT min(id), max(id) FROM readings")).one()
+        if low is None:
+            return
+
+        for start in range(low, high + 1, BACKFILL_BATCH):
+            bind.execute(
+                sa.text(
+                    "UPDATE readings "
+                    "SET numeric_value = CAST(value AS double precision) "
+                    "WHERE id >= :start AND id < :end "
+                    "AND numeric_value IS NULL AND value ~ :pattern"
+                ),
+                {
+                    "start": start,
+                    "end": start + BACKFILL_BATCH,
+                    "pattern": NUMERIC_PATTERN,
+                },
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("readings", "numeric_value")
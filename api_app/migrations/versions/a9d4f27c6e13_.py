@@ -0,0 +1,135 @@
+"""partition readings by month
+
+Revision ID: a9d4f27c6e13
+Revises: e1b7d3a9c4f6
+Create Date: 2026-10-18 15:12:44.870352
+
+"""
+
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a9d4f27c6e13"
+down_revision: Union[str, None] = "e1b7d3a9c4f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 2
+COLUMNS = (
+    "id, device_id, value, numeric_value, timestamp, ingest_key, "
+    "created_at, updated_at"
+)
+
+
+def month_start(ts: datetime, months: int = 0) -> datetime:
+    index = ts.year * 12 + ts.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def reading_columns() -> list:
+    return [
+        sa.Column(
+            "id", sa.Integer(), nullable=False,
+            server_default=sa.text("nextval('readings_id_seq'::regclass)")),
+        sa.Column("device_id", sa.Integer(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("numeric_value", sa.Float(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("ingest_key", sa.String(length=32), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["device_id"], ["devices.id"], ondelete="CASCADE"),
+    ]
+
+
+def move_table_aside():
+    """
+    Rename the current readings table and free the names of its
+    constraints and indexes, keeping the id sequence.
+    """
+    op.execute("ALTER SEQUENCE readings_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE readings RENAME TO readings_old")
+    op.execute("ALTER TABLE readings_old ALTER COLUMN id DROP DEFAULT")
+    op.execute("DROP INDEX IF EXISTS ix_readings_device_id_timestamp")
+    op.execute(
+        "ALTER TABLE readings_old DROP CONSTRAINT IF EXISTS readings_ingest_key_key")
+    op.execute(
+        "ALTER TABLE readings_old "
+        "DROP CONSTRAINT IF EXISTS readings_ingest_key_timestamp_key")
+    op.execute(
+        "ALTER TABLE readings_old RENAME CONSTRAINT readings_pkey TO readings_old_pkey")
+
+
+def create_month_partitions():
+    """
+    Create monthly partitions from the oldest reading up to
+    PARTITIONS_AHEAD months from now, and the default partition.
+    """
+    oldest = op.get_bind().execute(
+        sa.text("SELECT min(timestamp) FROM readings_old")).scalar()
+    now = datetime.utcnow()
+    month = month_start(oldest or now)
+    while month <= month_start(now, PARTITIONS_AHEAD):
+        op.execute(
+            f"CREATE TABLE readings_p{month:%Y%m} PARTITION OF readings "
+            f"FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{month_start(month, 1).isoformat()}')"
+        )
+        month = month_start(month, 1)
+    op.execute("CREATE TABLE readings_default PARTITION OF readings DEFAULT")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    move_table_aside()
+
+    op.create_table(
+        "readings",
+        *reading_columns(),
+        sa.PrimaryKeyConstraint("id", "timestamp"),
+        sa.UniqueConstraint("ingest_key", "timestamp"),
+        postgresql_partition_by="RANGE (timestamp)",
+    )
+    op.create_index(
+        "ix_readings_device_id_timestamp",
+        "readings",
+        ["device_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+    )
+    create_month_partitions()
+
+    op.execute(
+        f"INSERT INTO readings ({COLUMNS}) "
+        "SELECT id, device_id, value, numeric_value, "
+        "coalesce(timestamp, created_at, now()), ingest_key, "
+        "coalesce(created_at, now()), coalesce(updated_at, now()) "
+        "FROM readings_old"
+    )
+    op.execute("ALTER SEQUENCE readings_id_seq OWNED BY readings.id")
+    op.drop_table("readings_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    move_table_aside()
+
+    op.create_table(
+        "readings",
+        *reading_columns(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(f"INSERT INTO readings ({COLUMNS}) SELECT {COLUMNS} FROM readings_old")
+    op.create_unique_constraint(
+        "readings_ingest_key_key", "readings", ["ingest_key"])
+    op.create_index(
+        "ix_readings_device_id_timestamp",
+        "readings",
+        ["device_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+    )
+    op.execute("ALTER SEQUENCE readings_id_seq OWNED BY readings.id")
+    op.drop_table("readings_old")
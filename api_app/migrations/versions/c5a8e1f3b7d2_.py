@@ -0,0 +1,53 @@
+"""add time-series indexes for readings
+
+Revision ID: c5a8e1f3b7d2
+Revises: 7e2b94c0d1a6
+Create Date: 2026-10-18 10:41:05.118264
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5a8e1f3b7d2"
+down_revision: Union[str, None] = "7e2b94c0d1a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # built concurrently, so ingest keeps writing while the indexes are created
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_readings_device_id_timestamp",
+            "readings",
+            ["device_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_devices_esp_id_type",
+            "devices",
+            ["esp_id", "type"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_esp_devices_garden_id",
+            "esp_devices",
+            ["garden_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_esp_devices_garden_id", table_name="esp_devices")
+    op.drop_index("ix_devices_esp_id_type", table_name="devices")
+    op.drop_index("ix_readings_device_id_timestamp", table_name="readings")
@@ -0,0 +1,103 @@
+"""add reading rollups
+
+Revision ID: e1b7d3a9c4f6
+Revises: c5a8e1f3b7d2
+Create Date: 2026-10-18 13:41:09.204117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1b7d3a9c4f6"
+down_revision: Union[str, None] = "c5a8e1f3b7d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 50_000
+RESOLUTIONS = ("minute", "hour", "day")
+
+MERGE = """
+    ON CONFLICT (device_id, bucket_start) DO UPDATE SET
+        count = {table}.count + excluded.count,
+        sum = {table}.sum + excluded.sum,
+        min = least({table}.min, excluded.min),
+        max = greatest({table}.max, excluded.max),
+        last = CASE WHEN excluded.last_timestamp >= {table}.last_timestamp
+                    THEN excluded.last ELSE {table}.last END,
+        last_timestamp = greatest({table}.last_timestamp, excluded.last_timestamp),
+        updated_at = excluded.updated_at
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for resolution in RESOLUTIONS:
+        op.create_table(
+            f"reading_rollups_{resolution}",
+            sa.Column("device_id", sa.Integer(), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("sum", sa.Float(), nullable=False),
+            sa.Column("min", sa.Float(), nullable=False),
+            sa.Column("max", sa.Float(), nullable=False),
+            sa.Column("last", sa.Float(), nullable=False),
+            sa.Column("last_timestamp", sa.DateTime(), nullable=False),
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(
+                ["device_id"], ["devices.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("device_id", "bucket_start"),
+        )
+
+    # Minute rollups are built from readings in id ranges, merging buckets
+    # split across ranges; hour and day rollups are built from minutes.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(
+            sa.text("SELECT min(id), max(id) FROM readings")).one()
+        if low is None:
+            return
+
+        for start in range(low, high + 1, BACKFILL_BATCH):
+            bind.execute(
+                sa.text(
+                    "INSERT INTO reading_rollups_minute (device_id, bucket_start, "
+                    "count, sum, min, max, last, last_timestamp, created_at, updated_at) "
+                    "SELECT device_id, date_trunc('minute', timestamp), "
+                    "count(*), sum(numeric_value), min(numeric_value), max(numeric_value), "
+                    "(array_agg(numeric_value ORDER BY timestamp DESC, id DESC))[1], "
+                    "max(timestamp), now(), now() "
+                    "FROM readings "
+                    "WHERE id >= :start AND id < :end AND numeric_value IS NOT NULL "
+                    "GROUP BY device_id, date_trunc('minute', timestamp)"
+                    + MERGE.format(table="reading_rollups_minute")
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH},
+            )
+
+        for resolution in RESOLUTIONS[1:]:
+            bind.execute(
+                sa.text(
+                    f"INSERT INTO reading_rollups_{resolution} (device_id, bucket_start, "
+                    "count, sum, min, max, last, last_timestamp, created_at, updated_at) "
+                    f"SELECT device_id, date_trunc('{resolution}', bucket_start), "
+                    "sum(count), sum(sum), min(min), max(max), "
+                    "(array_agg(last ORDER BY last_timestamp DESC))[1], "
+                    "max(last_timestamp), now(), now() "
+                    "FROM reading_rollups_minute "
+                    f"GROUP BY device_id, date_trunc('{resolution}', bucket_start)"
+                )
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for resolution in reversed(RESOLUTIONS):
+        op.drop_table(f"reading_rollups_{resolution}")
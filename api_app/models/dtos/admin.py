@@ -1,6 +1,21 @@
+from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
 
 
 class CreateEspDeviceRequest(BaseModel):
     mac: str
     secret: str
+
+
+class EspPresenceDTO(BaseModel):
+    mac: str
+    online: bool
+    last_seen: Optional[datetime]
+
+
+class FleetPresenceDTO(BaseModel):
+    total: int
+    online: int
+    offline: int
+    devices: list[EspPresenceDTO]
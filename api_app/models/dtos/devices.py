@@ -1,7 +1,19 @@
 from pydantic import BaseModel
-from common_db.enums import DeviceType
+from common_db.enums import DeliveryStatus, DeviceType
 
 
 class DeviceDTO(BaseModel):
     id: int
     type: DeviceType
+
+
+class EspControlResultDTO(BaseModel):
+    esp_id: int
+    mac: str
+    status: DeliveryStatus
+
+
+class ControlResultDTO(BaseModel):
+    delivered: bool
+    latency_ms: float
+    results: list[EspControlResultDTO]
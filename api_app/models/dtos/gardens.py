@@ -1,5 +1,8 @@
 from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
+from common_db.enums import DeviceType
+from models.dtos.readings import ReadingDTO
 
 
 class GardenCreateDTO(BaseModel):
@@ -28,3 +31,24 @@ class GardenDTO(BaseModel):
     send_notifications: bool
     enable_automation: bool
     use_fahrenheit: bool
+
+
+class GardenActuatorStateDTO(BaseModel):
+    device_id: int
+    esp_id: int
+    type: DeviceType
+    enabled: Optional[bool]
+
+
+class GardenEspStatusDTO(BaseModel):
+    esp_id: int
+    mac: str
+    online: bool
+
+
+class GardenSnapshotDTO(BaseModel):
+    garden_id: int
+    readings: dict[DeviceType, ReadingDTO]
+    actuators: list[GardenActuatorStateDTO]
+    esp_devices: list[GardenEspStatusDTO]
+    unread_notifications: int
@@ -1,5 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 from pydantic import BaseModel
+from common_db.enums import DeviceType, ResampleMethod
 
 
 class ReadingCreateDTO(BaseModel):
@@ -11,5 +13,36 @@ class ReadingDTO(BaseModel):
     id: int
     device_id: int
     value: str
+    numeric_value: Optional[float] = None
     timestamp: datetime
     esp_id: int
+
+
+class ReadingStatsDTO(BaseModel):
+    device_id: int
+    esp_id: int
+    count: int
+    avg: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+    first_timestamp: datetime
+    last_timestamp: datetime
+
+
+class ReadingAggregateDTO(BaseModel):
+    device_id: int
+    esp_id: int
+    bucket_start: datetime
+    count: int
+    sum: float
+    avg: float
+    min: float
+    max: float
+    last: float
+
+
+class ReadingResampleDTO(BaseModel):
+    step: timedelta
+    method: ResampleMethod
+    timestamps: list[datetime]
+    values: dict[DeviceType, list[Optional[float]]]
@@ -2,9 +2,9 @@ from typing import List
 from models.dtos.esp_device import EspDeviceDTO
 from common_db.enums import DeviceType
 from sqlalchemy.ext.asyncio import AsyncSession
-from common_db.db import DeviceDb, EspDeviceDb, GardenDb
+from common_db.db import AgentDb, DeviceDb, EspDeviceDb, GardenDb
 from .utils.super_repo import SuperRepo
-from sqlalchemy import select
+from sqlalchemy import Row, select
 from sqlalchemy.orm import joinedload
 
 
@@ -77,3 +77,31 @@ class DeviceRepository(SuperRepo[DeviceDb]):
             .options(joinedload(DeviceDb.esp).joinedload(EspDeviceDb.garden))
         )
         return result.scalar_one_or_none()
+
+    async def get_routes(self, mac: str | None = None) -> List[Row]:
+        """
+        Fetch the flat routing data of devices used by the MQTT handlers.
+
+        Returns one row per device with ``mac``, ``esp_id``, ``garden_id``,
+        ``user_id``, ``agent_id``, ``device_id`` and ``type``. ESPs without
+        devices are returned once with ``device_id`` and ``type`` set to None.
+        Limited to a single ESP when ``mac`` is given.
+        """
+        stmt = (
+            select(
+                EspDeviceDb.mac,
+                EspDeviceDb.id.label("esp_id"),
+                EspDeviceDb.garden_id,
+                EspDeviceDb.user_id,
+                AgentDb.id.label("agent_id"),
+                DeviceDb.id.label("device_id"),
+                DeviceDb.type,
+            )
+            .outerjoin(DeviceDb, DeviceDb.esp_id == EspDeviceDb.id)
+            .outerjoin(AgentDb, AgentDb.garden_id == EspDeviceDb.garden_id)
+        )
+        if mac is not None:
+            stmt = stmt.where(EspDeviceDb.mac == mac)
+
+        result = await self.db.execute(stmt)
+        return result.all()
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from common_db.db import EspDeviceDb
 from repos.utils.super_repo import SuperRepo
 from typing import List, Optional
@@ -45,6 +45,32 @@ class EspDeviceRepository(SuperRepo[EspDeviceDb]):
         )
         return result.scalar_one_or_none()
 
+    async def get_all_statuses(self) -> List[tuple[str, bool]]:
+        """
+        Fetch the MAC and online status of every ESP device.
+        """
+        result = await self.db.execute(
+            select(EspDeviceDb.mac, EspDeviceDb.status)
+        )
+        return result.all()
+
+    async def set_status_by_macs(self, macs: List[str], status: bool) -> int:
+        """
+        Set the online status of ESP devices identified by MAC
+        in a single UPDATE. Returns the number of updated rows.
+        """
+        if not macs:
+            return 0
+
+        result = await self.db.execute(
+            update(EspDeviceDb)
+            .where(EspDeviceDb.mac.in_(macs))
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+
     async def get_by_garden_id(self, garden_id: int) -> List[EspDeviceDb]:
         """
         Fetch all ESP devices linked to a specific garden.
@@ -1,8 +1,8 @@
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from common_db.db import GardenDb
+from common_db.db import DeviceDb, EspDeviceDb, GardenDb
 from .utils.super_repo import SuperRepo
-from sqlalchemy import select
+from sqlalchemy import Row, select
 
 
 class GardenRepository(SuperRepo[GardenDb]):
@@ -34,3 +34,26 @@ class GardenRepository(SuperRepo[GardenDb]):
             )
         )
         return result.scalars().first()
+
+    async def get_devices_with_esp(self, garden_id: int) -> List[Row]:
+        """
+        Fetch all devices of a garden together with their ESP in one query.
+        Returns (esp_id, mac, status, device_id, type, enabled) rows ordered
+        by ESP. ESPs without devices are returned once with the device
+        columns set to None.
+        """
+        result = await self.db.execute(
+            select(
+                EspDeviceDb.id.label("esp_id"),
+                EspDeviceDb.mac,
+                EspDeviceDb.status,
+                DeviceDb.id.label("device_id"),
+                DeviceDb.type,
+                DeviceDb.enabled,
+            )
+            .select_from(EspDeviceDb)
+            .outerjoin(DeviceDb, DeviceDb.esp_id == EspDeviceDb.id)
+            .where(EspDeviceDb.garden_id == garden_id)
+            .order_by(EspDeviceDb.id, DeviceDb.id)
+        )
+        return result.all()
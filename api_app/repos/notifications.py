@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from typing import List
 
 from common_db.db import NotificationDb
@@ -64,3 +64,14 @@ class NotificationRepository(SuperRepo[NotificationDb]):
             )
         )
         return result.scalars().first()
+
+    async def count_unread(self, user_id: int) -> int:
+        """
+        Count the unread notifications of the given user.
+        """
+        result = await self.db.execute(
+            select(func.count()).select_from(NotificationDb).where(
+                NotificationDb.user_id == user_id, NotificationDb.read.is_(False)
+            )
+        )
+        return result.scalar_one()
@@ -1,31 +1,281 @@
-from typing import List
+from typing import AsyncIterator, Callable, Dict, Iterable, List, NamedTuple, Type
 from sqlalchemy.ext.asyncio import AsyncSession
-from common_db.db import ReadingDb, DeviceDb, EspDeviceDb
+from common_db.db import (
+    ReadingDb,
+    DeviceDb,
+    EspDeviceDb,
+    ReadingRollupDb,
+    ReadingRollupMinuteDb,
+    ReadingRollupHourDb,
+    ReadingRollupDayDb,
+)
 from .utils.super_repo import SuperRepo
-from sqlalchemy import select, and_, desc
-from datetime import datetime
+from sqlalchemy.orm import aliased
+from sqlalchemy import Float, Interval, Row, select, and_, case, delete, desc, func, literal, text, true, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
+from datetime import datetime, timedelta
 from common_db.enums import DeviceType
 
 
+class Rollup(NamedTuple):
+    """
+    A rollup table and the width of its buckets.
+    """
+    name: str
+    model: Type[ReadingRollupDb]
+    width: timedelta
+    truncate: Callable[[datetime], datetime]
+
+
+class ReadingRow(NamedTuple):
+    """
+    Columns of a reading and the ID of its ESP, read without the ORM.
+    """
+    id: int
+    device_id: int
+    value: str
+    numeric_value: float | None
+    timestamp: datetime
+    esp_id: int
+
+
+# Selected instead of ReadingDb entities on the list and export paths,
+# which skips the identity map and the selectin loads of device and ESP.
+READING_COLUMNS = (
+    ReadingDb.id,
+    ReadingDb.device_id,
+    ReadingDb.value,
+    ReadingDb.numeric_value,
+    ReadingDb.timestamp,
+)
+
+# Coarsest first.
+ROLLUPS = (
+    Rollup(
+        "day", ReadingRollupDayDb, timedelta(days=1),
+        lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0)),
+    Rollup(
+        "hour", ReadingRollupHourDb, timedelta(hours=1),
+        lambda ts: ts.replace(minute=0, second=0, microsecond=0)),
+    Rollup(
+        "minute", ReadingRollupMinuteDb, timedelta(minutes=1),
+        lambda ts: ts.replace(second=0, microsecond=0)),
+)
+
+EPOCH = datetime(1970, 1, 1)
+
+DEFAULT_PARTITION = "readings_default"
+
+
+def month_start(ts: datetime, months: int = 0) -> datetime:
+    """
+    Return the first instant of the month of `ts`, shifted by `months`.
+    """
+    index = ts.year * 12 + ts.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    """
+    Return the name of the readings partition of a month, e.g. readings_p202610.
+    """
+    return f"readings_p{month:%Y%m}"
+
+
 class ReadingRepository(SuperRepo[ReadingDb]):
     """
     Repository for managing `ReadingDb` entities.
     Provides queries filtered by garden, device type, and time ranges.
+
+    Garden queries first resolve the ids of the matching devices (a small
+    indexed lookup) and then read `readings` by `device_id` only, so each
+    device is served by a range scan of `ix_readings_device_id_timestamp`
+    instead of a join over the whole table.
+
+    `readings` is partitioned by month on `timestamp`. Queries bound
+    `timestamp` with plain comparisons so the planner can skip partitions
+    outside the range, and rows are addressed by (id, timestamp).
     """
 
     def __init__(self, db: AsyncSession):
         super().__init__(db, ReadingDb)
 
-    async def get_last_for_garden_device_type(
+    async def create(self, **kwargs) -> ReadingDb:
+        """
+        Create and persist a single reading and add it to the rollups
+        in the same transaction.
+        """
+        now = datetime.utcnow()
+        reading = ReadingDb(created_at=now, updated_at=now, **kwargs)
+        self.db.add(reading)
+        await self.db.flush()
+
+        await self.add_to_rollups(
+            [(reading.device_id, reading.numeric_value, reading.timestamp)])
+        await self.db.commit()
+        await self.db.refresh(reading)
+        return reading
+
+    async def create_many(self, rows: List[dict]) -> List[Row]:
+        """
+        Insert many readings in one transaction using a multi-row INSERT.
+        Skips the per-row refresh done by `create`. Rows whose `ingest_key`
+        and `timestamp` already exist are skipped, so replaying a batch is
+        idempotent.
+        Only the rows actually inserted are added to the rollups.
+        Returns the inserted rows as (id, device_id, value, numeric_value,
+        timestamp, ingest_key) tuples.
+        """
+        if not rows:
+            return []
+
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            insert(ReadingDb)
+            .on_conflict_do_nothing(
+                index_elements=[ReadingDb.ingest_key, ReadingDb.timestamp])
+            .returning(
+                ReadingDb.id,
+                ReadingDb.device_id,
+                ReadingDb.value,
+                ReadingDb.numeric_value,
+                ReadingDb.timestamp,
+                ReadingDb.ingest_key,
+            ),
+            [{"created_at": now, "updated_at": now, **row} for row in rows],
+        )
+        inserted = result.all()
+        await self.add_to_rollups(
+            (r.device_id, r.numeric_value, r.timestamp) for r in inserted)
+        await self.db.commit()
+        return inserted
+
+    async def add_to_rollups(self, readings: Iterable[tuple]):
+        """
+        Add readings to the minute, hour and day rollups without committing.
+
+        The readings are aggregated per device and bucket first, so each
+        rollup row is upserted once per call. Rows are written in key
+        order, so concurrent writers lock them in the same order.
+
+        Parameters
+        ----------
+        readings : Iterable[tuple]
+            (device_id, numeric_value, timestamp) tuples. Readings without
+            a numeric value are ignored.
+        """
+        readings = [r for r in readings if r[1] is not None]
+        if not readings:
+            return
+
+        now = datetime.utcnow()
+        for rollup in ROLLUPS:
+            buckets: Dict[tuple, list] = {}
+            for device_id, value, timestamp in readings:
+                key = (device_id, rollup.truncate(timestamp))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = [1, value, value, value, value, timestamp]
+                    continue
+                bucket[0] += 1
+                bucket[1] += value
+                bucket[2] = min(bucket[2], value)
+                bucket[3] = max(bucket[3], value)
+                if timestamp >= bucket[5]:
+                    bucket[4], bucket[5] = value, timestamp
+
+            model = rollup.model
+            stmt = insert(model)
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[model.device_id, model.bucket_start],
+                    set_={
+                        "count": model.count + stmt.excluded.count,
+                        "sum": model.sum + stmt.excluded.sum,
+                        "min": func.least(model.min, stmt.excluded.min),
+                        "max": func.greatest(model.max, stmt.excluded.max),
+                        "last": case(
+                            (stmt.excluded.last_timestamp >= model.last_timestamp,
+                             stmt.excluded.last),
+                            else_=model.last,
+                        ),
+                        "last_timestamp": func.greatest(
+                            model.last_timestamp, stmt.excluded.last_timestamp),
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                ),
+                [
+                    {
+                        "device_id": device_id,
+                        "bucket_start": bucket_start,
+                        "count": count,
+                        "sum": total,
+                        "min": low,
+                        "max": high,
+                        "last": last,
+                        "last_timestamp": last_timestamp,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for (device_id, bucket_start), (
+                        count, total, low, high, last, last_timestamp,
+                    ) in sorted(buckets.items())
+                ],
+            )
+
+    async def rebuild_rollups(self):
+        """
+        Recompute all rollups from the stored readings.
+
+        Used after readings were written without going through this
+        repository, e.g. by bulk imports or mock data.
+        """
+        for rollup in ROLLUPS:
+            model = rollup.model
+            bucket_start = func.date_trunc(rollup.name, ReadingDb.timestamp)
+            now = datetime.utcnow()
+            await self.db.execute(delete(model))
+            await self.db.execute(
+                insert(model).from_select(
+                    [
+                        "device_id", "bucket_start", "count", "sum", "min",
+                        "max", "last", "last_timestamp", "created_at",
+                        "updated_at",
+                    ],
+                    select(
+                        ReadingDb.device_id,
+                        bucket_start,
+                        func.count(),
+                        func.sum(ReadingDb.numeric_value),
+                        func.min(ReadingDb.numeric_value),
+                        func.max(ReadingDb.numeric_value),
+                        func.array_agg(
+                            aggregate_order_by(
+                                ReadingDb.numeric_value,
+                                desc(ReadingDb.timestamp),
+                                desc(ReadingDb.id),
+                            ),
+                            type_=ARRAY(Float),
+                        )[1],
+                        func.max(ReadingDb.timestamp),
+                        literal(now),
+                        literal(now),
+                    )
+                    .where(ReadingDb.numeric_value.is_not(None))
+                    .group_by(ReadingDb.device_id, bucket_start),
+                )
+            )
+        await self.db.commit()
+
+    async def get_devices_for_garden_device_type(
         self, garden_id: int, type: DeviceType
-    ) -> ReadingDb | None:
+    ) -> Dict[int, int]:
         """
-        Fetch the most recent reading for a given garden and device type.
-        Returns None if no reading exists.
+        Resolve all devices of a type in a garden.
+        Returns a mapping of device id to ESP id.
         """
         result = await self.db.execute(
-            select(ReadingDb)
-            .join(DeviceDb, ReadingDb.device_id == DeviceDb.id)
+            select(DeviceDb.id, DeviceDb.esp_id)
             .join(EspDeviceDb, DeviceDb.esp_id == EspDeviceDb.id)
             .where(
                 and_(
@@ -33,11 +283,77 @@ class ReadingRepository(SuperRepo[ReadingDb]):
                     DeviceDb.type == type,
                 )
             )
-            .order_by(desc(ReadingDb.timestamp))
+        )
+        return dict(result.all())
+
+    async def get_last_for_garden_device_type(
+        self, garden_id: int, type: DeviceType
+    ) -> ReadingDb | None:
+        """
+        Fetch the most recent reading for a given garden and device type.
+        Returns None if no reading exists.
+
+        Takes the newest reading of each device with a one-row index scan
+        (LATERAL ... LIMIT 1) and returns the newest of those. Partitions
+        are scanned newest first and the scan stops at the first match.
+        """
+        device_ids = await self.get_devices_for_garden_device_type(garden_id, type)
+        if not device_ids:
+            return None
+
+        latest = (
+            select(ReadingDb)
+            .where(ReadingDb.device_id == DeviceDb.id)
+            .order_by(desc(ReadingDb.timestamp), desc(ReadingDb.id))
+            .limit(1)
+            .correlate(DeviceDb)
+            .lateral()
+        )
+        reading = aliased(ReadingDb, latest)
+        result = await self.db.execute(
+            select(reading)
+            .select_from(DeviceDb)
+            .join(latest, true())
+            .where(DeviceDb.id.in_(device_ids))
+            .order_by(desc(reading.timestamp), desc(reading.id))
             .limit(1)
         )
         return result.scalars().first()
 
+    async def get_last_for_devices(self, device_ids: Iterable[int]) -> List[Row]:
+        """
+        Fetch the most recent reading of each of the given devices in one
+        query, with a one-row index scan per device (LATERAL ... LIMIT 1).
+        Returns (id, device_id, value, numeric_value, timestamp) rows.
+        Devices without readings are left out.
+        """
+        latest = (
+            select(
+                ReadingDb.id,
+                ReadingDb.value,
+                ReadingDb.numeric_value,
+                ReadingDb.timestamp,
+            )
+            .where(ReadingDb.device_id == DeviceDb.id)
+            .order_by(desc(ReadingDb.timestamp), desc(ReadingDb.id))
+            .limit(1)
+            .correlate(DeviceDb)
+            .lateral()
+        )
+        result = await self.db.execute(
+            select(
+                latest.c.id,
+                DeviceDb.id.label("device_id"),
+                latest.c.value,
+                latest.c.numeric_value,
+                latest.c.timestamp,
+            )
+            .select_from(DeviceDb)
+            .join(latest, true())
+            .where(DeviceDb.id.in_(list(device_ids)))
+        )
+        return result.all()
+
     async def get_by_garden_filters_paginated(
         self,
         garden_id: int,
@@ -46,25 +362,235 @@ class ReadingRepository(SuperRepo[ReadingDb]):
         end_time: datetime,
         offset: int,
         limit: int,
-    ) -> List[ReadingDb]:
+        after: tuple[datetime, int] | None = None,
+    ) -> List[ReadingRow]:
         """
         Fetch readings for a given garden and device type within a time range,
         ordered by newest first, with pagination (offset + limit).
+        If `after` is given as a (timestamp, id) position, only readings
+        ordered after it are returned, which seeks in the index instead of
+        skipping `offset` rows.
+        Only plain columns are selected; the ESP IDs are taken from the
+        device lookup done first.
         """
+        device_ids = await self.get_devices_for_garden_device_type(garden_id, type)
+        if not device_ids:
+            return []
+
+        conditions = [
+            ReadingDb.device_id.in_(device_ids),
+            ReadingDb.timestamp >= start_time,
+            ReadingDb.timestamp <= end_time,
+        ]
+        if after is not None:
+            # The plain bound lets the planner prune later partitions,
+            # which it cannot do from the row comparison.
+            conditions.append(ReadingDb.timestamp <= after[0])
+            conditions.append(
+                tuple_(ReadingDb.timestamp, ReadingDb.id) < tuple_(*after))
+
         result = await self.db.execute(
-            select(ReadingDb)
-            .join(DeviceDb, ReadingDb.device_id == DeviceDb.id)
-            .join(EspDeviceDb, DeviceDb.esp_id == EspDeviceDb.id)
+            select(*READING_COLUMNS)
+            .where(and_(*conditions))
+            .order_by(desc(ReadingDb.timestamp), desc(ReadingDb.id))
+            .offset(offset)
+            .limit(limit)
+        )
+        return [ReadingRow(*row, device_ids[row.device_id]) for row in result.all()]
+
+    async def stream_for_device(
+        self,
+        device_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        batch_size: int,
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Stream the readings of a device within a time range, oldest first,
+        in batches of at most `batch_size` rows fetched from a server-side
+        cursor. Returns (id, device_id, value, numeric_value, timestamp)
+        rows rather than ORM entities.
+        """
+        result = await self.db.stream(
+            select(*READING_COLUMNS)
             .where(
                 and_(
-                    EspDeviceDb.garden_id == garden_id,
-                    DeviceDb.type == type,
+                    ReadingDb.device_id == device_id,
                     ReadingDb.timestamp >= start_time,
                     ReadingDb.timestamp <= end_time,
                 )
             )
-            .order_by(desc(ReadingDb.timestamp))
-            .offset(offset)
-            .limit(limit)
+            .order_by(ReadingDb.timestamp, ReadingDb.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for batch in result.partitions():
+            yield batch
+
+    async def get_stats_for_garden_device_type(
+        self,
+        garden_id: int,
+        type: DeviceType,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> List[tuple]:
+        """
+        Aggregate numeric readings per device of a given type in a garden
+        within a time range. The aggregation runs in the database, so no
+        reading rows are transferred.
+        Returns rows of (device_id, esp_id, count, avg, min, max,
+        first_timestamp, last_timestamp).
+        """
+        esp_ids = await self.get_devices_for_garden_device_type(garden_id, type)
+        if not esp_ids:
+            return []
+
+        result = await self.db.execute(
+            select(
+                ReadingDb.device_id,
+                func.count(ReadingDb.numeric_value),
+                func.avg(ReadingDb.numeric_value),
+                func.min(ReadingDb.numeric_value),
+                func.max(ReadingDb.numeric_value),
+                func.min(ReadingDb.timestamp),
+                func.max(ReadingDb.timestamp),
+            )
+            .where(
+                and_(
+                    ReadingDb.device_id.in_(esp_ids),
+                    ReadingDb.timestamp >= start_time,
+                    ReadingDb.timestamp <= end_time,
+                )
+            )
+            .group_by(ReadingDb.device_id)
+            .order_by(ReadingDb.device_id)
+        )
+        return [
+            (device_id, esp_ids[device_id], *aggregates)
+            for device_id, *aggregates in result.all()
+        ]
+
+    async def get_aggregates_for_garden_device_type(
+        self,
+        garden_id: int,
+        type: DeviceType,
+        rollup: Rollup,
+        bucket: timedelta,
+        start_time: datetime,
+        end_time: datetime | None,
+    ) -> List[tuple]:
+        """
+        Aggregate the rollup rows of each device of a type in a garden into
+        buckets of the given width, aligned to the Unix epoch.
+        `bucket` must be a multiple of the rollup width. The range includes
+        rollup buckets starting at or after `start_time` and before
+        `end_time`, or all later buckets if `end_time` is None.
+        Returns rows of (device_id, esp_id, bucket_start, count, sum, min,
+        max, last, last_timestamp), ordered by device and bucket.
+        """
+        esp_ids = await self.get_devices_for_garden_device_type(garden_id, type)
+        if not esp_ids:
+            return []
+
+        model = rollup.model
+        bucket_start = func.date_bin(
+            literal(bucket, Interval), model.bucket_start, literal(EPOCH)
+        ).label("bucket")
+        conditions = [
+            model.device_id.in_(esp_ids),
+            model.bucket_start >= start_time,
+        ]
+        if end_time is not None:
+            conditions.append(model.bucket_start < end_time)
+
+        result = await self.db.execute(
+            select(
+                model.device_id,
+                bucket_start,
+                func.sum(model.count),
+                func.sum(model.sum),
+                func.min(model.min),
+                func.max(model.max),
+                func.array_agg(
+                    aggregate_order_by(model.last, desc(model.last_timestamp)),
+                    type_=ARRAY(Float),
+                )[1],
+                func.max(model.last_timestamp),
+            )
+            .where(and_(*conditions))
+            .group_by(model.device_id, bucket_start)
+            .order_by(model.device_id, bucket_start)
         )
-        return result.scalars().all()
+        return [
+            (device_id, esp_ids[device_id], *aggregates)
+            for device_id, *aggregates in result.all()
+        ]
+
+    async def ensure_partitions(self, first: datetime, last: datetime) -> List[str]:
+        """
+        Create the monthly partitions of `readings` covering the months
+        from `first` to `last` inclusive, and the default partition, if
+        they do not exist yet. The default partition receives readings
+        outside all monthly partitions, e.g. late readings of months
+        already dropped by retention.
+        Returns the names of the partitions created.
+        """
+        existing = set(await self.get_partition_names())
+        created = []
+
+        month = month_start(first)
+        while month <= last:
+            name = partition_name(month)
+            if name not in existing:
+                await self.db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF readings "
+                    f"FOR VALUES FROM ('{month.isoformat()}') "
+                    f"TO ('{month_start(month, 1).isoformat()}')"
+                ))
+                created.append(name)
+            month = month_start(month, 1)
+
+        if DEFAULT_PARTITION not in existing:
+            await self.db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+                "PARTITION OF readings DEFAULT"
+            ))
+            created.append(DEFAULT_PARTITION)
+
+        await self.db.commit()
+        return created
+
+    async def drop_partitions_before(self, cutoff: datetime) -> List[str]:
+        """
+        Drop the monthly partitions of `readings` that end at or before
+        `cutoff`, and delete older readings from the default partition.
+        Dropping a partition removes its readings without scanning them.
+        Rollups are kept.
+        Returns the names of the partitions dropped.
+        """
+        dropped = []
+        for name in await self.get_partition_names():
+            try:
+                month = datetime.strptime(name, "readings_p%Y%m")
+            except ValueError:
+                continue
+            if month_start(month, 1) <= cutoff:
+                await self.db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+
+        await self.db.execute(text(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"
+        ), {"cutoff": cutoff})
+        await self.db.commit()
+        return dropped
+
+    async def get_partition_names(self) -> List[str]:
+        """
+        Return the names of all partitions of `readings`, sorted.
+        """
+        result = await self.db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'readings'::regclass "
+            "ORDER BY c.relname"
+        ))
+        return list(result.scalars().all())
@@ -1,16 +1,20 @@
+from celery.signals import worker_process_shutdown
 from clients.agent_client import AgentClient
 from core.celery.celery_app import celery_app
+from core.mqtt.mqtt_publisher import MqttTopicPublisher
 from models.dtos.notifications import NotificationCreateDTO
 from common_db.enums import NotificationType, ScheduleActionType
 import logging
 import asyncio
+import threading
 from core.db_context import async_session_maker
+from core.ingest.partitions import maintain_reading_partitions
 from repos.agents import AgentRepository
 from repos.devices import DeviceRepository
 from repos.esp_devices import EspDeviceRepository
 from repos.users import UserRepository
 from services.devices import DeviceService
-from common_db.enums import DeviceType, ControlActionType
+from common_db.enums import DeviceType, ControlActionType, DeliveryStatus
 from exceptions.scheme import AppException
 from controllers.push.push_notification import PushNotificationController
 
@@ -27,6 +31,54 @@ _ACTION_MAP = {
     ScheduleActionType.HEATING_MAT_OFF: (DeviceType.HEATER, ControlActionType.HEATING_MAT_OFF),
 }
 
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_lock = threading.Lock()
+
+
+def _run_async(coro):
+    """
+    Run a coroutine on the event loop of this worker process.
+
+    The loop is created lazily after the worker fork and runs in a daemon
+    thread for the lifetime of the process; tasks submit their coroutines
+    to it and wait for the result. The MQTT publisher connection and DB
+    pool are thus shared between tasks instead of being recreated by
+    ``asyncio.run`` for every task, and keep running between tasks, so
+    MQTT keepalives are sent while the worker is idle.
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="worker-event-loop", daemon=True)
+            _loop_thread.start()
+        loop = _loop
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+@worker_process_shutdown.connect
+def _close_worker_loop(**kwargs):
+    """
+    Close the shared MQTT publisher and the event loop when the worker exits.
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(
+                MqttTopicPublisher().stop(), _loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Could not stop the MQTT publisher: {e}")
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop_thread.join(timeout=10)
+        if not _loop.is_running():
+            _loop.close()
+        _loop = None
+        _loop_thread = None
+
 
 @celery_app.task(name="schedulers.tasks.run_scheduled_action")
 def run_scheduled_action(garden_id: int, action: ScheduleActionType):
@@ -46,12 +98,17 @@ def run_scheduled_action(garden_id: int, action: ScheduleActionType):
                     logger.warning(f"No handler for action: {action}")
                     return
 
-                await dev_service.control_device(
+                result = await dev_service.control_device(
                     await esp_repo.get_by_garden_id(garden_id),
                     *_ACTION_MAP[action]
                 )
                 logger.info(
-                    f"[Scheduled] Executed {action} on garden {garden_id}")
+                    f"[Scheduled] Executed {action} on garden {garden_id} "
+                    f"(delivered={result.delivered}, {result.latency_ms} ms)")
+                for r in result.results:
+                    if r.status != DeliveryStatus.ACKED:
+                        logger.warning(
+                            f"[Scheduled] {action} not acknowledged by ESP {r.mac}: {r.status}")
 
                 user_repo = UserRepository(db)
                 dto = NotificationCreateDTO(
@@ -66,7 +123,7 @@ def run_scheduled_action(garden_id: int, action: ScheduleActionType):
             except Exception as e:
                 logger.exception(f"[Scheduled] Unexpected error: {e}")
 
-    asyncio.run(inner())
+    _run_async(inner())
 
 
 @celery_app.task(name="schedulers.tasks.trigger_agent")
@@ -96,4 +153,19 @@ def run_trigger_agent(garden_id: int):
             except Exception as e:
                 logger.exception(f"[Scheduled] Unexpected error: {e}")
 
-    asyncio.run(inner())
+    _run_async(inner())
+
+
+@celery_app.task(name="schedulers.tasks.maintain_reading_partitions")
+def run_maintain_reading_partitions():
+    """
+    Create upcoming partitions of the readings table and drop partitions
+    older than the configured retention.
+    """
+    async def inner():
+        try:
+            await maintain_reading_partitions()
+        except Exception as e:
+            logger.exception(f"[Scheduled] Reading partition maintenance failed: {e}")
+
+    _run_async(inner())
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from core.config import CONFIG
+from core.state.device_cache import device_cache
 from exceptions.scheme import AppException
 from repos.agents import AgentRepository
 from core.security.jwt import (
@@ -37,6 +38,7 @@ class AgentService:
             raise AppException("Agent for this garden already exists", 400)
 
         agent = await self.agent_repo.create(garden_id=garden_id, enabled=True)
+        device_cache.invalidate_garden(garden_id)
 
         access_token = create_access_token_for_agent(agent.id)
         refresh_token = create_refresh_token()
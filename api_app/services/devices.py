@@ -1,11 +1,19 @@
+import asyncio
+import logging
+import time
 from typing import List, Sequence
+from core.config import CONFIG
 from exceptions.scheme import AppException
 from models.dtos.esp_device import EspDeviceDTO
-from common_db.enums import ControlActionType, DeviceType
-from models.dtos.devices import DeviceDTO
+from common_db.enums import ControlActionType, DeliveryStatus, DeviceType
+from models.dtos.devices import ControlResultDTO, DeviceDTO, EspControlResultDTO
 from mappers.devices import db_to_dto
 from repos.devices import DeviceRepository
 from core.mqtt.mqtt_publisher import MqttTopicPublisher
+from core.state.command_tracker import command_tracker
+from core.state.device_cache import device_cache
+
+logger = logging.getLogger(__name__)
 
 
 class DeviceService:
@@ -69,6 +77,7 @@ class DeviceService:
             )
             created_devices.append(created)
 
+        device_cache.invalidate_esp(esp_id)
         return [db_to_dto(d) for d in created_devices]
 
     async def control_device(
@@ -76,10 +85,18 @@ class DeviceService:
         esps: Sequence[EspDeviceDTO],
         type: DeviceType,
         action: ControlActionType,
-    ) -> bool:
+        wait_for_confirm: bool = False,
+    ) -> ControlResultDTO:
         """
         Send a control command for devices of a given type through MQTT.
 
+        Commands to all matching ESPs are published concurrently at QoS 1.
+        Each ESP gets its own delivery status and publishing is bounded
+        by ``CONFIG.MQTT_CONTROL_TIMEOUT``. In the API process every command
+        is recorded in the :data:`command_tracker`, which matches it with the
+        confirmation sent back by the ESP. Elsewhere, e.g. in Celery tasks,
+        commands are not tracked.
+
         Parameters
         ----------
         esps : Sequence[EspDeviceDTO]
@@ -88,11 +105,16 @@ class DeviceService:
             Type of device to control (e.g. WATERER, HEATER).
         action : ControlActionType
             Control action to perform (e.g. WATER_ON, FAN_OFF).
+        wait_for_confirm : bool
+            If True, additionally wait up to ``CONFIG.COMMAND_CONFIRM_TIMEOUT``
+            for the ESPs to confirm the new actuator state. Ignored where
+            commands are not tracked.
 
         Returns
         -------
-        bool
-            True if messages were successfully published.
+        ControlResultDTO
+            Per-ESP delivery status (acked, confirmed, unconfirmed, timed out
+            or failed), whether all commands were delivered and the total latency.
 
         Raises
         ------
@@ -114,12 +136,85 @@ class DeviceService:
             )
 
         publisher = MqttTopicPublisher()
-
-        for device in matching_devices:
-            payload = {"action": {"id": action.value}}
-            await publisher.publish(
-                topic=f"{device.esp.mac}/device/control",
-                payload=payload,
+        payload = {"action": {"id": action.value}}
+        confirm_action = "on" if action.name.endswith("_ON") else "off"
+
+        # confirmations are only received, and commands expired, in the API
+        tracked = command_tracker.running
+        wait_for_confirm = wait_for_confirm and tracked
+
+        started = time.perf_counter()
+        confirms = [
+            command_tracker.register(device.esp.mac, type, confirm_action)
+            if tracked else None
+            for device in matching_devices
+        ]
+        outcomes = await asyncio.gather(
+            *(
+                publisher.publish_to_device(
+                    device.esp.mac,
+                    topic=f"{device.esp.mac}/device/control",
+                    payload=payload,
+                    qos=1,
+                    timeout=CONFIG.MQTT_CONTROL_TIMEOUT,
+                )
+                for device in matching_devices
+            ),
+            return_exceptions=True,
+        )
+        statuses = [_delivery_status(outcome) for outcome in outcomes]
+
+        for device, status, confirm in zip(matching_devices, statuses, confirms):
+            if confirm is not None and status != DeliveryStatus.ACKED:
+                command_tracker.discard(device.esp.mac, type, confirm)
+
+        if wait_for_confirm:
+            acked = [
+                confirm for status, confirm in zip(statuses, confirms)
+                if status == DeliveryStatus.ACKED
+            ]
+            if acked:
+                await asyncio.wait(acked, timeout=CONFIG.COMMAND_CONFIRM_TIMEOUT)
+            statuses = [
+                _confirm_status(confirm) if status == DeliveryStatus.ACKED else status
+                for status, confirm in zip(statuses, confirms)
+            ]
+
+        latency = time.perf_counter() - started
+        delivered_status = DeliveryStatus.CONFIRMED if wait_for_confirm else DeliveryStatus.ACKED
+
+        results = [
+            EspControlResultDTO(
+                esp_id=device.esp.id,
+                mac=device.esp.mac,
+                status=status,
             )
+            for device, status in zip(matching_devices, statuses)
+        ]
+
+        return ControlResultDTO(
+            delivered=all(r.status == delivered_status for r in results),
+            latency_ms=round(latency * 1000, 3),
+            results=results,
+        )
+
 
-        return True
+def _delivery_status(outcome: BaseException | None) -> DeliveryStatus:
+    """
+    Map the outcome of a single publish to a delivery status.
+    """
+    if outcome is None:
+        return DeliveryStatus.ACKED
+    if isinstance(outcome, asyncio.TimeoutError):
+        return DeliveryStatus.TIMED_OUT
+    logger.warning(f"Control command failed: {outcome}")
+    return DeliveryStatus.FAILED
+
+
+def _confirm_status(confirm: asyncio.Future) -> DeliveryStatus:
+    """
+    Map a tracked command to its status after waiting for the confirmation.
+    """
+    if confirm.done() and confirm.result():
+        return DeliveryStatus.CONFIRMED
+    return DeliveryStatus.UNCONFIRMED
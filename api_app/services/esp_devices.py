@@ -3,6 +3,8 @@ from typing import List
 
 from clients.csr_client import CsrClient
 from core.mqtt.mqtt_publisher import MqttTopicPublisher
+from core.state.device_cache import device_cache
+from core.state.last_values import last_values
 from exceptions.scheme import AppException
 from mappers.esp_devices import db_esp_to_dto
 from common_db.db import EspDeviceDb
@@ -48,7 +50,14 @@ class EspDeviceService:
         """
         Assign an ESP device to a garden.
         """
-        await self.repo.update(esp_id, garden_id=garden_id)
+        previous = await self.repo.get_by_id(esp_id)
+        # update() changes the same identity-mapped object in place
+        old_garden_id = previous.garden_id if previous else None
+        esp = await self.repo.update(esp_id, garden_id=garden_id)
+        if esp:
+            device_cache.invalidate(esp.mac)
+        if old_garden_id is not None and old_garden_id != garden_id:
+            await last_values.invalidate_garden(old_garden_id)
 
     async def unassign_from_garden(self, esp_id: int, user_id: int) -> None:
         """
@@ -62,6 +71,9 @@ class EspDeviceService:
             raise AppException(message="Not authorized", status_code=403)
 
         await self.repo.update(esp_id, garden_id=None)
+        device_cache.invalidate(esp.mac)
+        if esp.garden_id is not None:
+            await last_values.invalidate_garden(esp.garden_id)
 
     async def register_new_device(self, mac: str, secret: str) -> EspDeviceDb:
         """
@@ -73,7 +85,9 @@ class EspDeviceService:
             logger.warning("Device exists")
             raise AppException("Device already exists")
 
-        return await self.repo.create(mac=mac, secret=secret)
+        esp = await self.repo.create(mac=mac, secret=secret)
+        device_cache.invalidate(mac)
+        return esp
 
     async def _validate_device(self, esp_id: int, user_id: int) -> EspDeviceDb:
         """
@@ -103,6 +117,9 @@ class EspDeviceService:
             client_key=None,
             client_crt=None,
         )
+        device_cache.invalidate(esp.mac)
+        if esp.garden_id is not None:
+            await last_values.invalidate_garden(esp.garden_id)
 
         publisher = MqttTopicPublisher()
         await publisher.publish(topic=f"{esp.mac}/reset", payload={})
@@ -157,4 +174,5 @@ class EspDeviceService:
 
         cert_pem = await self.csr_client.sign_csr(csr_pem)
         await self.repo.update(device.id, client_crt=cert_pem, user_id=user.id)
+        device_cache.invalidate(device.mac)
         return cert_pem
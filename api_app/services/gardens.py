@@ -1,11 +1,21 @@
-from typing import List
+from typing import Dict, List
+from core.state.device_cache import device_cache
+from core.state.last_values import last_values
+from core.state.presence import presence_table
 from repos.gardens import GardenRepository
+from repos.notifications import NotificationRepository
+from repos.readings import ReadingRepository
 from services.devices import DeviceService
 from models.dtos.gardens import (
+    GardenActuatorStateDTO,
     GardenDTO,
     GardenCreateDTO,
+    GardenEspStatusDTO,
     GardenPreferencesUpdateDTO,
+    GardenSnapshotDTO,
 )
+from models.dtos.readings import ReadingDTO
+from common_db.enums import DeviceType
 
 
 class GardenService:
@@ -14,12 +24,20 @@ class GardenService:
     updates, user preferences, and retrieval.
     """
 
-    def __init__(self, repo: GardenRepository, device_service: DeviceService):
+    def __init__(
+        self,
+        repo: GardenRepository,
+        device_service: DeviceService,
+        reading_repo: ReadingRepository,
+        notification_repo: NotificationRepository,
+    ):
         """
         Initialize the service.
         """
         self.repo = repo
         self.device_service = device_service
+        self.reading_repo = reading_repo
+        self.notification_repo = notification_repo
 
     async def create_garden(self, dto: GardenCreateDTO, user_id: int) -> GardenDTO:
         """
@@ -45,6 +63,8 @@ class GardenService:
         Delete a garden by its ID.
         """
         await self.repo.delete(garden_id)
+        device_cache.invalidate_garden(garden_id)
+        await last_values.invalidate_garden(garden_id)
 
     async def update_garden_name(self, garden_id: int, name: str) -> GardenDTO:
         """
@@ -107,3 +127,82 @@ class GardenService:
             use_fahrenheit=prefs.use_fahrenheit,
         )
         return GardenDTO(**updated.__dict__)
+
+    async def get_snapshot(self, garden: GardenDTO) -> GardenSnapshotDTO:
+        """
+        Collect the current state of a garden for a dashboard.
+
+        Uses a constant number of queries regardless of the number of
+        ESPs and devices: one for the devices and their ESPs, at most one
+        for the latest readings of the sensor types missing from the
+        last-value store, and one for the unread notification count.
+        ESP online states come from the presence table and fall back to
+        the stored status.
+
+        Parameters
+        ----------
+        garden : GardenDTO
+            Garden to describe.
+
+        Returns
+        -------
+        GardenSnapshotDTO
+            Latest reading per sensor type, actuator states, ESP online
+            states and the number of unread notifications of the owner.
+        """
+        esps: Dict[int, GardenEspStatusDTO] = {}
+        actuators: List[GardenActuatorStateDTO] = []
+        sensors: Dict[int, tuple[int, DeviceType]] = {}
+        for row in await self.repo.get_devices_with_esp(garden.id):
+            if row.esp_id not in esps:
+                online = presence_table.is_online(row.mac)
+                esps[row.esp_id] = GardenEspStatusDTO(
+                    esp_id=row.esp_id,
+                    mac=row.mac,
+                    online=row.status if online is None else online,
+                )
+            if row.device_id is None:
+                continue
+            if row.type in DeviceService.ACTUATORS:
+                actuators.append(GardenActuatorStateDTO(
+                    device_id=row.device_id,
+                    esp_id=row.esp_id,
+                    type=row.type,
+                    enabled=row.enabled,
+                ))
+            else:
+                sensors[row.device_id] = (row.esp_id, row.type)
+
+        readings: Dict[DeviceType, ReadingDTO] = {}
+        for type in {t for _, t in sensors.values()}:
+            cached = await last_values.get_for_garden(garden.id, type)
+            if cached is not None:
+                readings[type] = cached
+
+        missing = [d for d, (_, t) in sensors.items() if t not in readings]
+        if missing:
+            loaded: Dict[DeviceType, ReadingDTO] = {}
+            for row in await self.reading_repo.get_last_for_devices(missing):
+                esp_id, type = sensors[row.device_id]
+                current = loaded.get(type)
+                if current is None or (current.timestamp, current.id) < (row.timestamp, row.id):
+                    loaded[type] = ReadingDTO(
+                        id=row.id,
+                        device_id=row.device_id,
+                        value=row.value,
+                        numeric_value=row.numeric_value,
+                        timestamp=row.timestamp,
+                        esp_id=esp_id,
+                    )
+            await last_values.update(
+                (garden.id, type, dto) for type, dto in loaded.items())
+            readings.update(loaded)
+
+        return GardenSnapshotDTO(
+            garden_id=garden.id,
+            readings=readings,
+            actuators=actuators,
+            esp_devices=list(esps.values()),
+            unread_notifications=await self.notification_repo.count_unread(
+                garden.user_id),
+        )
@@ -1,9 +1,163 @@
+import base64
+import binascii
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict
+
+import numpy as np
+
+from core.config import CONFIG
+from core.db_context import async_session_maker
+from core.ingest.values import to_numeric
+from core.series import bin_last, bin_mean, forward_fill, lttb
+from core.state.last_values import last_values
 from exceptions.scheme import AppException
-from models.dtos.readings import ReadingCreateDTO, ReadingDTO
-from mappers.readings import db_to_dto
-from repos.readings import ReadingRepository
-from datetime import datetime
-from common_db.enums import DeviceType
+from models.dtos.readings import (
+    ReadingAggregateDTO,
+    ReadingCreateDTO,
+    ReadingDTO,
+    ReadingResampleDTO,
+    ReadingStatsDTO,
+)
+from mappers.readings import db_to_dto, row_to_dto
+from repos.readings import EPOCH, ROLLUPS, Rollup, ReadingRepository, ReadingRow
+from datetime import datetime, timedelta
+from sqlalchemy import Row
+from common_db.enums import DeviceType, ReadingExportFormat, ResampleMethod
+
+EXPORT_COLUMNS = ("id", "device_id", "esp_id", "value", "numeric_value", "timestamp")
+
+
+def encode_cursor(timestamp: datetime, id: int) -> str:
+    """
+    Encode a (timestamp, id) reading position as an opaque cursor token.
+    """
+    raw = json.dumps([timestamp.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decode a cursor token created by :func:`encode_cursor`.
+
+    Raises
+    ------
+    AppException
+        If the token is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise AppException("Invalid cursor", 400) from e
+
+
+def encode_ndjson(readings: list[Row], esp_id: int) -> bytes:
+    """
+    Encode readings as newline-delimited JSON objects.
+    """
+    return "".join(
+        json.dumps({
+            "id": r.id,
+            "device_id": r.device_id,
+            "esp_id": esp_id,
+            "value": r.value,
+            "numeric_value": r.numeric_value,
+            "timestamp": r.timestamp.isoformat(),
+        }) + "\n"
+        for r in readings
+    ).encode()
+
+
+def encode_csv(readings: list[Row], esp_id: int) -> bytes:
+    """
+    Encode readings as CSV rows in the order of :data:`EXPORT_COLUMNS`.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        (r.id, r.device_id, esp_id, r.value, r.numeric_value, r.timestamp.isoformat())
+        for r in readings
+    )
+    return buffer.getvalue().encode()
+
+
+def split_rollup_range(
+    rollups: list[Rollup],
+    start_time: datetime,
+    end_time: datetime | None,
+) -> list[tuple[Rollup, datetime, datetime | None]]:
+    """
+    Split a time range into segments served by the given rollups.
+
+    The coarsest rollup serves the part of the range aligned to its
+    buckets, and the edges before and after it are split the same way
+    among the finer rollups. The finest rollup serves whatever is left,
+    so the range boundaries must be aligned to it.
+
+    Parameters
+    ----------
+    rollups : list[Rollup]
+        Candidate rollups, coarsest first.
+    start_time : datetime
+        Start of the range.
+    end_time : datetime | None
+        Exclusive end of the range, or None for no end.
+
+    Returns
+    -------
+    list[tuple[Rollup, datetime, datetime | None]]
+        Rollup, start and exclusive end of each segment, in time order.
+    """
+    rollup, finer = rollups[0], rollups[1:]
+    if not finer:
+        return [(rollup, start_time, end_time)]
+
+    first = rollup.truncate(start_time)
+    if first != start_time:
+        first += rollup.width
+    last = rollup.truncate(end_time) if end_time is not None else None
+    if last is not None and first >= last:
+        return split_rollup_range(finer, start_time, end_time)
+
+    segments = []
+    if start_time < first:
+        segments += split_rollup_range(finer, start_time, first)
+    segments.append((rollup, first, last))
+    if last is not None and last < end_time:
+        segments += split_rollup_range(finer, last, end_time)
+    return segments
+
+
+def merge_aggregates(rows: list[tuple]) -> list[tuple]:
+    """
+    Combine aggregate rows of the same device and bucket, as returned for
+    the segments of a range by
+    :meth:`ReadingRepository.get_aggregates_for_garden_device_type`.
+
+    Returns
+    -------
+    list[tuple]
+        One row per device and bucket, ordered by device and bucket.
+    """
+    merged = {}
+    for row in rows:
+        key = (row[0], row[2])
+        other = merged.get(key)
+        if other is None:
+            merged[key] = row
+            continue
+        device_id, esp_id, bucket_start, count, total, low, high, last, last_ts = row
+        if other[8] > last_ts:
+            last, last_ts = other[7], other[8]
+        merged[key] = (
+            device_id, esp_id, bucket_start,
+            other[3] + count, other[4] + total,
+            min(other[5], low), max(other[6], high),
+            last, last_ts,
+        )
+    return [merged[key] for key in sorted(merged)]
 
 
 class ReadingService:
@@ -31,7 +185,11 @@ class ReadingService:
         ReadingDTO
             The created reading mapped to a DTO.
         """
-        reading = await self.repo.create(device_id=dto.device_id, value=dto.value)
+        reading = await self.repo.create(
+            device_id=dto.device_id,
+            value=dto.value,
+            numeric_value=to_numeric(dto.value),
+        )
         return db_to_dto(reading)
 
     async def get_last_for_garden_device_type(
@@ -42,6 +200,10 @@ class ReadingService:
         """
         Get the most recent reading for a device type in a specific garden.
 
+        Served from the last-value store, which the ingest path keeps
+        current. On a miss the reading is read from the database and
+        stored.
+
         Parameters
         ----------
         garden_id : int
@@ -59,10 +221,16 @@ class ReadingService:
         AppException
             If no reading is found for the given device type.
         """
+        cached = await last_values.get_for_garden(garden_id, type)
+        if cached is not None:
+            return cached
+
         reading = await self.repo.get_last_for_garden_device_type(garden_id, type)
         if not reading:
             raise AppException("No reading found for device type", 404)
-        return db_to_dto(reading)
+        dto = db_to_dto(reading)
+        await last_values.update([(garden_id, type, dto)])
+        return dto
 
     async def get_by_garden_filters_paginated(
         self,
@@ -72,10 +240,15 @@ class ReadingService:
         end_time: datetime,
         offset: int,
         limit: int,
-    ) -> list[ReadingDTO]:
+        cursor: str | None = None,
+    ) -> tuple[list[ReadingDTO], str | None]:
         """
         Get readings for a device type in a garden within a time range (paginated).
 
+        Pages are addressed either by `offset` or, more efficiently, by a
+        `cursor` returned with the previous page. When both are given, the
+        offset is applied after the cursor position.
+
         Parameters
         ----------
         garden_id : int
@@ -90,13 +263,417 @@ class ReadingService:
             Number of results to skip.
         limit : int
             Maximum number of results to return.
+        cursor : str | None
+            Cursor of the page to fetch, from a previous call.
 
         Returns
         -------
-        list[ReadingDTO]
-            List of readings as DTOs.
+        tuple[list[ReadingDTO], str | None]
+            List of readings as DTOs, and the cursor of the next page,
+            or None if this page is the last one.
+
+        Raises
+        ------
+        AppException
+            If the cursor is malformed.
         """
+        after = decode_cursor(cursor) if cursor else None
         readings = await self.repo.get_by_garden_filters_paginated(
-            garden_id, type, start_time, end_time, offset, limit
+            garden_id, type, start_time, end_time, offset, limit, after
+        )
+        next_cursor = (
+            encode_cursor(readings[-1].timestamp, readings[-1].id)
+            if len(readings) == limit else None
+        )
+        return [row_to_dto(r) for r in readings], next_cursor
+
+    async def get_downsampled_for_garden_device_type(
+        self,
+        garden_id: int,
+        type: DeviceType,
+        start_time: datetime,
+        end_time: datetime,
+        max_points: int,
+    ) -> list[ReadingDTO]:
+        """
+        Get the numeric readings of each device of a type in a garden within
+        a time range, reduced to at most `max_points` readings per device.
+
+        The readings of each device are read in batches and reduced with
+        :func:`core.series.lttb`, so only the kept readings are mapped to
+        DTOs and the response size does not depend on the range. Readings
+        without a numeric value are left out.
+
+        Parameters
+        ----------
+        garden_id : int
+            ID of the garden.
+        type : DeviceType
+            Type of device.
+        start_time : datetime
+            Start of the time range.
+        end_time : datetime
+            End of the time range.
+        max_points : int
+            Maximum number of readings per device, at least 3.
+
+        Returns
+        -------
+        list[ReadingDTO]
+            Kept readings, newest first like the paginated list.
+        """
+        esp_ids = await self.repo.get_devices_for_garden_device_type(garden_id, type)
+        readings = []
+        for device_id, esp_id in esp_ids.items():
+            rows = [
+                row
+                async for batch in self.repo.stream_for_device(
+                    device_id, start_time, end_time, CONFIG.READING_EXPORT_BATCH_ROWS)
+                for row in batch
+                if row.numeric_value is not None
+            ]
+            x = np.fromiter((r.timestamp.timestamp() for r in rows), float, len(rows))
+            y = np.fromiter((r.numeric_value for r in rows), float, len(rows))
+            readings.extend(
+                row_to_dto(ReadingRow(*rows[i], esp_id))
+                for i in lttb(x, y, max_points)
+            )
+        readings.sort(key=lambda r: (r.timestamp, r.id), reverse=True)
+        return readings
+
+    async def export_for_garden_device_type(
+        self,
+        garden_id: int,
+        type: DeviceType,
+        start_time: datetime,
+        end_time: datetime,
+        format: ReadingExportFormat,
+    ) -> AsyncIterator[bytes]:
+        """
+        Export the readings of each device of a type in a garden within
+        a time range, ordered by device and then oldest first.
+
+        Devices are resolved right away. The readings are read lazily
+        while the returned iterator is consumed, batch by batch from a
+        server-side cursor, so memory use does not depend on the range.
+        The iterator opens its own session, as it outlives the request
+        handler.
+
+        Parameters
+        ----------
+        garden_id : int
+            ID of the garden.
+        type : DeviceType
+            Type of device.
+        start_time : datetime
+            Start of the time range.
+        end_time : datetime
+            End of the time range.
+        format : ReadingExportFormat
+            Output format. CSV output starts with a header row.
+
+        Returns
+        -------
+        AsyncIterator[bytes]
+            Encoded chunks of at most ``CONFIG.READING_EXPORT_BATCH_ROWS``
+            readings each.
+        """
+        esp_ids = await self.repo.get_devices_for_garden_device_type(garden_id, type)
+        return self._export(esp_ids, start_time, end_time, format)
+
+    async def _export(
+        self,
+        esp_ids: Dict[int, int],
+        start_time: datetime,
+        end_time: datetime,
+        format: ReadingExportFormat,
+    ) -> AsyncIterator[bytes]:
+        if format is ReadingExportFormat.CSV:
+            encode = encode_csv
+            yield (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+        else:
+            encode = encode_ndjson
+
+        async with async_session_maker() as session:
+            repo = ReadingRepository(session)
+            for device_id, esp_id in sorted(esp_ids.items()):
+                async for batch in repo.stream_for_device(
+                    device_id, start_time, end_time, CONFIG.READING_EXPORT_BATCH_ROWS
+                ):
+                    yield encode(batch, esp_id)
+
+    async def get_stats_for_garden_device_type(
+        self,
+        garden_id: int,
+        type: DeviceType,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> list[ReadingStatsDTO]:
+        """
+        Get count, average, minimum and maximum of the readings of each
+        device of a type in a garden within a time range.
+
+        Parameters
+        ----------
+        garden_id : int
+            ID of the garden.
+        type : DeviceType
+            Type of device.
+        start_time : datetime
+            Start of the time range.
+        end_time : datetime
+            End of the time range.
+
+        Returns
+        -------
+        list[ReadingStatsDTO]
+            One entry per device with readings in the range. Only numeric
+            values are counted and aggregated.
+        """
+        rows = await self.repo.get_stats_for_garden_device_type(
+            garden_id, type, start_time, end_time
+        )
+        return [
+            ReadingStatsDTO(
+                device_id=device_id,
+                esp_id=esp_id,
+                count=count,
+                avg=avg,
+                min=min_value,
+                max=max_value,
+                first_timestamp=first_timestamp,
+                last_timestamp=last_timestamp,
+            )
+            for (
+                device_id, esp_id, count, avg, min_value, max_value,
+                first_timestamp, last_timestamp,
+            ) in rows
+        ]
+
+    def plan_rollups(
+        self,
+        bucket: timedelta,
+        start_time: datetime,
+        end_time: datetime | None,
+    ) -> list[tuple[Rollup, datetime, datetime | None]]:
+        """
+        Pick the rollups serving a bucket width and range.
+
+        Only rollups whose width divides the bucket width qualify, so no
+        rollup row straddles a requested bucket. The part of the range
+        aligned to the coarsest of them is read from it and the unaligned
+        edges from finer rollups, see :func:`split_rollup_range`. E.g.
+        daily buckets over the last 30 days read whole days from the day
+        rollup and the partial first and last day from the hour and
+        minute rollups.
+
+        Returns
+        -------
+        list[tuple[Rollup, datetime, datetime | None]]
+            Rollup, start and exclusive end of each segment, in time order.
+
+        Raises
+        ------
+        AppException
+            If the bucket is not a positive whole number of minutes.
+        """
+        rollups = [rollup for rollup in ROLLUPS if not bucket % rollup.width]
+        if bucket <= timedelta(0) or not rollups:
+            raise AppException("Bucket must be a positive whole number of minutes", 400)
+        return split_rollup_range(rollups, start_time, end_time)
+
+    async def _get_aggregates(
+        self,
+        garden_id: int,
+        type: DeviceType,
+        bucket: timedelta,
+        start_time: datetime,
+        end_time: datetime | None,
+    ) -> tuple[list[str], list[tuple]]:
+        """
+        Read the aggregate rows of a range from the rollups picked by
+        :meth:`plan_rollups`, merging buckets split between segments.
+
+        Returns
+        -------
+        tuple[list[str], list[tuple]]
+            Names of the rollups used, coarsest first, and the rows of
+            :meth:`ReadingRepository.get_aggregates_for_garden_device_type`.
+        """
+        segments = self.plan_rollups(bucket, start_time, end_time)
+        rows = []
+        for rollup, start, end in segments:
+            rows += await self.repo.get_aggregates_for_garden_device_type(
+                garden_id, type, rollup, bucket, start, end
+            )
+        names = [r.name for r in ROLLUPS if any(r is s[0] for s in segments)]
+        if len(segments) > 1:
+            rows = merge_aggregates(rows)
+        return names, rows
+
+    async def get_aggregates_for_garden_device_type(
+        self,
+        garden_id: int,
+        type: DeviceType,
+        bucket: timedelta,
+        start_time: datetime,
+        end_time: datetime | None,
+    ) -> tuple[str, list[ReadingAggregateDTO]]:
+        """
+        Get count, sum, average, minimum, maximum and last value of the
+        readings of each device of a type in a garden, per time bucket.
+
+        Served from the coarsest rollups that fit the request, see
+        :meth:`plan_rollups`. Range boundaries are first truncated to
+        whole minutes.
+
+        Parameters
+        ----------
+        garden_id : int
+            ID of the garden.
+        type : DeviceType
+            Type of device.
+        bucket : timedelta
+            Width of the returned buckets. Buckets are aligned to the
+            Unix epoch (UTC midnight for whole days).
+        start_time : datetime
+            Start of the time range.
+        end_time : datetime | None
+            Exclusive end of the time range, or None for no end.
+
+        Returns
+        -------
+        tuple[str, list[ReadingAggregateDTO]]
+            Comma-separated names of the rollups used, coarsest first, and
+            one entry per device and bucket with numeric readings, ordered
+            by device and bucket start.
+
+        Raises
+        ------
+        AppException
+            If the bucket is not a positive whole number of minutes.
+        """
+        minute = ROLLUPS[-1].truncate
+        start_time = minute(start_time)
+        end_time = minute(end_time) if end_time is not None else None
+
+        rollups, rows = await self._get_aggregates(
+            garden_id, type, bucket, start_time, end_time
+        )
+        return ",".join(rollups), [
+            ReadingAggregateDTO(
+                device_id=device_id,
+                esp_id=esp_id,
+                bucket_start=bucket_start,
+                count=count,
+                sum=total,
+                avg=total / count,
+                min=min_value,
+                max=max_value,
+                last=last,
+            )
+            for (
+                device_id, esp_id, bucket_start, count, total,
+                min_value, max_value, last, _,
+            ) in rows
+        ]
+
+    async def resample_for_garden(
+        self,
+        garden_id: int,
+        types: list[DeviceType],
+        step: timedelta,
+        start_time: datetime,
+        end_time: datetime,
+        method: ResampleMethod,
+        ffill_limit: int | None,
+    ) -> ReadingResampleDTO:
+        """
+        Resample the numeric readings of several device types of a garden
+        onto a shared grid of `step` wide intervals.
+
+        The grid is aligned to the Unix epoch like the rollup buckets and
+        covers the range from the interval containing `start_time` to the
+        one containing `end_time`. Each type is read from the coarsest
+        rollup that fits, aggregated per device and interval in the
+        database, and the devices of a type are combined and gaps filled
+        with NumPy. An interval gets the mean of all readings of the type
+        in it, or the most recent one, and stays empty (None) if it has no
+        readings and is more than `ffill_limit` intervals after the last
+        one that has.
+
+        Parameters
+        ----------
+        garden_id : int
+            ID of the garden.
+        types : list[DeviceType]
+            Device types to resample.
+        step : timedelta
+            Width of the grid intervals, a positive whole number of minutes.
+        start_time : datetime
+            Start of the time range.
+        end_time : datetime
+            End of the time range.
+        method : ResampleMethod
+            How the readings within an interval are combined.
+        ffill_limit : int | None
+            Maximum number of empty intervals filled with the previous
+            value. None fills without limit, 0 disables filling.
+
+        Returns
+        -------
+        ReadingResampleDTO
+            Interval start times and one array of values per type,
+            aligned with them.
+
+        Raises
+        ------
+        AppException
+            If the step is not a positive whole number of minutes or the
+            grid has more than ``CONFIG.READING_RESAMPLE_MAX_POINTS``
+            intervals.
+        """
+        if step <= timedelta(0):
+            raise AppException("Step must be a positive whole number of minutes", 400)
+
+        grid_start = EPOCH + (start_time - EPOCH) // step * step
+        size = max((end_time - grid_start) // step + 1, 0)
+        if size > CONFIG.READING_RESAMPLE_MAX_POINTS:
+            raise AppException(
+                f"Resampling would return more than "
+                f"{CONFIG.READING_RESAMPLE_MAX_POINTS} points", 400)
+        grid_end = grid_start + size * step
+
+        timestamps = np.arange(
+            np.datetime64(grid_start, "us"), np.datetime64(grid_end, "us"),
+            np.timedelta64(step), dtype="datetime64[us]")
+        values = {}
+        for type in dict.fromkeys(types):
+            _, rows = await self._get_aggregates(
+                garden_id, type, step, grid_start, grid_end
+            )
+            _, _, starts, counts, sums, _, _, lasts, last_times = (
+                zip(*rows) if rows else ((),) * 9)
+            bins = (
+                np.array(starts, dtype="datetime64[us]")
+                - np.datetime64(grid_start, "us")
+            ) // np.timedelta64(step)
+            bins = bins.astype(np.int64)
+
+            if method is ResampleMethod.MEAN:
+                series = bin_mean(
+                    bins, np.array(counts, float), np.array(sums, float), size)
+            else:
+                series = bin_last(
+                    bins, np.array(last_times, dtype="datetime64[us]"),
+                    np.array(lasts, float), size)
+            if ffill_limit != 0:
+                series = forward_fill(series, ffill_limit)
+            values[type] = np.where(np.isnan(series), None, series).tolist()
+
+        return ReadingResampleDTO(
+            step=step,
+            method=method,
+            timestamps=timestamps.tolist(),
+            values=values,
         )
-        return [db_to_dto(r) for r in readings]
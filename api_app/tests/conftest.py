@@ -0,0 +1,38 @@
+"""
+Shared setup of the API tests.
+
+Run from the repository root or from ``api_app``::
+
+    python -m pytest -q api_app/tests
+
+Modules are imported the way the API runs them, from ``api_app`` with
+``common_db`` next to it. Tests that need Postgres read its URL from
+``TEST_DB_CONNECTION_STRING`` and are skipped without it.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+API_DIR = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(API_DIR), str(API_DIR.parent)]
+
+# The database engine is created on import; no connection is opened
+# unless a test uses it.
+os.environ.setdefault(
+    "DB_CONNECTION_STRING",
+    os.getenv("TEST_DB_CONNECTION_STRING", "postgresql+asyncpg://localhost/test"),
+)
+
+
+@pytest.fixture(scope="session")
+def db_url() -> str:
+    """
+    URL of the Postgres database of the tests, which create and drop
+    their own scratch schemas in it.
+    """
+    url = os.getenv("TEST_DB_CONNECTION_STRING")
+    if not url:
+        pytest.skip("TEST_DB_CONNECTION_STRING is not set")
+    return url
@@ -0,0 +1,87 @@
+import asyncio
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from common_db.enums import DeviceType  # noqa: E402
+import core.state.device_cache as device_cache_module  # noqa: E402
+from core.state.device_cache import DeviceCache  # noqa: E402
+
+Row = namedtuple("Row", "mac esp_id garden_id user_id agent_id device_id type")
+
+
+def filled_cache() -> DeviceCache:
+    cache = DeviceCache(use_redis=False)
+    cache._store([
+        Row("mac-1", 1, 10, 5, None, 100, DeviceType.LIGHT_SENSOR),
+        Row("mac-2", 2, 10, 5, None, 101, DeviceType.LIGHT_SENSOR),
+        Row("mac-3", 3, 11, 5, None, 102, DeviceType.LIGHT_SENSOR),
+    ])
+    return cache
+
+
+@pytest.mark.parametrize(
+    "message, left",
+    [
+        ({"mac": "mac-1"}, ["mac-2", "mac-3"]),
+        ({"esp_id": 3}, ["mac-1", "mac-2"]),
+        ({"garden_id": 10}, ["mac-3"]),
+        ({"mac": "unknown"}, ["mac-1", "mac-2", "mac-3"]),
+    ],
+)
+def test_received_invalidations_drop_entries(message, left):
+    cache = filled_cache()
+    cache._apply(message)
+
+    assert sorted(cache._entries) == left
+    assert cache.stats()["invalidations_received"] == 1
+
+
+def test_local_invalidation_without_redis():
+    cache = filled_cache()
+    cache.invalidate_garden(10)
+
+    assert sorted(cache._entries) == ["mac-3"]
+    assert cache.stats()["invalidations_received"] == 0
+
+
+def test_unknown_macs_are_bounded(monkeypatch):
+    queries = []
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeDeviceRepository:
+        def __init__(self, session):
+            pass
+
+        async def get_routes(self, mac=None):
+            queries.append(mac)
+            return []
+
+    monkeypatch.setattr(device_cache_module, "async_session_maker", FakeSession)
+    monkeypatch.setattr(device_cache_module, "DeviceRepository", FakeDeviceRepository)
+    cache = filled_cache()
+    cache.max_unknown = 3
+
+    async def run():
+        for i in range(10):
+            assert await cache.get_esp_id(f"random-{i}") is None
+        assert await cache.get_esp_id("random-9") is None
+        assert await cache.get_esp_id("mac-1") == 1
+
+    asyncio.run(run())
+
+    assert len(queries) == 10
+    assert list(cache._unknown) == ["random-7", "random-8", "random-9"]
+    assert sorted(cache._entries) == ["mac-1", "mac-2", "mac-3"]
+
+    # registering the ESP invalidates its MAC
+    cache.invalidate("random-8")
+    assert list(cache._unknown) == ["random-7", "random-9"]
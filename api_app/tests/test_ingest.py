@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+import core.ingest.reading_journal as reading_journal_module  # noqa: E402
+from core.ingest.reading_buffer import ReadingBuffer, ingest_key  # noqa: E402
+from core.ingest.reading_journal import ReadingJournal  # noqa: E402
+
+TS = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def test_ingest_key_is_derived_from_the_sample():
+    key = ingest_key("AA:BB", 0, "light", 1, TS.isoformat())
+
+    assert key == ingest_key("AA:BB", 0, "light", 1, TS.isoformat())
+    assert len(key) == 32
+    assert len({
+        key,
+        ingest_key("AA:BC", 0, "light", 1, TS.isoformat()),
+        ingest_key("AA:BB", 1, "light", 1, TS.isoformat()),
+        ingest_key("AA:BB", 0, "battery", 1, TS.isoformat()),
+        ingest_key("AA:BB", 0, "light", 2, TS.isoformat()),
+        ingest_key("AA:BB", 0, "light", 1, "2026-03-01T12:00:01"),
+    }) == 6
+
+
+def test_journal_writes_appends_once_per_sync(tmp_path):
+    journal = ReadingJournal(str(tmp_path), segment_bytes=1 << 20)
+    journal.open("test")
+    path = journal._segments[journal._current].path
+
+    for i in range(100):
+        journal.append(f"key-{i}", 1, str(i), float(i), TS)
+    assert path.stat().st_size == 0
+
+    asyncio.run(journal.sync())
+    rows = list(journal._read(path))
+    assert [r["ingest_key"] for r in rows] == [f"key-{i}" for i in range(100)]
+    assert rows[0]["timestamp"] == TS
+    journal.close()
+
+
+def test_journal_rotation_keeps_all_records(tmp_path):
+    journal = ReadingJournal(str(tmp_path), segment_bytes=1000)
+    journal.open("test")
+
+    segments = [journal.append(f"key-{i}", 1, str(i), float(i), TS) for i in range(50)]
+    asyncio.run(journal.sync())
+
+    assert len(set(segments)) > 1
+    keys = [
+        r["ingest_key"]
+        for seq in sorted(journal._segments)
+        for r in journal._read(journal._segments[seq].path)
+    ]
+    assert keys == [f"key-{i}" for i in range(50)]
+    assert not journal._sealing
+
+    journal.commit(segments)
+    journal.close()
+    assert not list(tmp_path.glob("test/*.jsonl"))
+
+
+def test_buffer_bounds_the_queue_on_enqueue():
+    buffer = ReadingBuffer(max_rows=10, max_pending=50)
+    buffer.journal = None
+
+    async def fill():
+        for i in range(120):
+            await buffer.add(1, i, TS, key=f"key-{i}")
+
+    asyncio.run(fill())
+
+    assert len(buffer._pending) == 50
+    assert buffer._pending[-1].key == "key-119"
+    assert buffer.stats()["dropped_total"] == 70
+
+
+def test_buffer_defers_overflow_to_the_journal(tmp_path):
+    buffer = ReadingBuffer(max_rows=10, max_pending=50)
+    buffer.journal = ReadingJournal(str(tmp_path), segment_bytes=1 << 20)
+    buffer.journal.open("test")
+
+    async def fill():
+        for i in range(120):
+            await buffer.add(1, i, TS, key=f"key-{i}")
+        await buffer.journal.sync()
+
+    asyncio.run(fill())
+
+    stats = buffer.stats()
+    assert len(buffer._pending) <= 50
+    assert stats["dropped_total"] == 0
+    assert stats["deferred_to_journal_total"] + len(buffer._pending) == 120
+    # the journal is rotated once per evicted flush worth, not per reading
+    assert len(buffer.journal._segments) <= 120 // 10
+    buffer.journal.close()
+
+
+def test_journal_replays_segments_of_a_previous_process(tmp_path, monkeypatch):
+    previous = ReadingJournal(str(tmp_path), segment_bytes=1 << 20)
+    previous.open("test")
+    for i in range(30):
+        previous.append(f"key-{i}", 1, str(i), float(i), TS)
+    asyncio.run(previous.sync())
+    previous.close()
+
+    written = []
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeReadingRepository:
+        def __init__(self, session):
+            pass
+
+        async def create_many(self, rows):
+            written.extend(rows)
+
+    monkeypatch.setattr(reading_journal_module, "async_session_maker", FakeSession)
+    monkeypatch.setattr(reading_journal_module, "ReadingRepository", FakeReadingRepository)
+    journal = ReadingJournal(str(tmp_path), segment_bytes=1 << 20)
+    journal.open("test")
+
+    assert asyncio.run(journal.replay()) == 30
+    assert [r["ingest_key"] for r in written] == [f"key-{i}" for i in range(30)]
+    journal.close()
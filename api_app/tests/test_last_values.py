@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("httpx")
+
+import services.esp_devices as esp_devices_module  # noqa: E402
+from common_db.enums import DeviceType  # noqa: E402
+from core.state.last_values import LastValueStore  # noqa: E402
+from models.dtos.readings import ReadingDTO  # noqa: E402
+from services.esp_devices import EspDeviceService  # noqa: E402
+
+TYPE = DeviceType.LIGHT_SENSOR
+
+
+def reading(device_id: int, esp_id: int) -> ReadingDTO:
+    return ReadingDTO(
+        id=1, device_id=device_id, value="1", numeric_value=1.0,
+        timestamp=datetime(2026, 3, 1, 12), esp_id=esp_id)
+
+
+class IdentityMapRepository:
+    """
+    Stands in for ``EspDeviceRepository``; like a session's identity map,
+    every lookup returns the same object and ``update`` changes it.
+    """
+
+    def __init__(self, esp):
+        self.esp = esp
+
+    async def get_by_id(self, esp_id):
+        return self.esp
+
+    async def update(self, esp_id, **fields):
+        for key, value in fields.items():
+            setattr(self.esp, key, value)
+        return self.esp
+
+
+def test_reassigning_an_esp_drops_the_old_gardens_values(monkeypatch):
+    store = LastValueStore(use_redis=False)
+    store.enabled = True
+    monkeypatch.setattr(esp_devices_module, "last_values", store)
+    esp = SimpleNamespace(id=1, mac="mac-1", garden_id=10)
+    service = EspDeviceService(IdentityMapRepository(esp), user_repo=None)
+
+    async def run():
+        await store.update([(10, TYPE, reading(100, 1)), (20, TYPE, reading(200, 2))])
+        await service.assign_to_garden(1, 20)
+        return (
+            await store.get_for_garden(10, TYPE),
+            await store.get_for_garden(20, TYPE),
+        )
+
+    old, new = asyncio.run(run())
+
+    assert esp.garden_id == 20
+    assert store._garden_key(10, TYPE) not in store._local
+    assert old is None
+    assert new is not None and new.device_id == 200
+
+
+def test_update_writes_all_keys_in_one_script_call():
+    calls = []
+
+    async def put_script(keys, args):
+        calls.append((keys, args))
+
+    store = LastValueStore(use_redis=False)
+    store.enabled = True
+    store._redis = object()
+    store._put_script = put_script
+
+    asyncio.run(store.update([
+        (10, TYPE, reading(100, 1)),
+        (None, TYPE, reading(101, 2)),
+    ]))
+
+    assert len(calls) == 1
+    keys, args = calls[0]
+    assert keys == [
+        store._device_key(100), store._garden_key(10, TYPE), store._device_key(101)]
+    assert args[0] == int(store.ttl)
+    assert len(args) == 1 + 2 * len(keys)
+    assert ReadingDTO.model_validate_json(args[6]).device_id == 101
@@ -0,0 +1,181 @@
+"""
+Query plans of the garden reading queries.
+
+Creates the schema in a scratch Postgres schema, seeds it with a fleet of
+devices and a few hundred thousand readings, runs the
+:class:`ReadingRepository` garden queries and asserts with ``EXPLAIN`` that
+none of them scans a ``readings`` partition sequentially, that they are
+served by the partitions' ``ix_readings_device_id_timestamp`` indexes and
+that range queries only touch the partition of their month. Needs
+``TEST_DB_CONNECTION_STRING``; the scratch schema is dropped afterwards.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from common_db.db import Base  # noqa: E402
+from common_db.enums import DeviceType  # noqa: E402
+from repos.readings import ReadingRepository, month_start, partition_name  # noqa: E402
+
+SCHEMA = "plan_check"
+GARDENS = 50
+ESPS_PER_GARDEN = 4
+READINGS_PER_DEVICE = 1000
+# Partition indexes are named after the partition and the index columns.
+INDEX_SUFFIX = "device_id_timestamp_id_idx"
+NOW = datetime(2026, 1, 1)
+GARDEN = GARDENS // 2
+TYPE = DeviceType.AIR_TEMPERATURE_SENSOR
+START, END = NOW - timedelta(hours=6), NOW - timedelta(minutes=1)
+
+SEED = [
+    """
+    INSERT INTO users (email, admin, created_at, updated_at)
+    VALUES ('plan-check@example.com', false, now(), now())
+    """,
+    """
+    INSERT INTO gardens (user_id, name, send_notifications, enable_automation,
+                         use_fahrenheit, created_at, updated_at)
+    SELECT 1, 'garden ' || g, false, false, false, now(), now()
+    FROM generate_series(1, CAST(:gardens AS int)) g
+    """,
+    """
+    INSERT INTO esp_devices (mac, secret, garden_id, status, created_at, updated_at)
+    SELECT 'mac-' || e, 'secret', (e - 1) / CAST(:esps_per_garden AS int) + 1,
+           false, now(), now()
+    FROM generate_series(
+        1, CAST(:gardens AS int) * CAST(:esps_per_garden AS int)) e
+    """,
+    """
+    INSERT INTO devices (esp_id, type, created_at, updated_at)
+    SELECT e.id, t.type::devicetype, now(), now()
+    FROM esp_devices e CROSS JOIN unnest(CAST(:types AS text[])) AS t(type)
+    """,
+    """
+    INSERT INTO readings (device_id, value, numeric_value, timestamp,
+                          created_at, updated_at)
+    SELECT d.id, n::text, n, CAST(:now AS timestamp) - n * interval '1 minute',
+           now(), now()
+    FROM devices d
+    CROSS JOIN generate_series(1, CAST(:readings_per_device AS int)) n
+    """,
+]
+
+CHECKS = {
+    "last": lambda repo: repo.get_last_for_garden_device_type(GARDEN, TYPE),
+    "paginated": lambda repo: repo.get_by_garden_filters_paginated(
+        GARDEN, TYPE, START, END, 0, 50),
+    "keyset": lambda repo: repo.get_by_garden_filters_paginated(
+        GARDEN, TYPE, START, END, 0, 50,
+        after=(NOW - timedelta(hours=3), 2 ** 31 - 1)),
+    "stats": lambda repo: repo.get_stats_for_garden_device_type(
+        GARDEN, TYPE, START, END),
+}
+
+
+def plan_nodes(plan: dict):
+    """
+    Yield all nodes of an ``EXPLAIN (FORMAT JSON)`` plan tree.
+    """
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+@pytest.fixture(scope="module")
+def seeded(db_url):
+    """
+    Seed the scratch schema and yield a function running a check on a
+    session of it, with the event loop all its connections belong to.
+    """
+    loop = asyncio.new_event_loop()
+    admin = create_async_engine(db_url)
+    engine = create_async_engine(
+        db_url, connect_args={"server_settings": {"search_path": SCHEMA}})
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("EXPLAIN"):
+            statements.append((statement, parameters))
+
+    async def setup():
+        async with admin.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            await ReadingRepository(session).ensure_partitions(
+                month_start(NOW, -2), month_start(NOW, 2))
+
+        async with engine.begin() as conn:
+            params = {
+                "gardens": GARDENS,
+                "esps_per_garden": ESPS_PER_GARDEN,
+                "readings_per_device": READINGS_PER_DEVICE,
+                "types": [t.name for t in DeviceType],
+                "now": NOW,
+            }
+            for sql in SEED:
+                await conn.execute(text(sql), params)
+            await conn.execute(text("ANALYZE"))
+
+    async def explain(call) -> list[dict]:
+        async with AsyncSession(engine) as session:
+            statements.clear()
+            await call(ReadingRepository(session))
+            conn = await session.connection()
+            nodes = []
+            for statement, parameters in list(statements):
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                plan = result.scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes.extend(plan_nodes(plan[0]["Plan"]))
+            return nodes
+
+    async def teardown():
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await admin.dispose()
+
+    try:
+        loop.run_until_complete(setup())
+        yield lambda call: loop.run_until_complete(explain(call))
+    finally:
+        loop.run_until_complete(teardown())
+        loop.close()
+
+
+@pytest.mark.parametrize("name", CHECKS)
+def test_reading_query_uses_time_series_index(seeded, name):
+    nodes = seeded(CHECKS[name])
+    month = partition_name(month_start(START))
+
+    readings = [
+        n for n in nodes if n.get("Relation Name", "").startswith("readings_")]
+    # empty partitions may be planned as seq scans, harmlessly
+    seq_scans = [
+        n for n in readings
+        if n["Node Type"] == "Seq Scan" and n["Relation Name"] == month]
+    # bitmap index scans name the index but not the partition
+    indexes = {
+        n["Index Name"] for n in nodes
+        if n.get("Index Name", "").startswith("readings_")}
+    partitions = {n["Relation Name"] for n in readings}
+
+    assert not seq_scans
+    assert any(i.endswith(INDEX_SUFFIX) for i in indexes), indexes
+    # the latest reading may be in any month
+    if name != "last":
+        assert partitions == {month}
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+
+from exceptions.scheme import AppException  # noqa: E402
+from repos.readings import ROLLUPS  # noqa: E402
+from services.readings import ReadingService, merge_aggregates  # noqa: E402
+
+DAY, HOUR, MINUTE = ROLLUPS
+
+
+def plan(bucket, start, end):
+    return [
+        (rollup.name, s, e)
+        for rollup, s, e in ReadingService(None).plan_rollups(bucket, start, end)
+    ]
+
+
+def test_aligned_range_uses_coarsest_rollup():
+    start, end = datetime(2026, 1, 1), datetime(2026, 1, 31)
+    assert plan(timedelta(days=1), start, end) == [("day", start, end)]
+
+
+def test_unaligned_range_reads_edges_from_finer_rollups():
+    end = datetime(2026, 3, 15, 13, 27)
+    start = end - timedelta(days=30)
+
+    assert plan(timedelta(days=1), start, end) == [
+        ("minute", start, datetime(2026, 2, 13, 14)),
+        ("hour", datetime(2026, 2, 13, 14), datetime(2026, 2, 14)),
+        ("day", datetime(2026, 2, 14), datetime(2026, 3, 15)),
+        ("hour", datetime(2026, 3, 15), datetime(2026, 3, 15, 13)),
+        ("minute", datetime(2026, 3, 15, 13), end),
+    ]
+
+
+def test_bucket_limits_rollups():
+    end = datetime(2026, 3, 15, 13, 27)
+    start = end - timedelta(days=30)
+
+    # hour rows do not straddle 2 hour buckets, day rows would
+    assert [name for name, _, _ in plan(timedelta(hours=2), start, end)] == [
+        "minute", "hour", "minute"]
+    assert plan(timedelta(minutes=15), start, end) == [("minute", start, end)]
+
+
+def test_open_end_and_short_range():
+    start = datetime(2026, 3, 1, 10, 30)
+    assert plan(timedelta(days=1), start, None) == [
+        ("minute", start, datetime(2026, 3, 1, 11)),
+        ("hour", datetime(2026, 3, 1, 11), datetime(2026, 3, 2)),
+        ("day", datetime(2026, 3, 2), None),
+    ]
+    end = datetime(2026, 3, 1, 10, 50)
+    assert plan(timedelta(days=1), start, end) == [("minute", start, end)]
+
+
+def test_segments_cover_range_without_gaps():
+    start = datetime(2025, 12, 31, 23, 59)
+    end = datetime(2026, 2, 1, 0, 1)
+    segments = plan(timedelta(days=7), start, end)
+
+    assert segments[0][1] == start and segments[-1][2] == end
+    for (_, _, previous_end), (_, next_start, _) in zip(segments, segments[1:]):
+        assert previous_end == next_start
+
+
+@pytest.mark.parametrize("bucket", [timedelta(0), timedelta(seconds=90)])
+def test_invalid_bucket(bucket):
+    with pytest.raises(AppException):
+        plan(bucket, datetime(2026, 1, 1), None)
+
+
+def test_merge_aggregates_combines_split_buckets():
+    bucket = datetime(2026, 2, 13)
+    rows = [
+        (1, 7, bucket, 2, 10.0, 4.0, 6.0, 6.0, datetime(2026, 2, 13, 13)),
+        (2, 8, bucket, 1, 1.0, 1.0, 1.0, 1.0, datetime(2026, 2, 13, 15)),
+        (1, 7, bucket, 3, 6.0, 1.0, 3.0, 3.0, datetime(2026, 2, 13, 20)),
+        (1, 7, datetime(2026, 2, 14), 1, 5.0, 5.0, 5.0, 5.0, datetime(2026, 2, 14, 1)),
+    ]
+
+    assert merge_aggregates(rows) == [
+        (1, 7, bucket, 5, 16.0, 1.0, 6.0, 3.0, datetime(2026, 2, 13, 20)),
+        (1, 7, datetime(2026, 2, 14), 1, 5.0, 5.0, 5.0, 5.0, datetime(2026, 2, 14, 1)),
+        (2, 8, bucket, 1, 1.0, 1.0, 1.0, 1.0, datetime(2026, 2, 13, 15)),
+    ]
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("fastapi")
+
+from controllers.mqtt_handlers.device_reading_handler import (  # noqa: E402
+    MAX_SAMPLE_AGE,
+    parse_sensor_payload,
+)
+
+RECEIVED = datetime(2026, 3, 1, 12, 0, 0)
+RECEIVED_TS = (RECEIVED - datetime(1970, 1, 1)).total_seconds()
+
+
+def test_batch_with_offsets_and_timestamps():
+    samples = parse_sensor_payload(
+        {
+            "ts": RECEIVED_TS,
+            "readings": [
+                {"sensor": "light", "values": [1, 2], "offsets": [-60, 0]},
+                {"sensor": "battery", "values": [87], "timestamps": [RECEIVED_TS - 10]},
+            ],
+        },
+        RECEIVED,
+    )
+
+    assert samples[0].timestamps == [RECEIVED - timedelta(seconds=60), RECEIVED]
+    assert samples[1].timestamps == [RECEIVED - timedelta(seconds=10)]
+
+
+@pytest.mark.parametrize("entry", [42, "light", None, ["light", [1]]])
+def test_non_object_entries_are_skipped(entry):
+    samples = parse_sensor_payload(
+        {"readings": [entry, {"sensor": "light", "values": [1]}]}, RECEIVED)
+
+    assert [s.sensor for s in samples] == ["light"]
+
+
+@pytest.mark.parametrize("payload", [[1, 2], "readings", 7])
+def test_non_object_payload_is_ignored(payload):
+    assert parse_sensor_payload(payload, RECEIVED) == []
+
+
+@pytest.mark.parametrize(
+    "ts, expected",
+    [
+        (0, RECEIVED),
+        (RECEIVED_TS + 3600, RECEIVED),
+        (RECEIVED_TS - MAX_SAMPLE_AGE.total_seconds() - 1, RECEIVED),
+        (RECEIVED_TS - 3600, RECEIVED - timedelta(hours=1)),
+    ],
+)
+def test_untrusted_sample_times_are_replaced(ts, expected):
+    samples = parse_sensor_payload(
+        {"readings": [{"sensor": "light", "values": [1], "timestamps": [ts]}]},
+        RECEIVED)
+
+    assert samples[0].timestamps == [expected]
@@ -0,0 +1,215 @@
+"""
+MQTT shared-subscription mode against a local broker stand-in.
+
+Several :class:`MqttTopicSubscriber` replicas are connected to an
+in-process broker implementing ``$share/<group>/<filter>`` semantics:
+round-robin within a group, fan-out to plain subscriptions, and one copy
+of a message per matching subscription of a client, tagged with its
+subscription identifier.
+"""
+import asyncio
+import json
+from collections import Counter
+from dataclasses import dataclass
+from itertools import cycle
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiomqtt")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("fastapi")
+
+import controllers.mqtt_handlers.actuator_confirm_handler as confirm_module  # noqa: E402
+import controllers.mqtt_handlers.actuator_state_handler as state_module  # noqa: E402
+import core.mqtt.mqtt_subscriber as subscriber_module  # noqa: E402
+from controllers.mqtt_handlers import ActuatorConfirmHandler, ActuatorStateHandler  # noqa: E402
+from core.mqtt.base_mqtt_callback_handler import BaseMqttCallbackHandler  # noqa: E402
+from core.mqtt.mqtt_subscriber import MqttTopicSubscriber  # noqa: E402
+from core.mqtt.topic_router import TopicRouter  # noqa: E402
+from core.state.device_cache import DeviceRoute  # noqa: E402
+
+REPLICAS = 3
+MESSAGES = 300
+GROUP = "api"
+
+
+@dataclass
+class FakeMessage:
+    topic: str
+    payload: bytes
+    properties: object = None
+
+
+class LocalBroker:
+    """
+    Minimal broker stand-in routing published messages to subscribers.
+    """
+
+    def __init__(self):
+        self._router = TopicRouter()
+        self._groups: dict[tuple[str, str], list[MqttTopicSubscriber]] = {}
+        self._turns: dict[tuple[str, str], cycle] = {}
+
+    def subscribe(
+        self, subscriber: MqttTopicSubscriber, topic_filter: str, subscription_id: int
+    ):
+        if topic_filter.startswith("$share/"):
+            _, group, plain = topic_filter.split("/", 2)
+            key = (group, plain)
+            if key not in self._groups:
+                self._groups[key] = []
+                self._router.add(plain, (key, subscription_id))
+            self._groups[key].append(subscriber)
+            self._turns[key] = cycle(self._groups[key])
+        else:
+            self._router.add(topic_filter, (subscriber, subscription_id))
+
+    async def publish(self, topic: str, payload: dict):
+        for (target, subscription_id), _ in self._router.match(topic):
+            if isinstance(target, tuple):
+                target = next(self._turns[target])
+            message = FakeMessage(
+                topic, json.dumps(payload).encode(),
+                SimpleNamespace(SubscriptionIdentifier=[subscription_id]))
+            await target._handle_message(message)
+
+
+class FakeClient:
+    """
+    Stands in for ``aiomqtt.Client`` of a single replica.
+    """
+
+    def __init__(self, broker: LocalBroker, subscriber: MqttTopicSubscriber):
+        self.broker = broker
+        self.subscriber = subscriber
+
+    async def subscribe(self, topic_filter: str, properties=None):
+        self.broker.subscribe(
+            self.subscriber, topic_filter, properties.SubscriptionIdentifier)
+
+
+class CountingHandler(BaseMqttCallbackHandler):
+    def __init__(self, template: str, shared: bool, counter: Counter, replica: int):
+        super().__init__(template)
+        self.shared = shared
+        self.counter = counter
+        self.replica = replica
+
+    async def __call__(self, topic: str, payload: dict, mac: str):
+        self.counter[(self.topic_template, self.replica)] += 1
+
+
+@pytest.fixture
+def new_replica(monkeypatch):
+    monkeypatch.setattr(subscriber_module, "create_tls_context", lambda: None)
+    monkeypatch.setattr(MqttTopicSubscriber, "_instance", None)
+
+    def create(broker: LocalBroker, shared_group: str | None) -> MqttTopicSubscriber:
+        MqttTopicSubscriber._instance = None
+        subscriber = MqttTopicSubscriber()
+        subscriber.shared_group = shared_group
+        subscriber._client = FakeClient(broker, subscriber)
+        return subscriber
+
+    return create
+
+
+def totals(counter: Counter, template: str) -> list[int]:
+    return [counter[(template, i)] for i in range(REPLICAS)]
+
+
+@pytest.mark.parametrize("shared_group", [None, GROUP])
+def test_shared_handlers_are_balanced(new_replica, shared_group):
+    async def run() -> Counter:
+        broker = LocalBroker()
+        counter = Counter()
+        for i in range(REPLICAS):
+            replica = new_replica(broker, shared_group)
+            await replica.subscribe_handler(
+                CountingHandler("{mac}/device/sensor", True, counter, i))
+            await replica.subscribe_handler(
+                CountingHandler("{mac}/status", False, counter, i))
+
+        for n in range(MESSAGES):
+            mac = f"esp-{n % 20:02d}"
+            await broker.publish(f"{mac}/device/sensor", {"type": "1", "value": n})
+            await broker.publish(f"{mac}/status", {"online": True})
+        return counter
+
+    counter = asyncio.run(run())
+
+    sensor = totals(counter, "{mac}/device/sensor")
+    if shared_group is None:
+        assert sensor == [MESSAGES] * REPLICAS
+    else:
+        assert sum(sensor) == MESSAGES and all(sensor)
+    assert totals(counter, "{mac}/status") == [MESSAGES] * REPLICAS
+
+
+def test_confirm_is_stored_once_across_replicas(new_replica, monkeypatch):
+    """
+    Every replica resolves its command tracker and pushes the WebSocket
+    event, but the device update and the notification happen once per
+    confirmation.
+    """
+    route = DeviceRoute(device_id=7, esp_id=3, garden_id=1, user_id=5, agent_id=None)
+    confirmed, pushed, updates, notifications = [], [], [], []
+
+    async def get_route(mac, device_type):
+        return route
+
+    async def send_to_user(user_id, event):
+        pushed.append(event)
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeDeviceRepository:
+        def __init__(self, session):
+            pass
+
+        async def update(self, device_id, **fields):
+            updates.append((device_id, fields))
+
+    class FakeNotificationService:
+        def __init__(self, repo):
+            pass
+
+        async def create(self, dto):
+            notifications.append(dto)
+
+    monkeypatch.setattr(
+        confirm_module.command_tracker, "confirm",
+        lambda *args: confirmed.append(args))
+    monkeypatch.setattr("core.state.device_cache.device_cache.get", get_route)
+    monkeypatch.setattr(
+        "core.websocket.websocket_manager.websocket_manager.send_to_user", send_to_user)
+    monkeypatch.setattr(state_module, "async_session_maker", FakeSession)
+    monkeypatch.setattr(state_module, "DeviceRepository", FakeDeviceRepository)
+    monkeypatch.setattr(state_module, "NotificationRepository", lambda session: None)
+    monkeypatch.setattr(state_module, "NotificationService", FakeNotificationService)
+
+    async def run():
+        broker = LocalBroker()
+        for _ in range(REPLICAS):
+            replica = new_replica(broker, GROUP)
+            # handlers of the API with MQTT_INGEST_IN_API
+            await replica.subscribe_handler(ActuatorConfirmHandler())
+            await replica.subscribe_handler(ActuatorStateHandler())
+
+        for n in range(MESSAGES):
+            await broker.publish(
+                f"esp-{n % 20:02d}/device/confirm",
+                {"device": "water", "action": "on" if n % 2 else "off", "status": 1})
+
+    asyncio.run(run())
+
+    assert len(confirmed) == MESSAGES * REPLICAS
+    assert len(pushed) == MESSAGES * REPLICAS
+    assert len(updates) == MESSAGES
+    assert len(notifications) == MESSAGES
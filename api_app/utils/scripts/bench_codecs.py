@@ -0,0 +1,73 @@
+"""
+Micro-benchmark of MQTT payload codecs.
+
+Compares bytes on the wire and encode/decode cost of the available codecs
+(JSON, and CBOR / MessagePack if ``cbor2`` / ``msgpack`` are installed) on
+the payloads of the sensor, confirm and control topics.
+
+Run from ``api_app``::
+
+    python -m utils.scripts.bench_codecs
+"""
+import random
+import timeit
+
+from core.mqtt.codecs import CODECS
+
+NUMBER = 2000
+REPEAT = 5
+
+SENSORS = (
+    "light", "air_humidity", "soil_moisture",
+    "air_temperature", "signal_strenght", "battery",
+)
+
+
+def batched_sensor_payload(samples: int) -> dict:
+    rnd = random.Random(42)
+    return {
+        "ts": 1760774400,
+        "readings": [
+            {
+                "sensor": sensor,
+                "values": [round(rnd.uniform(0, 1000), 2) for _ in range(samples)],
+                "offsets": [-10 * i for i in reversed(range(samples))],
+            }
+            for sensor in SENSORS
+        ],
+    }
+
+
+PAYLOADS = {
+    "sensor (single)": {"sensor": "light", "values": [512.37]},
+    "sensor (batch 6x6)": batched_sensor_payload(6),
+    "sensor (batch 6x60)": batched_sensor_payload(60),
+    "confirm": {"device": "water", "action": "on", "status": "success"},
+    "control": {"action": {"id": 0}},
+}
+
+
+def best_us(stmt) -> float:
+    return min(timeit.repeat(stmt, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+
+
+def main():
+    print(f"codecs: {', '.join(CODECS)}")
+    print(
+        f"{'payload':<20} | {'codec':<8} | {'bytes':>6} | "
+        f"{'encode us':>9} | {'decode us':>9}")
+
+    for label, payload in PAYLOADS.items():
+        for codec in CODECS.values():
+            data = codec.encode(payload)
+            assert codec.decode(data) == payload
+
+            encode = best_us(lambda: codec.encode(payload))
+            decode = best_us(lambda: codec.decode(data))
+            print(
+                f"{label:<20} | {codec.name:<8} | {len(data):>6} | "
+                f"{encode:>9.2f} | {decode:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark of the column-tuple read path of reading lists and exports.
+
+Seeds a scratch Postgres schema with one garden, one sensor and 100k
+readings, then compares the previous ORM read path, which loaded
+``ReadingDb`` entities and their ``device`` and ``esp`` relationships to
+build each DTO, with the column-tuple path of :class:`ReadingRepository`.
+Pages of several sizes and a full export are timed, and the number of
+statements per call is counted. The scratch schema is dropped afterwards.
+
+Run from ``api_app`` against a development database::
+
+    python -m utils.scripts.bench_reading_projection
+"""
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, desc, event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import noload
+
+from common_db.db import Base, ReadingDb
+from common_db.enums import DeviceType
+from core.config import CONFIG
+from mappers.readings import db_to_dto, row_to_dto
+from repos.readings import ReadingRepository, month_start
+from services.readings import encode_ndjson
+
+SCHEMA = "projection_bench"
+READINGS = 100_000
+PAGE_SIZES = (100, 1000, 10_000, READINGS)
+EXPORT_BATCH = 5000
+REPEAT = 5
+NOW = datetime(2026, 1, 1)
+TYPE = DeviceType.AIR_TEMPERATURE_SENSOR
+
+SEED = [
+    """
+    INSERT INTO users (email, admin, created_at, updated_at)
+    VALUES ('projection-bench@example.com', false, now(), now())
+    """,
+    """
+    INSERT INTO gardens (user_id, name, send_notifications, enable_automation,
+                         use_fahrenheit, created_at, updated_at)
+    VALUES (1, 'garden', false, false, false, now(), now())
+    """,
+    """
+    INSERT INTO esp_devices (mac, secret, garden_id, status, created_at, updated_at)
+    VALUES ('mac-1', 'secret', 1, false, now(), now())
+    """,
+    """
+    INSERT INTO devices (esp_id, type, created_at, updated_at)
+    VALUES (1, CAST(:type AS devicetype), now(), now())
+    """,
+    """
+    INSERT INTO readings (device_id, value, numeric_value, timestamp,
+                          created_at, updated_at)
+    SELECT 1, n::text, n, CAST(:now AS timestamp) - n * interval '1 minute',
+           now(), now()
+    FROM generate_series(1, :readings) n
+    """,
+]
+
+
+async def orm_page(session: AsyncSession, limit: int) -> list:
+    """Previous list path: ReadingDb entities mapped with ``db_to_dto``."""
+    result = await session.execute(
+        select(ReadingDb)
+        .where(
+            and_(
+                ReadingDb.device_id.in_([1]),
+                ReadingDb.timestamp >= datetime.min,
+                ReadingDb.timestamp <= NOW,
+            )
+        )
+        .order_by(desc(ReadingDb.timestamp), desc(ReadingDb.id))
+        .limit(limit)
+    )
+    return [db_to_dto(r) for r in result.scalars().all()]
+
+
+async def column_page(session: AsyncSession, limit: int) -> list:
+    """Current list path: column tuples mapped with ``row_to_dto``."""
+    rows = await ReadingRepository(session).get_by_garden_filters_paginated(
+        1, TYPE, datetime.min, NOW, 0, limit)
+    return [row_to_dto(r) for r in rows]
+
+
+async def orm_export(session: AsyncSession) -> int:
+    """Previous export path: streamed ReadingDb entities."""
+    result = await session.stream_scalars(
+        select(ReadingDb)
+        .options(noload(ReadingDb.device))
+        .where(ReadingDb.device_id == 1)
+        .order_by(ReadingDb.timestamp, ReadingDb.id)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+    size = 0
+    async for batch in result.partitions():
+        size += len(encode_ndjson(batch, 1))
+    return size
+
+
+async def column_export(session: AsyncSession) -> int:
+    """Current export path: streamed column tuples."""
+    size = 0
+    async for batch in ReadingRepository(session).stream_for_device(
+        1, datetime.min, NOW, EXPORT_BATCH
+    ):
+        size += len(encode_ndjson(batch, 1))
+    return size
+
+
+async def measure(engine, statements: list, call) -> tuple[float, int]:
+    """
+    Return the best time in milliseconds over ``REPEAT`` runs, each in a
+    fresh session, and the number of statements of one run.
+    """
+    best = float("inf")
+    for _ in range(REPEAT):
+        async with AsyncSession(engine) as session:
+            statements.clear()
+            started = time.perf_counter()
+            await call(session)
+            best = min(best, time.perf_counter() - started)
+    return best * 1000, len(statements)
+
+
+async def main():
+    admin = create_async_engine(CONFIG.DB_CONNECTION_STRING)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    engine = create_async_engine(
+        CONFIG.DB_CONNECTION_STRING,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            await ReadingRepository(session).ensure_partitions(
+                month_start(NOW, -3), month_start(NOW, 1))
+
+        async with engine.begin() as conn:
+            params = {"type": TYPE.name, "now": NOW, "readings": READINGS}
+            for sql in SEED:
+                await conn.execute(text(sql), params)
+            await conn.execute(text("ANALYZE"))
+
+        async with AsyncSession(engine) as session:
+            assert await orm_page(session, 10) == await column_page(session, 10)
+
+        print(f"{'call':<14} | {'orm ms':>9} | {'stmts':>5} | "
+              f"{'columns ms':>10} | {'stmts':>5} | speedup")
+        cases = [
+            (f"page {n}",
+             lambda s, n=n: orm_page(s, n),
+             lambda s, n=n: column_page(s, n))
+            for n in PAGE_SIZES
+        ] + [("export", orm_export, column_export)]
+
+        for name, orm_call, column_call in cases:
+            orm_ms, orm_stmts = await measure(engine, statements, orm_call)
+            column_ms, column_stmts = await measure(engine, statements, column_call)
+            print(f"{name:<14} | {orm_ms:>9.1f} | {orm_stmts:>5} | "
+                  f"{column_ms:>10.1f} | {column_stmts:>5} | "
+                  f"{orm_ms / column_ms:.1f}x")
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await admin.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
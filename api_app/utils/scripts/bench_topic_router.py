@@ -0,0 +1,91 @@
+"""
+Micro-benchmark of MQTT topic matching.
+
+Compares the trie-based :class:`TopicRouter` with the previous linear scan,
+which re-split every registered pattern for every incoming message.
+
+Run from ``api_app``::
+
+    python -m utils.scripts.bench_topic_router
+"""
+import random
+import timeit
+
+from core.mqtt.topic_router import TopicRouter
+
+PATTERN_COUNTS = (10, 100, 1000)
+TOPIC_COUNT = 1000
+REPEAT = 5
+
+
+def linear_topic_matches(pattern: str, topic: str) -> bool:
+    """Previous matcher of ``MqttTopicSubscriber``, kept as a baseline."""
+    pattern_parts = pattern.split("/")
+    topic_parts = topic.split("/")
+
+    for p, t in zip(pattern_parts, topic_parts):
+        if p == "#":
+            return True
+        if p == "+":
+            continue
+        if p != t:
+            return False
+
+    return len(pattern_parts) == len(topic_parts)
+
+
+def linear_match(patterns: list[str], topic: str) -> list[str]:
+    return [p for p in patterns if linear_topic_matches(p, topic)]
+
+
+def make_patterns(count: int) -> list[str]:
+    """Mix of exact, '+' and '#' patterns over ``count`` device prefixes."""
+    shapes = (
+        "{mac}/device/sensor",
+        "{mac}/+/confirm",
+        "{mac}/status",
+        "{mac}/#",
+    )
+    return [
+        shapes[i % len(shapes)].format(mac=f"esp-{i:04d}")
+        for i in range(count - 4)
+    ] + ["+/device/sensor", "+/device/confirm", "+/status", "+/conn"]
+
+
+def make_topics(count: int, pattern_count: int) -> list[str]:
+    suffixes = ("device/sensor", "device/confirm", "status", "conn")
+    rnd = random.Random(42)
+    return [
+        f"esp-{rnd.randrange(pattern_count):04d}/{rnd.choice(suffixes)}"
+        for _ in range(count)
+    ]
+
+
+def main():
+    print(f"{'patterns':>8} | {'linear us/msg':>13} | {'trie us/msg':>11} | speedup")
+    for n in PATTERN_COUNTS:
+        patterns = make_patterns(n)
+        topics = make_topics(TOPIC_COUNT, n)
+
+        router = TopicRouter()
+        for p in patterns:
+            router.add(p, p)
+
+        for topic in topics:
+            assert sorted(linear_match(patterns, topic)) == sorted(
+                cb for cb, _ in router.match(topic))
+
+        linear = min(timeit.repeat(
+            lambda: [linear_match(patterns, t) for t in topics],
+            number=1, repeat=REPEAT))
+        trie = min(timeit.repeat(
+            lambda: [router.match(t) for t in topics],
+            number=1, repeat=REPEAT))
+
+        print(
+            f"{n:>8} | {linear / TOPIC_COUNT * 1e6:>13.2f} | "
+            f"{trie / TOPIC_COUNT * 1e6:>11.2f} | {linear / trie:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ from common_db.db import (
     NotificationDb, EspDeviceDb, UserDeviceDb
 )
 from core.db_context import async_session_maker
+from core.ingest.values import to_numeric
+from repos.readings import ReadingRepository
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -215,9 +217,11 @@ async def create_devices_and_readings(session, esp_devices):
                     minutes=random.randint(0, 59)
                 )
 
+                value = generate_realistic_reading_value(device_type)
                 reading = ReadingDb(
                     device_id=device.id,
-                    value=generate_realistic_reading_value(device_type),
+                    value=value,
+                    numeric_value=to_numeric(value),
                     timestamp=reading_time
                 )
                 session.add(reading)
@@ -293,6 +297,7 @@ async def generate_mock_data():
             await create_notifications(session, users)
 
             await session.commit()
+            await ReadingRepository(session).rebuild_rollups()
             logger.info("All data committed to database")
 
             # Print summary
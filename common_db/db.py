@@ -7,6 +7,8 @@ from sqlalchemy import (
     DateTime,
     Enum as SqlEnum,
     Boolean,
+    Float,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.orm import mapped_column, relationship, Mapped, DeclarativeBase
@@ -94,6 +96,9 @@ class GardenDb(SuperDb):
 class DeviceDb(SuperDb):
     """Represents a device attached to an ESP device (e.g. sensor, actuator)."""
     __tablename__ = "devices"
+    __table_args__ = (
+        Index("ix_devices_esp_id_type", "esp_id", "type"),
+    )
 
     esp_id: Mapped[int] = mapped_column(Integer, ForeignKey("esp_devices.id"))
     type: Mapped[DeviceType] = mapped_column(
@@ -103,23 +108,87 @@ class DeviceDb(SuperDb):
     esp: Mapped["EspDeviceDb"] = relationship(
         "EspDeviceDb", back_populates="devices", lazy="selectin")
     readings: Mapped[list["ReadingDb"]] = relationship(
-        "ReadingDb", back_populates="device", cascade="all, delete-orphan"
+        "ReadingDb", back_populates="device", cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
 class ReadingDb(SuperDb):
-    """Represents a sensor reading from a device."""
+    """
+    Represents a sensor reading from a device.
+
+    The table is range-partitioned by month on ``timestamp``, so the
+    primary key and unique constraints include it. Partitions are
+    created and dropped by ``ReadingRepository``.
+    """
     __tablename__ = "readings"
+    __table_args__ = (
+        UniqueConstraint("ingest_key", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
-    device_id: Mapped[int] = mapped_column(Integer, ForeignKey("devices.id"))
+    device_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("devices.id", ondelete="CASCADE"))
     value: Mapped[str] = mapped_column(String, nullable=False)
+    numeric_value: Mapped[Optional[float]] = mapped_column(
+        Float, nullable=True)
     timestamp: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow)
+        DateTime, primary_key=True, default=datetime.utcnow)
+    ingest_key: Mapped[Optional[str]] = mapped_column(
+        String(32), nullable=True)
 
     device: Mapped["DeviceDb"] = relationship(
         "DeviceDb", back_populates="readings", lazy="selectin")
 
 
+# Serves latest-first range scans of a single device, ties broken by id.
+Index(
+    "ix_readings_device_id_timestamp",
+    ReadingDb.device_id,
+    ReadingDb.timestamp.desc(),
+    ReadingDb.id.desc(),
+)
+
+
+class ReadingRollupDb(SuperDb):
+    """
+    Abstract per-device aggregate of the numeric readings in a time bucket.
+
+    Rows are keyed by device and bucket start and updated incrementally
+    as readings are stored. ``last`` is the value of the reading with the
+    latest ``last_timestamp`` in the bucket.
+    """
+    __abstract__ = True
+
+    device_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("devices.id", ondelete="CASCADE"))
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    sum: Mapped[float] = mapped_column(Float, nullable=False)
+    min: Mapped[float] = mapped_column(Float, nullable=False)
+    max: Mapped[float] = mapped_column(Float, nullable=False)
+    last: Mapped[float] = mapped_column(Float, nullable=False)
+    last_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ReadingRollupMinuteDb(ReadingRollupDb):
+    """Rollup of readings per device and minute."""
+    __tablename__ = "reading_rollups_minute"
+    __table_args__ = (UniqueConstraint("device_id", "bucket_start"),)
+
+
+class ReadingRollupHourDb(ReadingRollupDb):
+    """Rollup of readings per device and hour."""
+    __tablename__ = "reading_rollups_hour"
+    __table_args__ = (UniqueConstraint("device_id", "bucket_start"),)
+
+
+class ReadingRollupDayDb(ReadingRollupDb):
+    """Rollup of readings per device and day (UTC)."""
+    __tablename__ = "reading_rollups_day"
+    __table_args__ = (UniqueConstraint("device_id", "bucket_start"),)
+
+
 class NotificationDb(SuperDb):
     """Represents a notification sent to a user."""
     __tablename__ = "notifications"
@@ -145,7 +214,7 @@ class EspDeviceDb(SuperDb):
     client_crt: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
     garden_id: Mapped[Optional[int]] = mapped_column(
-        Integer, ForeignKey("gardens.id"), nullable=True)
+        Integer, ForeignKey("gardens.id"), nullable=True, index=True)
     garden: Mapped[Optional["GardenDb"]] = relationship(
         "GardenDb", back_populates="esp_devices", lazy="selectin")
 
@@ -40,6 +40,33 @@ class ScheduleActionType(str, Enum):
     HEATING_MAT_OFF = "HEATING_MAT_OFF"
 
 
+class DeliveryStatus(str, Enum):
+    """
+    Represents the outcome of sending a control command to an ESP device.
+    """
+    ACKED = "ACKED"
+    CONFIRMED = "CONFIRMED"
+    UNCONFIRMED = "UNCONFIRMED"
+    TIMED_OUT = "TIMED_OUT"
+    FAILED = "FAILED"
+
+
+class ResampleMethod(str, Enum):
+    """
+    Represents how readings within a resampling interval are combined.
+    """
+    MEAN = "mean"
+    LAST = "last"
+
+
+class ReadingExportFormat(str, Enum):
+    """
+    Represents the file formats readings can be exported in.
+    """
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class ControlActionType(IntEnum):
     """
     Represents low-level control actions mapped to device commands.
@@ -6,6 +6,7 @@ import ssl
 import logging
 import paho.mqtt.client as mqtt
 import os
+from collections import deque
 
 logging.basicConfig(
     level=logging.INFO,
@@ -48,6 +49,13 @@ SENSORS = {
     "battery": {"min": 20, "max": 100, "unit": "%"}
 }
 
+# Sensors are sampled every SAMPLE_INTERVAL seconds and sent as one batch
+# every BATCH_INTERVAL seconds. Samples taken while disconnected are kept
+# (up to MAX_BACKLOG_ROUNDS) and uploaded with their original times.
+SAMPLE_INTERVAL = int(os.getenv("SAMPLE_INTERVAL", "10"))
+BATCH_INTERVAL = int(os.getenv("BATCH_INTERVAL", "60"))
+MAX_BACKLOG_ROUNDS = 360
+
 # Device states
 DEVICE_STATES = {
     "water": False,
@@ -100,32 +108,54 @@ def on_message(client, userdata, msg):
             logging.error("Error processing message: %s", e)
 
 
+def sample_sensors():
+    samples = {}
+    for sensor_name, config in SENSORS.items():
+        value = round(random.uniform(config["min"], config["max"]), 2)
+
+        if sensor_name == "soil_moisture" and DEVICE_STATES["water"]:
+            value = max(value, 60)
+
+        samples[sensor_name] = value
+    return samples
+
+
+def build_batch(rounds):
+    """Build one batched sensor payload with offsets to a base timestamp."""
+    base_ts = int(rounds[-1][0])
+    readings = []
+    for sensor_name, config in SENSORS.items():
+        readings.append({
+            "sensor": sensor_name,
+            "values": [samples[sensor_name] for _, samples in rounds],
+            "offsets": [int(ts) - base_ts for ts, _ in rounds],
+            "unit": config["unit"],
+        })
+    return {"ts": base_ts, "readings": readings}
+
+
 def publish_sensors(client):
     logging.info("Starting sensor publishing...")
+    backlog = deque(maxlen=MAX_BACKLOG_ROUNDS)
+    last_publish = time.time()
+
     while True:
         try:
-            if client.is_connected():
-                for sensor_name, config in SENSORS.items():
-                    value = round(random.uniform(
-                        config["min"], config["max"]), 2)
-
-                    if sensor_name == "soil_moisture" and DEVICE_STATES["water"]:
-                        value = max(value, 60)
-
-                    payload = {
-                        "sensor": sensor_name,
-                        "values": [value],
-                        "unit": config["unit"]
-                    }
-
-                    client.publish(TOPIC_SENSOR, json.dumps(payload))
-                    logging.info("Sensor %s: %s %s", sensor_name,
-                                 value, config["unit"])
-                    time.sleep(0.5)
+            backlog.append((time.time(), sample_sensors()))
+
+            if client.is_connected() and time.time() - last_publish >= BATCH_INTERVAL:
+                payload = build_batch(list(backlog))
+                info = client.publish(TOPIC_SENSOR, json.dumps(payload), qos=1)
+
+                if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                    logging.info("Sent %d samples of %d sensors in one batch",
+                                 len(backlog) * len(SENSORS), len(SENSORS))
+                    backlog.clear()
+                    last_publish = time.time()
         except Exception as e:
             logging.error("Sensor error: %s", e)
 
-        time.sleep(10)
+        time.sleep(SAMPLE_INTERVAL)
 
 
 def publish_heartbeat(client):